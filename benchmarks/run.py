@@ -0,0 +1,355 @@
+"""
+Measures the SDK's own overhead against synthetic corpora, with the network taken out of the picture, and saves the
+results as JSON so that releases can be compared.
+
+Run from the root of the project:
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sizes 1000 10000 --output new.json --compare results.json
+    python -m benchmarks.run --sizes 1000000 --only quote --repeat 1
+    python -m benchmarks.run --sizes 1000 --cassette tests/cassettes/theoneapi.ndjson
+
+The default sizes stop at 10^5 documents: at 10^6 a full run takes tens of minutes and the memory benchmarks hold
+every hydrated document (several GB for movies, whose names are also indexed), so run the largest corpora selectively.
+
+Every measurement is lower-is-better (nanoseconds or bytes per document or operation). With --compare, the exit
+status is 1 when any of them is more than --tolerance worse than in the baseline.
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import pickle
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+from theoneapi import sdk
+from theoneapi.cache import BloomFilter
+from theoneapi.codec import decode_records, encode_records
+from theoneapi.stream import DocStream
+from theoneapi.synthetic import SyntheticCorpus, SyntheticTheOneApi
+from theoneapi.transport import ReplayTransport
+
+SIZES = [10**3, 10**4, 10**5]
+
+PAGE_SIZE = 1000
+
+COLLECTIONS = {"movie": sdk.Movies, "quote": sdk.Quotes}
+
+
+def best(function: Callable[[], object], repeat: int) -> float:
+    """
+    Returns the fastest of repeat runs of a function, in seconds. The garbage collector is paused while timing.
+
+    Parameters
+    ----------
+    function : Callable[[], object]
+        The function to time.
+    repeat : int
+        The number of runs.
+
+    Returns
+    -------
+    float
+        The seconds taken by the fastest run.
+    """
+
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return min(times)
+
+
+def corpus_of(kind: str, size: int) -> SyntheticCorpus:
+    if kind == "movie":
+        return SyntheticCorpus(quotes=size, movies=size)
+    return SyntheticCorpus(quotes=size, movies=8)
+
+
+def bench_url(size: int, repeat: int) -> dict:
+    options = [sdk.RequestOptions(limit=PAGE_SIZE, page=page, sort="name", filter="movie=5cd95395de30eff6ebccde5c")
+               for page in range(size)]
+    queries = [option.freeze() for option in options]
+    for query in queries:
+        query.query_string
+    return {
+        "options_ns": best(lambda: [option.url_with_query(sdk.TheOneApi.BASE_URL) for option in options],
+                           repeat) * 1e9 / size,
+        "query_ns": best(lambda: [query.url_with_query(sdk.TheOneApi.BASE_URL) for query in queries],
+                         repeat) * 1e9 / size,
+    }
+
+
+def bench_decode(kind: str, size: int, repeat: int) -> dict:
+    corpus = corpus_of(kind, size)
+    bodies = [corpus.body(f"{kind}?limit={PAGE_SIZE}&page={page}") for page in range(1, -(-size // PAGE_SIZE) + 1)]
+
+    def stream() -> None:
+        for body in bodies:
+            chunks = (body[start:start + 65536] for start in range(0, len(body), 65536))
+            for _ in DocStream(chunks):
+                pass
+
+    return {
+        "json_ns_per_doc": best(lambda: [json.loads(body) for body in bodies], repeat) * 1e9 / size,
+        "stream_ns_per_doc": best(stream, repeat) * 1e9 / size,
+    }
+
+
+def bench_hydrate(kind: str, size: int, repeat: int) -> dict:
+    corpus = corpus_of(kind, size)
+    pages = [corpus.response(f"{kind}?limit={PAGE_SIZE}&page={page}") for page in range(1, -(-size // PAGE_SIZE) + 1)]
+    api = SyntheticTheOneApi(corpus)
+    collection = COLLECTIONS[kind](api)
+    kept = []
+
+    def cold() -> None:
+        # A fresh api each run, so every document is new to the identity map.
+        fresh = COLLECTIONS[kind](SyntheticTheOneApi(corpus))
+        kept.append([fresh._hydrate(page) for page in pages])
+
+    def warm() -> None:
+        kept.append([collection._hydrate(page) for page in pages])
+
+    cold_seconds = best(cold, repeat)
+    kept.clear()
+    warm()
+    return {
+        "cold_ns_per_doc": cold_seconds * 1e9 / size,
+        "warm_ns_per_doc": best(warm, repeat) * 1e9 / size,
+    }
+
+
+def bench_paginate(kind: str, size: int, repeat: int) -> dict:
+    corpus = corpus_of(kind, size)
+    options = sdk.RequestOptions(limit=PAGE_SIZE)
+    fetched = COLLECTIONS[kind](SyntheticTheOneApi(corpus), options).fetch_all()
+    assert len(fetched.docs) == size
+
+    def iterate() -> None:
+        for _ in COLLECTIONS[kind](SyntheticTheOneApi(corpus), options).iter_docs():
+            pass
+
+    return {
+        "fetch_all_ns_per_doc": best(lambda: COLLECTIONS[kind](SyntheticTheOneApi(corpus), options).fetch_all(),
+                                     repeat) * 1e9 / size,
+        "iter_docs_ns_per_doc": best(iterate, repeat) * 1e9 / size,
+    }
+
+
+def bench_cache(size: int, repeat: int) -> dict:
+    corpus = corpus_of("quote", size)
+    api = SyntheticTheOneApi(corpus)
+    quotes = sdk.Quotes(api, sdk.RequestOptions(limit=PAGE_SIZE)).fetch_all()
+    ids = [quote.id for quote in quotes.docs]
+    missing = [corpus.id("quote", size + number) for number in range(size)]
+    known = BloomFilter.from_ids(ids)
+    for id in missing[::2]:
+        api.not_found.add("quote", id)
+
+    return {
+        "identity_ns": best(lambda: [api._lookup("quote", id) for id in ids], repeat) * 1e9 / size,
+        "by_id_ns": best(lambda: [sdk.Quotes(api).by_id(id) for id in ids], repeat) * 1e9 / size,
+        "not_found_ns": best(lambda: [("quote", id) in api.not_found for id in missing], repeat) * 1e9 / size,
+        "bloom_ns": best(lambda: [id in known for id in missing], repeat) * 1e9 / size,
+    }
+
+
+def bench_codec(kind: str, size: int, repeat: int) -> dict:
+    # The raw documents of a result set round tripped through theoneapi.codec, compared with JSON and pickle.
+    records = list(corpus_of(kind, size).documents(kind))
+    encoded = {
+        "codec": encode_records(records),
+        "json": json.dumps(records, separators=(",", ":")).encode("utf-8"),
+        "pickle": pickle.dumps(records, pickle.HIGHEST_PROTOCOL),
+    }
+    assert decode_records(encoded["codec"])[0] == records
+    return {
+        "codec_encode_ns_per_doc": best(lambda: encode_records(records), repeat) * 1e9 / size,
+        "codec_decode_ns_per_doc": best(lambda: decode_records(encoded["codec"]), repeat) * 1e9 / size,
+        "json_encode_ns_per_doc": best(lambda: json.dumps(records, separators=(",", ":")).encode("utf-8"),
+                                       repeat) * 1e9 / size,
+        "json_decode_ns_per_doc": best(lambda: json.loads(encoded["json"]), repeat) * 1e9 / size,
+        "pickle_encode_ns_per_doc": best(lambda: pickle.dumps(records, pickle.HIGHEST_PROTOCOL), repeat) * 1e9 / size,
+        "pickle_decode_ns_per_doc": best(lambda: pickle.loads(encoded["pickle"]), repeat) * 1e9 / size,
+        "codec_bytes_per_doc": len(encoded["codec"]) / size,
+        "json_bytes_per_doc": len(encoded["json"]) / size,
+        "pickle_bytes_per_doc": len(encoded["pickle"]) / size,
+    }
+
+
+def bench_memory(kind: str, size: int) -> dict:
+    corpus = corpus_of(kind, size)
+    api = SyntheticTheOneApi(corpus)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        collection = COLLECTIONS[kind](api, sdk.RequestOptions(limit=PAGE_SIZE)).fetch_all()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(collection.docs) == size
+    return {"bytes_per_doc": current / size, "peak_bytes_per_doc": peak / size}
+
+
+def bench_replay(kind: str, cassette: str, repeat: int) -> Optional[dict]:
+    # The recorded list responses of a kind, read and hydrated through the SDK as they were received live.
+    with open(cassette, encoding="utf-8") as file:
+        interactions = [json.loads(line) for line in file if line.strip()]
+    urls = [interaction["url"] for interaction in interactions
+            if interaction["status"] == 200 and interaction["url"].split("/v2/")[-1].split("?")[0] == kind]
+    if not urls:
+        return None
+
+    api = sdk.TheOneApi("replay", base_url=urls[0].split("/v2/")[0] + "/v2/",
+                        transport=ReplayTransport(cassette, match_authorization=False))
+    pages = [api._get(url) for url in urls]
+    size = sum(len(page["docs"]) for page in pages)
+    if size == 0:
+        return None
+    return {
+        "get_ns_per_doc": best(lambda: [api._get(url) for url in urls], repeat) * 1e9 / size,
+        "hydrate_ns_per_doc": best(lambda: [COLLECTIONS[kind](sdk.TheOneApi("replay"))._hydrate(page)
+                                            for page in pages], repeat) * 1e9 / size,
+    }
+
+
+def run(
+    sizes: list[int],
+    repeat: int = 3,
+    only: str = None,
+    cassette: str = None,
+    log: Callable[[str], None] = None,
+) -> dict:
+    """
+    Runs every benchmark at every size.
+
+    Parameters
+    ----------
+    sizes : list[int]
+        The numbers of documents in the corpora.
+    repeat : int, optional
+        The number of runs of each timing, of which the fastest counts, by default 3
+    only : str, optional
+        Only run the benchmarks whose name contains this, e.g. "quote" or "hydrate/".
+    cassette : str, optional
+        A cassette recorded with a RecordingTransport, whose real movie and quote responses are also benchmarked.
+    log : Callable[[str], None], optional
+        Called with the name of each benchmark as it starts.
+
+    Returns
+    -------
+    dict
+        The results, keyed by "benchmark[size]", with the environment they were measured in.
+    """
+
+    benchmarks = [("url", lambda size: bench_url(size, repeat)), ("cache/quote", lambda size: bench_cache(size, repeat))]
+    for kind in COLLECTIONS:
+        benchmarks += [
+            (f"decode/{kind}", lambda size, kind=kind: bench_decode(kind, size, repeat)),
+            (f"hydrate/{kind}", lambda size, kind=kind: bench_hydrate(kind, size, repeat)),
+            (f"paginate/{kind}", lambda size, kind=kind: bench_paginate(kind, size, repeat)),
+            (f"codec/{kind}", lambda size, kind=kind: bench_codec(kind, size, repeat)),
+            (f"memory/{kind}", lambda size, kind=kind: bench_memory(kind, size)),
+        ]
+
+    results = {}
+    for size in sizes:
+        for name, benchmark in benchmarks:
+            if only is not None and only not in name:
+                continue
+            if log is not None:
+                log(f"{name}[{size}]")
+            results[f"{name}[{size}]"] = benchmark(size)
+
+    for kind in cassette is not None and COLLECTIONS or []:
+        if only is None or only in f"replay/{kind}":
+            replayed = bench_replay(kind, cassette, repeat)
+            if replayed is not None:
+                results[f"replay/{kind}"] = replayed
+
+    return {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "repeat": repeat,
+        "cassette": cassette,
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.25) -> list:
+    """
+    Compares two sets of results, measurement by measurement.
+
+    Parameters
+    ----------
+    baseline : dict
+        The earlier results, as returned by run.
+    current : dict
+        The new results.
+    tolerance : float, optional
+        How much worse (as a proportion) a measurement may be before it counts as a regression, by default 0.25
+
+    Returns
+    -------
+    list
+        A (benchmark, measurement, baseline, current, ratio, regressed) tuple for each measurement found in both.
+    """
+
+    rows = []
+    for name, measurements in current["results"].items():
+        for measurement, value in measurements.items():
+            before = baseline["results"].get(name, {}).get(measurement)
+            if before is None:
+                continue
+            ratio = before and value / before or 1.0
+            rows.append((name, measurement, before, value, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main(arguments: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the SDK against synthetic corpora.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="the corpus sizes, by default 10^3 to 10^5")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing, the fastest counts")
+    parser.add_argument("--only", help="only run the benchmarks whose name contains this, e.g. quote")
+    parser.add_argument("--cassette", help="also benchmark the real responses recorded in this cassette")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="the slowdown counted as a regression")
+    options = parser.parse_args(arguments)
+
+    results = run(options.sizes, options.repeat, options.only, options.cassette, log=lambda name: print(f"running {name}", file=sys.stderr))
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    for name, measurements in results["results"].items():
+        print(name, " ".join(f"{measurement}={value:.1f}" for measurement, value in measurements.items()))
+
+    if options.compare is None:
+        return 0
+    with open(options.compare) as file:
+        rows = compare(json.load(file), results, options.tolerance)
+    regressions = [row for row in rows if row[5]]
+    for name, measurement, before, value, ratio, regressed in rows:
+        print(f"{regressed and 'REGRESSED' or 'ok':9} {name} {measurement}: {before:.1f} -> {value:.1f} ({ratio:.2f}x)")
+    print(f"{len(regressions)} of {len(rows)} measurements regressed by more than {options.tolerance:.0%}")
+    return regressions and 1 or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
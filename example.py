@@ -7,7 +7,7 @@ print(f"API Key: {VALID_API_KEY}")
 
 api = sdk.TheOneApi(VALID_API_KEY)
 options = sdk.RequestOptions(sort="name", filter="name=/Of The/i")
-movies = sdk.Movies(api, options).fetch()
+movies = sdk.Movies(api, options).fetch().prefetch_quotes()
 for movie in movies.docs:
     pprint(movie.as_dict())
     print(f"Movie: {movie.name}")
@@ -12,6 +12,17 @@ setup(
     install_requires=[
         'requests>=2.28.0',
     ],
+    extras_require={
+        'analytics': ['numpy>=1.20'],
+        'export': ['pyarrow>=8.0'],
+    },
+    entry_points={
+        'console_scripts': [
+            'theoneapi-server=theoneapi.server:main',
+            'theoneapi-proxy=theoneapi.proxy:main',
+            'theoneapi=theoneapi.cli:main',
+        ],
+    },
 
     classifiers=[
         'Development Status :: 1 - Planning',
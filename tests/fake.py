@@ -0,0 +1,86 @@
+import json
+from theoneapi import sdk
+
+INVALID_API_KEY = "FOO"
+
+
+class FakeTheOneApi(sdk.TheOneApi):
+    """
+    A TheOneApi which answers from in-memory documents instead of calling the-one-api.dev.
+
+    Only "field=value[,value]", "field>=value" and "field<value" filters joined with "&" are understood (comparing
+    values as strings). Every call is recorded in calls.
+    """
+
+    def __init__(self, movies: list, quotes: list, characters: list = None) -> None:
+        super().__init__(INVALID_API_KEY)
+        self.data = {"movie": movies, "quote": quotes, "character": characters or []}
+        self.calls = []
+
+    def _collection(self, endpoint: str, options: sdk.RequestOptions = None) -> dict:
+        options = options or sdk.RequestOptions()
+        self.calls.append((endpoint, options.limit, options.page, options.offset, options.filter))
+        docs = self.data[endpoint]
+        for part in (options.filter or "").split("&"):
+            if ">=" in part:
+                field, value = part.split(">=", 1)
+                docs = [doc for doc in docs if str(doc.get(field)) >= value]
+            elif "<" in part:
+                field, value = part.split("<", 1)
+                docs = [doc for doc in docs if str(doc.get(field)) < value]
+            elif "=" in part:
+                field, values = part.split("=", 1)
+                docs = [doc for doc in docs if str(doc.get(field)) in values.split(",")]
+        limit = options.limit or 1000
+        page = options.page or 1
+        offset = options.offset if options.offset is not None else (page - 1) * limit
+        return {
+            "docs": docs[offset:offset + limit],
+            "total": len(docs),
+            "limit": limit,
+            "offset": offset,
+            "page": page,
+            "pages": -(-len(docs) // limit),
+        }
+
+    def movies(self, options: sdk.RequestOptions = None) -> dict:
+        return self._collection("movie", options)
+
+    def movie(self, id: str) -> dict:
+        return self._collection("movie", sdk.RequestOptions(filter=f"_id={id}"))
+
+    def quotes(self, options: sdk.RequestOptions = None) -> dict:
+        return self._collection("quote", options)
+
+    def quote(self, id: str) -> dict:
+        return self._collection("quote", sdk.RequestOptions(filter=f"_id={id}"))
+
+    def stream(self, endpoint: str, options: sdk.RequestOptions = None, chunk_size: int = 7) -> sdk.DocStream:
+        body = json.dumps(self._collection(endpoint, options)).encode("utf-8")
+        return sdk.DocStream(body[start:start + chunk_size] for start in range(0, len(body), chunk_size))
+
+    def characters(self, options: sdk.RequestOptions = None) -> dict:
+        return self._collection("character", options)
+
+    def character(self, id: str) -> dict:
+        return self._collection("character", sdk.RequestOptions(filter=f"_id={id}"))
+
+
+FAKE_MOVIES = [
+    {"_id": f"movie{i}", "name": name, "runtimeInMinutes": 100 + i, "budgetInMillions": 90 + i,
+     "boxOfficeRevenueInMillions": 800.5 + i, "academyAwardNominations": i, "academyAwardWins": i // 2,
+     "rottenTomatesScore": 60 + i}
+    for i, name in enumerate([
+        "The Battle of the Five Armies",
+        "The Desolation of Smaug",
+        "The Fellowship of the Ring",
+        "The Hobbit Series",
+    ])
+]
+
+FAKE_CHARACTERS = [{"_id": f"character{i}", "name": f"Hobbit {i}", "race": "Hobbit"} for i in range(4)]
+
+FAKE_QUOTES = [
+    {"_id": f"quote{i}", "dialog": f"Dialog {i}", "movie": f"movie{i % 3}", "character": f"character{i % 4}"}
+    for i in range(25)
+]
@@ -0,0 +1,68 @@
+import math
+import unittest
+from theoneapi import sdk
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+MOVIE_DICTS = [
+    {"_id": "5cd95395de30eff6ebccde5c", "name": "The Fellowship of the Ring", "runtimeInMinutes": 178,
+     "budgetInMillions": 93, "boxOfficeRevenueInMillions": 871.5, "academyAwardNominations": 13,
+     "academyAwardWins": 4, "rottenTomatesScore": 91},
+    {"_id": "5cd95395de30eff6ebccde5b", "name": "The Two Towers", "runtimeInMinutes": 179,
+     "budgetInMillions": 94, "boxOfficeRevenueInMillions": 926, "academyAwardNominations": 6,
+     "academyAwardWins": 2, "rottenTomatesScore": 96},
+    {"_id": "5cd95395de30eff6ebccde5d", "name": "The Return of the King", "runtimeInMinutes": 201,
+     "budgetInMillions": 94, "boxOfficeRevenueInMillions": 1120, "academyAwardNominations": 11,
+     "academyAwardWins": 11, "rottenTomatesScore": 95},
+    {"_id": "5cd95395de30eff6ebccde99", "name": "Unreleased", "runtimeInMinutes": 0, "budgetInMillions": 0},
+]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestMovieArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.movies = sdk.Movies(sdk.TheOneApi("FOO"))
+        self.movies.docs = [sdk.Movie().from_dict(None, movie) for movie in MOVIE_DICTS]
+        self.arrays = self.movies.to_arrays()
+
+    def test_columns(self):
+        self.assertEqual(len(self.arrays), 4)
+        self.assertTrue(self.arrays["budgetInMillions"].flags["C_CONTIGUOUS"])
+        self.assertEqual(self.arrays["budgetInMillions"].dtype, np.float64)
+        self.assertTrue(math.isnan(self.arrays["rottenTomatesScore"][3]))
+        with self.assertRaises(KeyError):
+            self.arrays["name"]
+
+    def test_cached_per_fetch(self):
+        self.assertIs(self.movies.to_arrays(), self.arrays)
+        self.movies.docs = self.movies.docs[:2]
+        self.assertEqual(len(self.movies.to_arrays()), 2)
+
+    def test_aggregates(self):
+        self.assertEqual(self.arrays.sum("academyAwardWins"), 17)
+        self.assertAlmostEqual(self.arrays.mean("rottenTomatesScore"), (91 + 96 + 95) / 3)
+        self.assertEqual(self.arrays.percentile("runtimeInMinutes", 50), 178.5)
+        self.assertListEqual(list(self.arrays.percentile("academyAwardWins", [0, 100])), [2, 11])
+        self.assertDictEqual(self.arrays.describe("academyAwardNominations"), {
+            "count": 3, "sum": 30.0, "mean": 10.0, "min": 6.0, "p25": 8.5, "p50": 11.0, "p75": 12.0, "max": 13.0,
+        })
+
+    def test_ratio_and_top_k(self):
+        ratio = self.arrays.ratio("boxOfficeRevenueInMillions", "budgetInMillions")
+        self.assertAlmostEqual(ratio[0], 871.5 / 93)
+        self.assertTrue(math.isnan(ratio[3]))
+        self.assertListEqual(list(self.arrays.top_k(ratio, 2).names), ["The Return of the King", "The Two Towers"])
+        self.assertListEqual(list(self.arrays.top_k("academyAwardWins", 10).names),
+                             ["The Return of the King", "The Fellowship of the Ring", "The Two Towers"])
+
+    def test_where(self):
+        winners = self.arrays.where(self.arrays["academyAwardWins"] >= 4)
+        self.assertListEqual(list(winners.ids), ["5cd95395de30eff6ebccde5c", "5cd95395de30eff6ebccde5d"])
+        self.assertIs(winners.docs[0], self.movies.docs[0])
+        self.assertEqual(winners.sum("academyAwardWins"), 15)
+        with self.assertRaises(ValueError):
+            self.arrays.where([True])
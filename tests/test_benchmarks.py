@@ -0,0 +1,34 @@
+import os
+import tempfile
+import unittest
+from benchmarks import run
+from theoneapi import sdk
+from theoneapi.server import StandInServer
+from theoneapi.transport import RecordingTransport
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_run_and_compare(self):
+        results = run.run([50], repeat=1, only="quote")
+        self.assertSetEqual(
+            set(results["results"]),
+            {"cache/quote[50]", "decode/quote[50]", "hydrate/quote[50]", "paginate/quote[50]", "codec/quote[50]",
+             "memory/quote[50]"},
+        )
+        self.assertTrue(all(value > 0 for value in results["results"]["memory/quote[50]"].values()))
+
+        slower = {"results": {"hydrate/quote[50]": {"cold_ns_per_doc": 200.0, "warm_ns_per_doc": 100.0}}}
+        baseline = {"results": {"hydrate/quote[50]": {"cold_ns_per_doc": 100.0, "warm_ns_per_doc": 100.0}}}
+        rows = run.compare(baseline, slower, tolerance=0.25)
+        self.assertListEqual([(row[1], row[5]) for row in rows], [("cold_ns_per_doc", True), ("warm_ns_per_doc", False)])
+
+    def test_replayed_cassette(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cassette = os.path.join(directory, "api.ndjson")
+            with StandInServer() as server:
+                api = sdk.TheOneApi("key", base_url=server.url, transport=RecordingTransport(cassette))
+                sdk.Quotes(api, sdk.RequestOptions(limit=100)).fetch_all()
+            results = run.run([], repeat=1, cassette=cassette)
+        self.assertSetEqual(set(results["results"]), {"replay/quote"})
+        self.assertGreater(results["results"]["replay/quote"]["hydrate_ns_per_doc"], 0)
@@ -0,0 +1,125 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import requests
+from theoneapi import sdk
+from theoneapi.cache import BloomFilter, NegativeCache, TTLCache
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, INVALID_API_KEY, FakeTheOneApi
+
+
+class TestNegativeCache(unittest.TestCase):
+
+    def test_ttl(self):
+        cache = NegativeCache(ttl=0.05)
+        cache.add("quote", "missing")
+        self.assertIn(("quote", "missing"), cache)
+        self.assertNotIn(("movie", "missing"), cache)
+        time.sleep(0.06)
+        self.assertNotIn(("quote", "missing"), cache)
+
+    def test_maxsize(self):
+        cache = NegativeCache(maxsize=2)
+        for id in ["a", "b", "c"]:
+            cache.add("quote", id)
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn(("quote", "a"), cache)
+        self.assertIn(("quote", "c"), cache)
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_ttl_and_maxsize(self):
+        cache = TTLCache(ttl=0.05, maxsize=2)
+        cache.set("a", 0)
+        cache.set("b", 2)
+        cache.set("c", 3)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.get("b"), 2)
+        self.assertEqual(cache.get("a", -1), -1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("c"))
+
+    def test_weigh(self):
+        cache = TTLCache(maxsize=5, weigh=len)
+        cache.set("a", [1, 2])
+        cache.set("b", [1, 2, 3])
+        cache.set("a", [1])
+        cache.set("c", [1, 2])
+        self.assertNotIn("b", cache)
+        self.assertListEqual([cache.get("a"), cache.get("c")], [[1], [1, 2]])
+        cache.set("d", list(range(6)))
+        self.assertEqual(len(cache), 0)
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negatives(self):
+        ids = [f"5cd96e05de30eff6ebcc{i:04x}" for i in range(2384)]
+        bloom = BloomFilter.from_ids(ids)
+        self.assertTrue(all(id in bloom for id in ids))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter.from_ids((f"known{i}" for i in range(1000)), error_rate=0.01)
+        false_positives = sum(f"unknown{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TestIdentityMapAndNotFound(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_identity_map(self):
+        quotes = sdk.Quotes(self.api).fetch()
+        self.api.calls = []
+        quote = sdk.Quotes(self.api).by_id("quote3")
+        self.assertIs(quote.docs[0], quotes.docs[3])
+        self.assertEqual(quote.metadata["total"], 1)
+        self.assertEqual(self.api.calls, [])
+
+        again = sdk.Quotes(self.api).match("movie", "movie0").fetch()
+        self.assertIs(again.docs[1], quotes.docs[3])
+
+        self.api.identity.ttl = 0
+        sdk.Quotes(self.api).by_id("quote3")
+        self.assertEqual(len(self.api.calls), 2)
+
+    def test_identity_map_is_weak(self):
+        sdk.Movies(self.api).fetch()
+        self.assertEqual(len(self.api.identity), 0)
+        api = sdk.TheOneApi(INVALID_API_KEY, identity_maxsize=2)
+        docs = [api.identity.register("movie", sdk.Movie().from_dict(api, movie)) for movie in FAKE_MOVIES[0:3]]
+        self.assertEqual(len(api.identity), 2)
+        self.assertIsNone(api.identity.get("movie", "movie0"))
+        self.assertIs(api.identity.get("movie", "movie2"), docs[2])
+
+    def test_not_found_cached(self):
+        api = sdk.TheOneApi(INVALID_API_KEY)
+        with mock.patch("theoneapi.sdk.requests.get") as get:
+            get.return_value.status_code = 200
+            get.return_value.headers = {}
+            get.return_value.raw.stream.side_effect = lambda *args, **kwargs: [json.dumps(sdk.TheOneApi.NOT_FOUND).encode()]
+            self.assertEqual(len(sdk.Quotes(api).by_id("missing").docs), 0)
+            self.assertEqual(len(sdk.Quotes(api).by_id("missing").docs), 0)
+            self.assertEqual(get.call_count, 1)
+
+            api.not_found.clear()
+            api.load_known_ids("quote", [quote["_id"] for quote in FAKE_QUOTES])
+            self.assertEqual(api.quote("missing")["total"], 0)
+            self.assertEqual(get.call_count, 1)
+            api.quote("quote1")
+            self.assertEqual(get.call_count, 2)
+
+    def test_fallback_not_found_is_not_cached(self):
+        api = sdk.TheOneApi(INVALID_API_KEY, breaker_options={"min_calls": 1})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "lotr.snapshot")
+            self.api.save_snapshot(path, ["quote"])
+            api.use_snapshot(path)
+            with mock.patch("theoneapi.sdk.requests.get") as get:
+                get.side_effect = requests.Timeout()
+                self.assertListEqual(api.quote("quote404")["docs"], [])
+                self.assertNotIn(("quote", "quote404"), api.not_found)
@@ -0,0 +1,52 @@
+import struct
+import unittest
+from theoneapi import sdk
+from theoneapi.codec import HEADER, MAGIC, decode_records, encode_records
+from theoneapi.synthetic import SyntheticCorpus, SyntheticTheOneApi
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_records_round_trip_exactly(self):
+        records = [
+            {"_id": "a", "name": "Ringé", "runtime": 178, "score": 91.5, "awards": [1, 2], "flag": True},
+            {"_id": "b", "name": "", "runtime": 2 ** 70, "score": 96, "extra": None},
+            {"name": "nul\x00inside", "_id": "c"},
+        ]
+        decoded, header = decode_records(encode_records(records, {"total": 3}))
+        self.assertListEqual(decoded, records)
+        self.assertEqual([type(record.get("score")) for record in decoded], [float, int, type(None)])
+        self.assertNotIn("runtime", decoded[2])
+        self.assertDictEqual(header, {"total": 3})
+
+        self.assertListEqual(decode_records(encode_records([]))[0], [])
+        self.assertListEqual(decode_records(encode_records([{}, {}]))[0], [{}, {}])
+        uniform = [{"_id": str(i), "count": i, "ratio": i / 2} for i in range(100)]
+        self.assertListEqual(decode_records(encode_records(uniform))[0], uniform)
+
+    def test_versions(self):
+        data = encode_records([{"_id": "a"}])
+        self.assertEqual(data[:4], MAGIC)
+        newer = HEADER.pack(MAGIC, 99, *HEADER.unpack_from(data)[2:]) + data[HEADER.size:]
+        for bad in [b"", b"JSON" + data[4:], newer]:
+            with self.assertRaises(ValueError):
+                decode_records(bad)
+        self.assertEqual(struct.unpack_from("<H", data, 4)[0], 1)
+
+    def test_results(self):
+        corpus = SyntheticCorpus(quotes=50, movies=3)
+        api = SyntheticTheOneApi(corpus)
+        quotes = sdk.Quotes(api, sdk.RequestOptions(limit=20, page=2, sort="+dialog")).fetch()
+        movies = sdk.Movies(api).fetch()
+
+        other = SyntheticTheOneApi(corpus)
+        decoded = other.from_bytes(quotes.to_bytes())
+        self.assertIsInstance(decoded, sdk.Quotes)
+        self.assertEqual(decoded.options.freeze(), quotes.options.freeze())
+        self.assertDictEqual(decoded.metadata, quotes.metadata)
+        self.assertListEqual([quote.to_record() for quote in decoded.docs], [quote.to_record() for quote in quotes.docs])
+        self.assertIs(other.identity.get("quote", quotes.docs[0].id), decoded.docs[0])
+
+        decoded = other.from_bytes(movies.to_bytes())
+        self.assertEqual(decoded.count(), 3)
+        self.assertEqual(decoded.docs[1].budgetInMillions, movies.docs[1].budgetInMillions)
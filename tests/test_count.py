@@ -0,0 +1,35 @@
+import unittest
+from theoneapi import sdk
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+
+class TestCount(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_count(self):
+        self.assertEqual(sdk.Quotes(self.api).count(), 25)
+        self.assertEqual(self.api.calls, [("quote", 1, None, None, None)])
+
+        self.assertEqual(sdk.Quotes(self.api).match("character", "character1").count(), 6)
+
+    def test_count_by(self):
+        counts = sdk.Quotes(self.api).count_by("movie", ["movie0", "movie1", "movie2", "movie3"])
+        self.assertDictEqual(counts, {"movie0": 9, "movie1": 8, "movie2": 8, "movie3": 0})
+        self.assertEqual(len(self.api.calls), 4)
+        self.assertTrue(all(call[1] == 1 for call in self.api.calls))
+
+        counts = sdk.Quotes(self.api).match("character", "character0").count_by("movie", ["movie0"])
+        self.assertDictEqual(counts, {"movie0": 3})
+
+    def test_count_local(self):
+        quotes = sdk.Quotes(self.api).fetch()
+        self.api.calls = []
+        self.assertEqual(quotes.count(), 25)
+        self.assertDictEqual(quotes.count_by("movie", ["movie0", "movie1"]), {"movie0": 9, "movie1": 8})
+        self.assertEqual(self.api.calls, [])
+
+        quotes.match("movie", "movie1")
+        self.assertEqual(quotes.count(), 8)
+        self.assertEqual(len(self.api.calls), 1)
@@ -0,0 +1,116 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+import requests
+from theoneapi import cli, sdk
+from theoneapi.export import Exporter, columns, export_format
+from theoneapi.middleware import Middleware
+from theoneapi.server import StandInServer
+from theoneapi.synthetic import SyntheticCorpus, SyntheticTheOneApi
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pq = None
+
+
+class Interrupting(Middleware):
+    # Fails the requests for one page, and counts the pages requested.
+    def __init__(self, page=None):
+        self.page = page
+        self.pages = []
+
+    def handle(self, request, next):
+        page = int(request.path.split("page=")[1].split("&")[0])
+        if page == self.page:
+            raise requests.ConnectionError("Interrupted")
+        self.pages.append(page)
+        return next(request)
+
+
+class TestExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.corpus = SyntheticCorpus(quotes=2500, movies=4)
+        self.pages = Interrupting()
+        self.api = SyntheticTheOneApi(self.corpus, fallback=False, middleware=[self.pages])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def test_resumes_after_the_last_complete_page(self):
+        path = self._path("quotes.ndjson")
+        exporter = Exporter(sdk.Quotes(self.api, sdk.RequestOptions(limit=1000)), path)
+        self.pages.page = 3
+        with self.assertRaises(requests.ConnectionError):
+            exporter.run()
+        self.assertEqual(exporter.state()["page"], 2)
+        with open(path, "a") as output:
+            output.write('{"_id": "half a page')
+
+        self.pages.page = None
+        result = exporter.run()
+        self.assertEqual((result.pages, result.docs, result.resumed_after), (3, 2500, 2))
+        self.assertListEqual(self.pages.pages, [1, 2, 3])
+        self.assertIsNone(exporter.state())
+        with open(path) as output:
+            docs = [json.loads(line) for line in output]
+        self.assertListEqual(docs, list(self.corpus.documents("quote")))
+
+    def test_errors_keep_the_checkpoint(self):
+        path = self._path("quotes.ndjson")
+        with StandInServer(SyntheticCorpus(quotes=500), quota=2) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            exporter = Exporter(sdk.Quotes(api, sdk.RequestOptions(limit=100)), path)
+            with self.assertRaises(sdk.ApiError):
+                exporter.run()
+            self.assertEqual(exporter.state()["page"], 2)
+
+            server.quota = None
+            result = exporter.run()
+            self.assertEqual((result.pages, result.docs, result.resumed_after), (5, 500, 2))
+        with open(path) as output:
+            self.assertEqual(sum(1 for _ in output), 500)
+
+    def test_csv_and_query_mismatch(self):
+        path = self._path("movies.csv")
+        self.assertEqual(export_format(path), "csv")
+        exporter = Exporter(sdk.Movies(self.api, sdk.RequestOptions(limit=3)), path)
+        self.pages.page = 2
+        with self.assertRaises(requests.ConnectionError):
+            exporter.run()
+        with self.assertRaises(ValueError):
+            Exporter(sdk.Movies(self.api).sort("name"), path).run()
+
+        self.pages.page = None
+        self.assertEqual(exporter.run().docs, 4)
+        with open(path, newline="") as output:
+            rows = list(csv.DictReader(output))
+        self.assertListEqual(list(rows[0]), columns(sdk.Movie))
+        self.assertListEqual([row["_id"] for row in rows], [self.corpus.id("movie", i) for i in range(4)])
+
+        result = Exporter(sdk.Movies(self.api).sort("name"), path).run(restart=True)
+        self.assertEqual((result.docs, result.resumed_after), (4, 0))
+
+    @unittest.skipIf(pq is None, "pyarrow is not installed")
+    def test_parquet(self):
+        path = self._path("quotes.parquet")
+        result = Exporter(sdk.Quotes(self.api, sdk.RequestOptions(limit=1000)), path).run()
+        self.assertEqual(len(os.listdir(path)), result.pages)
+        self.assertEqual(pq.read_table(path).num_rows, 2500)
+
+    def test_command_line(self):
+        path = self._path("quotes.ndjson")
+        with StandInServer(SyntheticCorpus(quotes=300)) as server:
+            with self.assertRaises(SystemExit) as exit:
+                cli.main(["--api-key", "key", "--base-url", server.url, "export", "quote", path, "--limit", "100"])
+            self.assertEqual(exit.exception.code, 0)
+            self.assertEqual(server.stats["requests"], 3)
+        with open(path) as output:
+            self.assertEqual(sum(1 for _ in output), 300)
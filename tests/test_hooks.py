@@ -0,0 +1,94 @@
+import json
+import logging
+import unittest
+from unittest import mock
+from theoneapi import sdk
+from theoneapi.hooks import Hooks, LoggingHooks, MultiHooks, PrometheusHooks, RequestEvent, url_template
+from tests.fake import FAKE_QUOTES, INVALID_API_KEY
+
+
+def event(**changes) -> RequestEvent:
+    values = dict(
+        url="https://the-one-api.dev/v2/quote?limit=10", template="quote", status=200, compressed_bytes=100,
+        decompressed_bytes=400, phases={"queue": 0.0001, "ttfb": 0.02, "download": 0.003, "decode": 0.0005},
+    )
+    values.update(changes)
+    return RequestEvent(**values)
+
+
+class TestHooks(unittest.TestCase):
+
+    def test_url_template(self):
+        self.assertEqual(url_template("quote?limit=10"), "quote")
+        self.assertEqual(url_template("movie/5cd95395de30eff6ebccde5d"), "movie/{id}")
+        self.assertEqual(url_template("movie/5cd95395de30eff6ebccde5d/quote?page=2"), "movie/{id}/quote")
+
+    def test_logging(self):
+        with self.assertLogs("theoneapi", logging.DEBUG) as logs:
+            hooks = LoggingHooks()
+            hooks.request_finished(event())
+            hooks.request_finished(event(status=None, error="Timeout()", phases={}))
+            hydrated = event(documents=10)
+            hydrated.phases["hydrate"] = 0.002
+            hooks.hydrated(hydrated)
+        self.assertEqual(
+            logs.output[0],
+            "INFO:theoneapi:GET quote 200 cache=miss retries=0 bytes=100/400 "
+            "queue=0.1ms ttfb=20.0ms download=3.0ms decode=0.5ms",
+        )
+        self.assertTrue(logs.output[1].startswith("WARNING:theoneapi:GET quote None"))
+        self.assertTrue(logs.output[1].endswith("error=Timeout()"))
+        self.assertEqual(logs.output[2], "DEBUG:theoneapi:hydrated 10 documents from quote in 2.0ms")
+
+    def test_prometheus(self):
+        prometheus = PrometheusHooks()
+        hooks = MultiHooks(prometheus, LoggingHooks(level=logging.DEBUG))
+        hooks.request_finished(event())
+        hooks.request_finished(event(template='odd"name', cache="fallback", status=503))
+        hydrated = event(documents=10)
+        hydrated.phases["hydrate"] = 0.002
+        hooks.hydrated(hydrated)
+
+        text = prometheus.render()
+        self.assertIn('theoneapi_requests_total{template="quote",status="200",cache="miss"} 1\n', text)
+        self.assertIn('theoneapi_bytes_total{template="quote",encoding="compressed"} 100\n', text)
+        self.assertIn('theoneapi_documents_total{template="quote"} 10\n', text)
+        self.assertIn('template="odd\\"name"', text)
+        self.assertIn('theoneapi_phase_seconds_bucket{template="quote",phase="ttfb",le="0.025"} 1\n', text)
+        self.assertIn('theoneapi_phase_seconds_bucket{template="quote",phase="ttfb",le="0.01"} 0\n', text)
+        self.assertIn('theoneapi_phase_seconds_count{template="quote",phase="hydrate"} 1\n', text)
+        self.assertIn("# TYPE theoneapi_phase_seconds histogram\n", text)
+
+
+class TestApiHooks(unittest.TestCase):
+
+    def test_hooks(self):
+        events = []
+
+        class Recorder(Hooks):
+            def request_finished(self, event):
+                events.append(("finished", dict(event.phases)))
+
+            def hydrated(self, event):
+                events.append(("hydrated", event))
+
+        api = sdk.TheOneApi(INVALID_API_KEY, hooks=Recorder())
+        body = json.dumps({"docs": FAKE_QUOTES[:3], "total": 25, "limit": 3, "offset": 0, "page": 1, "pages": 9})
+        with mock.patch("theoneapi.sdk.requests.get") as get:
+            get.return_value.status_code = 200
+            get.return_value.headers = {}
+            get.return_value.raw.stream.side_effect = lambda *args, **kwargs: [body.encode()]
+            sdk.Quotes(api).limit(3).fetch()
+            self.assertEqual(len(list(api.stream("quote"))), 3)
+
+        self.assertListEqual([name for (name, _) in events], ["finished", "hydrated", "finished"])
+        self.assertSetEqual(set(events[0][1]), set(["queue", "ttfb", "download", "decode"]))
+        event = events[1][1]
+        self.assertEqual((event.template, event.status, event.cache, event.documents), ("quote", 200, "miss", 3))
+        self.assertEqual(event.compressed_bytes, len(body))
+        self.assertIn("hydrate", event.phases)
+
+        api.not_found.add("quote", "missing")
+        api.quote("missing")
+        self.assertEqual(events[-1][0], "finished")
+        self.assertEqual(len(events), 4)
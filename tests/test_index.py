@@ -0,0 +1,78 @@
+import threading
+import unittest
+from theoneapi import sdk
+from theoneapi.index import NameIndex, normalise, trigrams, edit_distance
+
+MOVIES = [
+    ("The Lord of the Rings Series", "5cd95395de30eff6ebccde56"),
+    ("The Hobbit Series", "5cd95395de30eff6ebccde57"),
+    ("The Unexpected Journey", "5cd95395de30eff6ebccde58"),
+    ("The Desolation of Smaug", "5cd95395de30eff6ebccde59"),
+    ("The Battle of the Five Armies", "5cd95395de30eff6ebccde5a"),
+    ("The Two Towers", "5cd95395de30eff6ebccde5b"),
+    ("The Fellowship of the Ring", "5cd95395de30eff6ebccde5c"),
+    ("The Return of the King", "5cd95395de30eff6ebccde5d"),
+]
+
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = NameIndex().add_all("movie", MOVIES)
+
+    def test_normalise(self):
+        self.assertEqual(normalise("  The Fellowship-of the RING! "), "the fellowship of the ring")
+        self.assertEqual(normalise("Éowyn"), "eowyn")
+        self.assertIn("  f", trigrams("fellowship"))
+        self.assertEqual(edit_distance("felowship", "fellowship"), 1)
+        self.assertEqual(edit_distance("abc", "xyzxyz", 1), 2)
+
+    def test_resolve_exact(self):
+        matches = self.index.resolve("movie", "the two towers")
+        self.assertEqual(matches[0].id, "5cd95395de30eff6ebccde5b")
+        self.assertEqual(matches[0].score, 1.0)
+
+    def test_resolve_prefix(self):
+        self.assertEqual(self.index.resolve("movie", "fellowship")[0].name, "The Fellowship of the Ring")
+        self.assertEqual(self.index.resolve("movie", "deso")[0].name, "The Desolation of Smaug")
+
+    def test_resolve_typo(self):
+        self.assertEqual(self.index.resolve("movie", "felowship")[0].name, "The Fellowship of the Ring")
+        self.assertEqual(self.index.resolve("movie", "retrun of the kign")[0].name, "The Return of the King")
+
+    def test_resolve_no_match(self):
+        self.assertListEqual(self.index.resolve("movie", "zzzz"), [])
+        self.assertListEqual(self.index.resolve("character", "fellowship"), [])
+
+    def test_rename(self):
+        self.index.add("movie", "The Two Towers (Extended)", "5cd95395de30eff6ebccde5b")
+        self.assertEqual(len(self.index), len(MOVIES))
+        self.assertEqual(self.index.resolve("movie", "extended")[0].id, "5cd95395de30eff6ebccde5b")
+
+    def test_movies_resolve(self):
+        api = sdk.TheOneApi("FOO")
+        api.names.add_all("movie", MOVIES)
+        matches = sdk.Movies(api).resolve("fellowship", limit=1)
+        self.assertEqual([match.id for match in matches], ["5cd95395de30eff6ebccde5c"])
+
+    def test_concurrent_adds(self):
+        index = NameIndex()
+        errors = []
+
+        def add():
+            index.add_all("character", ((f"Hobbit {number}", f"id{number}") for number in range(2000)))
+
+        def resolve():
+            try:
+                for _ in range(200):
+                    index.resolve("character", "hobit 1")
+            except RuntimeError as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=add), threading.Thread(target=resolve)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(30)
+        self.assertListEqual(errors, [])
+        self.assertEqual(len(index), 2000)
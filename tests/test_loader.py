@@ -0,0 +1,60 @@
+import unittest
+from theoneapi import sdk
+from theoneapi.server import StandInServer
+from theoneapi.synthetic import SyntheticCorpus
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+
+class TestLazyReferences(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_lazy_references(self):
+        quotes = sdk.Quotes(self.api).fetch()
+        self.assertEqual(quotes.docs[4].movie, "movie1")
+        self.assertDictEqual(quotes.docs[4].as_dict(), {
+            "id": "quote4", "dialog": "Dialog 4", "movie": "movie1", "character": "character0",
+        })
+
+        names = [quote.movie.resolve().name for quote in quotes.docs]
+        self.assertEqual(names[4], "The Desolation of Smaug")
+        characters = [quote.character.resolve().name for quote in quotes.docs]
+        self.assertEqual(characters[5], "Hobbit 1")
+        self.assertListEqual([call[0] for call in self.api.calls], ["quote", "movie", "character"])
+        self.assertEqual(self.api.calls[1][4], "_id=movie0,movie1,movie2")
+
+    def test_lazy_references_primed(self):
+        movies = sdk.Movies(self.api).fetch()
+        quote = sdk.Quotes(self.api).by_id("quote7")
+        self.assertIs(quote.docs[0].movie.resolve(), movies.docs[1])
+        self.assertListEqual([call[0] for call in self.api.calls], ["movie", "quote"])
+
+        quote = sdk.Quote().from_dict(self.api, {"_id": "quote99", "movie": "movie99"})
+        self.assertIsNone(quote.movie.resolve())
+
+    def test_failed_batches_stay_pending(self):
+        corpus = SyntheticCorpus(quotes=10, movies=2)
+        with StandInServer(corpus, quota=1) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            quote = sdk.Quotes(api).fetch().docs[0]
+            with self.assertRaises(sdk.ApiError):
+                quote.movie.resolve()
+            server.quota = None
+            self.assertEqual(quote.movie.resolve().id, corpus.document("quote", 0)["movie"])
+
+    def test_batches_only_queue_recent_references(self):
+        corpus = SyntheticCorpus(quotes=300, movies=8, characters=250)
+        with StandInServer(corpus) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            quotes = sdk.Quotes(api).limit(300).fetch()
+            self.assertEqual(quotes.docs[0].character.resolve().id, corpus.document("quote", 0)["character"])
+            self.assertEqual(server.stats["requests"], 2)
+            loaded = [doc for doc in quotes.docs if api.identity.get("character", doc.character) is not None]
+            self.assertEqual(len(set(quote.character for quote in loaded)), sdk.BatchLoader.BATCH_SIZE)
+
+            missing = sdk.Quote().from_dict(api, {"_id": "quote-x", "character": "character-x"})
+            self.assertIsNone(missing.character.resolve())
+            self.assertIn(("character", "character-x"), api.not_found)
+            self.assertIsNone(missing.character.resolve())
+            self.assertEqual(server.stats["requests"], 3)
@@ -0,0 +1,142 @@
+import json
+import random
+import time
+import unittest
+import requests
+from theoneapi import sdk
+from theoneapi.hooks import Hooks
+from theoneapi.middleware import CacheMiddleware, Middleware, RateLimitMiddleware, Request, RetryMiddleware, chain
+from theoneapi.transport import Response, Transport
+
+MOVIES = {"docs": [{"_id": "movie0", "name": "The Two Towers"}], "total": 1, "limit": 1000, "offset": 0, "page": 1,
+          "pages": 1}
+
+
+class ScriptedTransport(Transport):
+    """
+    Answers each request with the next of a list of statuses (or exceptions), recording the urls it was sent.
+    """
+
+    def __init__(self, *script) -> None:
+        self.script = list(script)
+        self.urls = []
+
+    def send(self, url, headers, timeout=None, chunk_size=65536):
+        self.urls.append(url)
+        step = len(self.script) > 1 and self.script.pop(0) or self.script[0]
+        if isinstance(step, Exception):
+            raise step
+        status, headers = isinstance(step, tuple) and step or (step, {})
+        body = json.dumps(status == 200 and MOVIES or {"success": False}).encode("utf-8")
+        return Response(status, headers, iter([body]))
+
+
+class Events(Hooks):
+
+    def __init__(self):
+        self.events = []
+
+    def request_finished(self, event):
+        self.events.append(event)
+
+
+class TestMiddleware(unittest.TestCase):
+
+    def test_order_and_short_circuit(self):
+        calls = []
+
+        class Named(Middleware):
+            def __init__(self, name, answer=None):
+                self.name, self.answer = name, answer
+
+            def handle(self, request, next):
+                calls.append(self.name)
+                if self.answer is not None:
+                    return self.answer
+                request.headers[self.name] = "seen"
+                return next(request)
+
+        seen = []
+        handler = chain([Named("outer"), Named("inner")], lambda request: seen.append(request.headers) or "sent")
+        self.assertEqual(handler(Request("u", "p")), "sent")
+        self.assertListEqual(calls, ["outer", "inner"])
+        self.assertDictEqual(seen[0], {"outer": "seen", "inner": "seen"})
+
+        transport = ScriptedTransport(200)
+        api = sdk.TheOneApi("key", transport=transport, middleware=[Named("short", Response(200, {}, iter([b"{}"])))])
+        self.assertDictEqual(api.movies(), {})
+        self.assertListEqual(transport.urls, [])
+
+    def test_every_endpoint_goes_through_the_pipeline(self):
+        transport = ScriptedTransport(200)
+        cache = CacheMiddleware()
+        api = sdk.TheOneApi("key", transport=transport, middleware=[cache])
+        api.movies()
+        api.movie("movie0")
+        api.movie_quotes("movie0", sdk.RequestOptions(limit=5))
+        api.books()
+        api.book_chapters("book0")
+        api.get("chapter", sdk.RequestOptions(page=2))
+        self.assertListEqual([url[len(api.BASE_URL):] for url in transport.urls],
+                             ["movie", "movie/movie0", "movie/movie0/quote?limit=5", "book", "book/book0/chapter",
+                              "chapter?page=2"])
+        self.assertEqual(len(cache.cache), 6)
+
+    def test_cache(self):
+        transport = ScriptedTransport(200)
+        hooks = Events()
+        api = sdk.TheOneApi("key", transport=transport, middleware=[CacheMiddleware(ttl=60)], hooks=hooks)
+        self.assertDictEqual(api.movies(), MOVIES)
+        self.assertDictEqual(api.movies(), MOVIES)
+        self.assertEqual(len(list(api.stream("movie"))), 1)
+        self.assertEqual(len(transport.urls), 1)
+        self.assertListEqual([event.cache for event in hooks.events], ["miss", "hit", "hit"])
+        self.assertEqual(api.transfer_summary()["requests"], 1)
+
+        transport = ScriptedTransport(500, 200)
+        api = sdk.TheOneApi("key", transport=transport, middleware=[CacheMiddleware()], fallback=False)
+        api.movies()
+        api.movies()
+        api.movies()
+        self.assertEqual(len(transport.urls), 2)
+
+    def test_retry(self):
+        transport = ScriptedTransport(503, requests.ConnectionError(), (429, {"Retry-After": "0"}), 200)
+        hooks = Events()
+        retry = RetryMiddleware(retries=3, backoff=0.01, rng=random.Random(0))
+        api = sdk.TheOneApi("key", transport=transport, middleware=[retry], hooks=hooks)
+        self.assertDictEqual(api.movies(), MOVIES)
+        self.assertEqual(len(transport.urls), 4)
+        self.assertEqual(hooks.events[0].retries, 3)
+        self.assertEqual(hooks.events[0].status, 200)
+        self.assertEqual(api.breaker("movie").state, sdk.CircuitBreaker().state)
+
+        transport = ScriptedTransport(503)
+        api = sdk.TheOneApi("key", transport=transport, middleware=[RetryMiddleware(retries=2, backoff=0.01)],
+                            fallback=False)
+        self.assertIn("success", api.movies())
+        self.assertEqual(len(transport.urls), 3)
+
+        transport = ScriptedTransport((429, {"Retry-After": "3600"}))
+        api = sdk.TheOneApi("key", transport=transport, middleware=[RetryMiddleware(max_wait=30)])
+        api.movies()
+        self.assertEqual(len(transport.urls), 1)
+
+    def test_rate_limit(self):
+        transport = ScriptedTransport(200)
+        hooks = Events()
+        limiter = RateLimitMiddleware(rate=20, period=1, burst=2)
+        api = sdk.TheOneApi("key", transport=transport, middleware=[limiter], hooks=hooks)
+        started = time.perf_counter()
+        for _ in range(4):
+            api.movies()
+        self.assertGreater(time.perf_counter() - started, 0.09)
+        self.assertGreater(hooks.events[-1].phases["queue"], 0.03)
+
+        transport = ScriptedTransport((200, {"x-ratelimit-remaining": "0"}), 200)
+        limiter = RateLimitMiddleware(rate=20, period=1)
+        api = sdk.TheOneApi("key", transport=transport, middleware=[limiter])
+        api.movies()
+        started = time.perf_counter()
+        api.movies()
+        self.assertGreater(time.perf_counter() - started, 0.04)
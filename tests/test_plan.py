@@ -0,0 +1,102 @@
+import unittest
+from theoneapi import sdk
+from theoneapi.middleware import CacheMiddleware, RateLimitMiddleware
+from theoneapi.plan import ASSUMED_SECONDS, BudgetExceeded
+from theoneapi.scheduler import QuotaScheduler
+from theoneapi.synthetic import SyntheticCorpus, SyntheticTheOneApi
+
+
+class Counting(CacheMiddleware):
+    # Counts the requests which reach the transport.
+    def __init__(self):
+        super().__init__()
+        self.sent = 0
+
+    def handle(self, request, next):
+        if request.url not in self.cache:
+            self.sent += 1
+        return super().handle(request, next)
+
+
+class TestExplain(unittest.TestCase):
+
+    def setUp(self):
+        self.corpus = SyntheticCorpus(quotes=2500, movies=4)
+        self.cache = Counting()
+        self.api = SyntheticTheOneApi(self.corpus, middleware=[self.cache])
+
+    def _sent(self, run):
+        before = self.cache.sent
+        run()
+        return self.cache.sent - before
+
+    def test_predicts_the_calls(self):
+        quotes = sdk.Quotes(self.api, sdk.RequestOptions(limit=1000))
+        unknown = quotes.explain()
+        self.assertIsNone(unknown.calls)
+        with self.assertRaises(BudgetExceeded):
+            unknown.check()
+        self.assertEqual(unknown.seconds, None)
+
+        probed = quotes.explain(probe=True)
+        self.assertEqual((probed.calls, probed.total, probed.pages, probed.source), (3, 2500, 3, "probe"))
+        self.assertEqual(self._sent(lambda: quotes.fetch_all()), probed.calls)
+        self.assertEqual(quotes.explain("count").calls, 0)
+        self.assertTrue(quotes.explain("count").local)
+
+        # fetch_all leaves the options on the last page, which a CacheMiddleware now holds.
+        fetched = quotes.explain()
+        self.assertEqual((fetched.calls, fetched.cached, fetched.local, fetched.source), (0, 1, True, "docs"))
+        self.assertEqual(fetched.seconds, 0)
+
+        matching = sdk.Quotes(self.api).match("movie", self.corpus.id("movie", 1)).limit(100)
+        matching.fetch()
+        plan = matching.explain()
+        self.assertEqual((plan.source, plan.cached), ("metadata", 0))
+        self.assertEqual((matching.explain("fetch").calls, matching.explain("fetch").cached), (0, 1))
+        self.assertEqual(self._sent(lambda: matching.fetch_all()), plan.calls)
+        with self.assertRaises(ValueError):
+            matching.explain("delete")
+
+    def test_movie_quotes(self):
+        movies = sdk.Movies(self.api).fetch()
+        plan = movies.explain("quotes")
+        self.assertEqual(plan.calls, 4)
+        self.assertEqual(self._sent(lambda: [movie.quotes() for movie in movies.docs]), 4)
+        self.assertEqual(movies.explain("quotes").calls, 0)
+
+        fresh = sdk.Movies(self.api).fetch()
+        prefetch = fresh.explain("prefetch_quotes", probe=True)
+        self.assertEqual((prefetch.operation, prefetch.total), ("prefetch_quotes", 2500))
+        self.assertEqual(self._sent(lambda: fresh.prefetch_quotes()), prefetch.calls)
+        self.assertEqual(fresh.explain("quotes").calls, 0)
+
+    def test_budget_and_time(self):
+        api = SyntheticTheOneApi(self.corpus, middleware=[RateLimitMiddleware(rate=2, period=60)])
+        quotes = sdk.Quotes(api, sdk.RequestOptions(limit=500))
+        plan = quotes.explain(probe=True)
+        self.assertEqual((plan.calls, plan.budget, plan.within_budget), (5, 1, False))
+        self.assertGreater(plan.seconds, 4 * 30)
+        with self.assertRaises(BudgetExceeded):
+            plan.check()
+
+        scheduler = QuotaScheduler(rate=10, period=60)
+        api = SyntheticTheOneApi(self.corpus, middleware=[scheduler])
+        quotes = sdk.Quotes(api, sdk.RequestOptions(limit=1000))
+        self.assertEqual(quotes.explain().seconds, None)
+        self.assertEqual(sdk.Quotes(api).explain("count").seconds, ASSUMED_SECONDS)
+        quotes.count()
+        with scheduler.priority("background"):
+            plan = quotes.explain(probe=True)
+        # 8 of the 10 requests are left, 4 of them still reserved for interactive requests.
+        self.assertEqual((plan.calls, plan.budget), (3, 4))
+        self.assertIs(plan.check(max_calls=3), plan)
+        with self.assertRaises(BudgetExceeded):
+            plan.check(max_seconds=0)
+
+    def test_empty_results(self):
+        nothing = sdk.Quotes(self.api).match("movie", "none").fetch()
+        self.assertEqual(nothing.metadata["total"], 0)
+        plan = nothing.explain()
+        self.assertEqual((plan.calls, plan.total, plan.pages, plan.source), (1, 0, 0, "metadata"))
+        self.assertIs(plan.check(), plan)
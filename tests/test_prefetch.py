@@ -0,0 +1,48 @@
+import unittest
+from theoneapi import sdk
+from theoneapi.server import StandInServer
+from theoneapi.synthetic import SyntheticCorpus
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_fetch_all(self):
+        quotes = sdk.Quotes(self.api).limit(10).fetch_all()
+        self.assertEqual(len(quotes.docs), 25)
+        self.assertListEqual([call[2] for call in self.api.calls], [1, 2, 3])
+        self.assertEqual(quotes.count(), 25)
+        self.assertEqual(len(self.api.calls), 3)
+
+    def test_prefetch_quotes(self):
+        movies = sdk.Movies(self.api).fetch().prefetch_quotes(limit=10)
+        self.assertListEqual([call[0] for call in self.api.calls], ["movie", "quote", "quote", "quote"])
+        self.assertEqual(self.api.calls[1][4], "movie=movie0,movie1,movie2,movie3")
+
+        self.assertListEqual([len(movie.quotes().docs) for movie in movies.docs], [9, 8, 8, 0])
+        self.assertListEqual([movie.quotes().metadata["total"] for movie in movies.docs], [9, 8, 8, 0])
+        self.assertTrue(all(quote.movie == "movie1" for quote in movies.docs[1].quotes().docs))
+        self.assertEqual(len(self.api.calls), 4)
+
+    def test_failed_prefetch_attaches_nothing(self):
+        corpus = SyntheticCorpus(quotes=30, movies=2)
+        with StandInServer(corpus, quota=2) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            movies = sdk.Movies(api).fetch()
+            with self.assertRaises(sdk.ApiError):
+                movies.prefetch_quotes(limit=10)
+            server.quota = None
+            self.assertEqual(sum(movie.quotes().metadata["total"] for movie in movies.docs), 30)
+            self.assertEqual(server.stats["requests"], 5)
+
+    def test_failed_pages_raise(self):
+        corpus = SyntheticCorpus(quotes=30, movies=2)
+        with StandInServer(corpus, quota=2) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            with self.assertRaises(sdk.ApiError):
+                sdk.Quotes(api).limit(10).fetch_all()
+            server.quota = None
+            self.assertEqual(len(sdk.Quotes(api).limit(10).fetch_all().docs), 30)
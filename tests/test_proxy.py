@@ -0,0 +1,85 @@
+import json
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from theoneapi import sdk
+from theoneapi.proxy import CachingProxy
+from theoneapi.server import StandInServer, fixed
+from theoneapi.synthetic import SyntheticCorpus
+
+
+class TestCachingProxy(unittest.TestCase):
+
+    def setUp(self):
+        self.upstream = StandInServer(SyntheticCorpus(quotes=300, movies=4), latency=fixed(0.1), api_keys=["secret"])
+        self.upstream.start()
+        self.addCleanup(self.upstream.stop)
+
+    def proxy(self, **options) -> CachingProxy:
+        proxy = CachingProxy("secret", self.upstream.url, **options).start()
+        self.addCleanup(proxy.stop)
+        return proxy
+
+    def test_one_upstream_request_per_query(self):
+        proxy = self.proxy()
+
+        def client(number: int) -> list:
+            api = sdk.TheOneApi(f"client {number}", base_url=proxy.url)
+            return [quote.id for quote in sdk.Quotes(api, sdk.RequestOptions(limit=100)).fetch_all().docs]
+
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(client, range(8)))
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(len(results[0]), 300)
+        self.assertEqual(self.upstream.stats["requests"], 3)
+        self.assertGreater(proxy.stats["coalesced"] + proxy.stats["hits"], 0)
+
+        response = requests.get(proxy.url + "quote?limit=100&page=1", headers={"Accept-Encoding": "identity"})
+        self.assertEqual(response.headers["X-Cache"], "HIT")
+        self.assertNotIn("Content-Encoding", response.headers)
+        self.assertEqual(len(response.json()["docs"]), 100)
+        stats = requests.get(proxy.url.replace("/v2/", "/_proxy/stats")).json()
+        self.assertEqual(stats["upstream"], 3)
+
+    def test_stale_while_revalidate(self):
+        proxy = self.proxy(ttl=0.5, stale_ttl=60)
+        self.assertEqual(requests.get(proxy.url + "movie").headers["X-Cache"], "MISS")
+        time.sleep(0.55)
+        started = time.perf_counter()
+        self.assertEqual(requests.get(proxy.url + "movie").headers["X-Cache"], "STALE")
+        self.assertLess(time.perf_counter() - started, 0.1)
+        time.sleep(0.2)
+        self.assertEqual(self.upstream.stats["requests"], 2)
+        self.assertEqual(requests.get(proxy.url + "movie").headers["X-Cache"], "HIT")
+
+        # An expired response is still served while the upstream fails.
+        self.upstream.error_rate = 1.0
+        proxy.ttl = 0
+        response = requests.get(proxy.url + "movie")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total"], 4)
+
+    def test_rate_limit_and_errors(self):
+        proxy = self.proxy(rate=20, period=1, retries=0)
+        proxy.middleware[1].burst = proxy.middleware[1]._tokens = 1
+        started = time.perf_counter()
+        requests.get(proxy.url + "movie")
+        requests.get(proxy.url + "quote")
+        self.assertGreater(time.perf_counter() - started, 0.04 + 0.2)
+
+        self.upstream.error_rate = 1.0
+        response = requests.get(proxy.url + "character")
+        self.assertIn(response.status_code, [500, 502, 503])
+        self.assertEqual(json.loads(response.content)["success"], False)
+        self.assertEqual(requests.get(proxy.url + "character").headers["X-Cache"], "MISS")
+
+    def test_client_keys(self):
+        proxy = self.proxy(client_keys=["fleet"])
+        self.assertEqual(requests.get(proxy.url + "movie").status_code, 401)
+        self.assertEqual(requests.get(proxy.url + "movie", headers={"Authorization": "Bearer other"}).status_code, 401)
+        self.assertEqual(requests.get(proxy.url.replace("/v2/", "/_proxy/stats")).status_code, 401)
+        self.assertEqual(self.upstream.stats["requests"], 0)
+
+        api = sdk.TheOneApi("fleet", base_url=proxy.url)
+        self.assertEqual(len(sdk.Movies(api).fetch().docs), 4)
@@ -0,0 +1,38 @@
+import unittest
+from theoneapi import sdk
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+
+class TestQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_url_with_query_is_repeatable(self):
+        options = sdk.RequestOptions(sort="-name", limit=3)
+        url = options.url_with_query("movie")
+        self.assertEqual(url, "movie?limit=3&sort=name:desc")
+        self.assertEqual(options.url_with_query("movie"), url)
+        self.assertEqual(options.sort, "-name")
+
+    def test_query(self):
+        query = sdk.Query(sort="-name", filter="name=/of the/i")
+        self.assertEqual(query, sdk.Query(sort="name:desc", filter="name=/of the/i"))
+        self.assertEqual(hash(query), hash(sdk.RequestOptions(sort="-name", filter="name=/of the/i").freeze()))
+        self.assertEqual(query.url_with_query("movie"), "movie?sort=name:desc&name=/of the/i")
+
+        paged = query.replace(page=2)
+        self.assertIsNone(query.page)
+        self.assertEqual(paged.url_with_query("movie"), "movie?page=2&sort=name:desc&name=/of the/i")
+        with self.assertRaises(Exception):
+            query.page = 3
+
+    def test_builders_do_not_change_shared_options(self):
+        options = sdk.Query(limit=10)
+        first = sdk.Quotes(self.api, options).match("movie", "movie1")
+        second = sdk.Quotes(self.api, options).page(2)
+        self.assertEqual(options, sdk.Query(limit=10))
+        self.assertEqual(first.options, sdk.Query(limit=10, filter="movie=movie1"))
+        self.assertEqual(len(first.fetch().docs), 8)
+        self.assertEqual(len(second.fetch().docs), 10)
+        self.assertEqual(self.api.calls[-1], ("quote", 10, 2, None, None))
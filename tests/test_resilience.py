@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import requests
+from theoneapi import sdk
+from theoneapi.resilience import CircuitBreaker, CircuitOpenError, CircuitState
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, INVALID_API_KEY, FakeTheOneApi
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_on_failure_rate(self):
+        breaker = CircuitBreaker(failure_rate=0.5, min_calls=4)
+        for success in [True, False, True]:
+            breaker.record_success() if success else breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+        self.assertFalse(breaker.allow())
+        self.assertGreater(breaker.retry_after(), 0)
+
+    def test_half_open_trial(self):
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        time.sleep(0.06)
+        self.assertEqual(breaker.state, CircuitState.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.OPEN)
+
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_rolling_window(self):
+        breaker = CircuitBreaker(min_calls=2, window=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitState.CLOSED)
+
+
+class TestApiCircuitBreakers(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_circuit_breaker(self):
+        api = sdk.TheOneApi(INVALID_API_KEY, breaker_options={"min_calls": 2, "reset_timeout": 60}, fallback=False)
+        with mock.patch("theoneapi.sdk.requests.get") as get:
+            get.side_effect = requests.Timeout()
+            for _ in range(2):
+                with self.assertRaises(requests.Timeout):
+                    api.quotes()
+            self.assertEqual(get.call_args.kwargs["timeout"], (3.05, 30))
+            self.assertEqual(api.breakers["quote"].state, CircuitState.OPEN)
+
+            with self.assertRaises(CircuitOpenError) as context:
+                api.quote("quote1")
+            self.assertEqual(context.exception.endpoint, "quote")
+            self.assertEqual(get.call_count, 2)
+            self.assertEqual(api.breaker("movie").state, CircuitState.CLOSED)
+
+    def test_circuit_breaker_fallback(self):
+        api = sdk.TheOneApi(INVALID_API_KEY, breaker_options={"min_calls": 1})
+        body = json.dumps({"docs": FAKE_QUOTES[:2], "total": 25, "limit": 2, "offset": 0, "page": 1, "pages": 13})
+        with mock.patch("theoneapi.sdk.requests.get") as get:
+            get.return_value.status_code = 200
+            get.return_value.headers = {}
+            get.return_value.raw.stream.side_effect = lambda *args, **kwargs: [body.encode()]
+            self.assertEqual(len(api.quotes(sdk.RequestOptions(limit=2))["docs"]), 2)
+
+            get.return_value.status_code = 503
+            self.assertEqual(len(api.quotes(sdk.RequestOptions(limit=2))["docs"]), 2)
+            self.assertEqual(api.breakers["quote"].state, CircuitState.OPEN)
+            self.assertEqual(len(list(api.stream("quote", sdk.RequestOptions(limit=2)))), 2)
+            self.assertEqual(get.call_count, 2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "lotr.snapshot")
+            self.api.save_snapshot(path, ["quote"])
+            api.use_snapshot(path)
+            self.assertEqual(sdk.Quotes(api).by_id("quote7").docs[0].dialog, "Dialog 7")
+            self.assertListEqual(api.quote("quote404")["docs"], [])
+            self.assertEqual(sdk.Quotes(api).limit(10).page(3).fetch().docs[0].id, "quote20")
+            with self.assertRaises(CircuitOpenError):
+                api.quotes(sdk.RequestOptions(filter="movie=movie1"))
+            for filter in ["dialog", "!dialog", "runtimeInMinutes<102"]:
+                with self.assertRaises(CircuitOpenError):
+                    api.quotes(sdk.RequestOptions(limit=10, filter=filter))
+
+    def test_stale_only_kept_for_fallback(self):
+        api = sdk.TheOneApi(INVALID_API_KEY, fallback=False)
+        body = json.dumps({"docs": FAKE_QUOTES[:2], "total": 25, "limit": 2, "offset": 0, "page": 1, "pages": 13})
+        with mock.patch("theoneapi.sdk.requests.get") as get:
+            get.return_value.status_code = 200
+            get.return_value.headers = {}
+            get.return_value.raw.stream.side_effect = lambda *args, **kwargs: [body.encode()]
+            api.quotes(sdk.RequestOptions(limit=2))
+            self.assertEqual(len(api.stale), 0)
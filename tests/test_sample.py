@@ -0,0 +1,49 @@
+import random
+import unittest
+from theoneapi import sdk
+from theoneapi.server import StandInServer
+from theoneapi.synthetic import SyntheticCorpus
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+
+class TestSample(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_sample(self):
+        quotes = sdk.Quotes(self.api).sample(6, random.Random(7))
+        self.assertEqual(len(set(quote.id for quote in quotes)), 6)
+        self.assertEqual(self.api.calls[0], ("quote", 1, None, None, None))
+        self.assertLessEqual(len(self.api.calls), 7)
+        self.assertTrue(all(call[3] is not None for call in self.api.calls[1:]))
+
+        calls = len(self.api.calls)
+        sdk.Quotes(self.api).match("movie", "movie1").sample(20, random.Random(7))
+        self.assertEqual(self.api.calls[calls][1:], (1, None, None, "movie=movie1"))
+        calls = len(self.api.calls)
+        sdk.Quotes(self.api).sample(1)
+        self.assertEqual(len(self.api.calls), calls + 1)
+        self.assertIsNotNone(self.api.calls[-1][3])
+        self.assertEqual(len(sdk.Quotes(self.api).sample(100)), 25)
+
+        movies = sdk.Movies(self.api).fetch()
+        calls = len(self.api.calls)
+        self.assertEqual(len(movies.sample(3)), 3)
+        self.assertEqual(len(self.api.calls), calls)
+
+    def test_failed_samples_raise(self):
+        with StandInServer(SyntheticCorpus(quotes=30, movies=2), quota=0) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            with self.assertRaises(sdk.ApiError):
+                sdk.Quotes(api).sample(3)
+            self.assertIsNone(api.totals.get(("quote", None)))
+
+            server.quota = 1
+            other = sdk.TheOneApi("other", base_url=server.url)
+            with self.assertRaises(sdk.ApiError):
+                sdk.Quotes(other).sample(3, random.Random(1))
+
+            server.quota = None
+            self.assertEqual(len(sdk.Quotes(api).sample(3)), 3)
+            self.assertEqual(len(sdk.Quotes(other).sample(3)), 3)
@@ -0,0 +1,83 @@
+import threading
+import time
+import unittest
+from theoneapi import sdk
+from theoneapi.middleware import Request
+from theoneapi.scheduler import DeadlineExceeded, PriorityClass, QueueFull, QuotaScheduler
+from theoneapi.synthetic import SyntheticCorpus, SyntheticTheOneApi
+from theoneapi.transport import Response
+
+
+class TestQuotaScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.sent = []
+
+    def _send(self, scheduler, name=None, deadline=None, headers=None):
+        def send(request):
+            self.sent.append(name)
+            return Response(200, headers or {}, iter([b"{}"]))
+
+        request = Request("https://the-one-api.dev/v2/movie", "movie")
+        if name is None:
+            return scheduler.handle(request, send)
+        with scheduler.priority(name, deadline):
+            return scheduler.handle(request, send)
+
+    def test_reserved_shares(self):
+        scheduler = QuotaScheduler(rate=4, period=60)
+        api = SyntheticTheOneApi(SyntheticCorpus(quotes=3000), middleware=[scheduler])
+        with scheduler.priority("background"):
+            sdk.Quotes(api, sdk.RequestOptions(limit=1000)).page(1).fetch()
+            sdk.Quotes(api, sdk.RequestOptions(limit=1000)).page(2).fetch()
+        with scheduler.priority("background", deadline=1), self.assertRaises(DeadlineExceeded):
+            sdk.Quotes(api, sdk.RequestOptions(limit=1000)).page(3).fetch()
+        self.assertEqual(scheduler.available("interactive"), 2)
+        self.assertEqual(scheduler.available("background"), 0)
+
+        self._send(scheduler)
+        self._send(scheduler, "interactive")
+        self.assertDictEqual(scheduler.usage(), {"interactive": 2, "background": 2})
+        with self.assertRaises(DeadlineExceeded):
+            self._send(scheduler, "interactive", deadline=0.1)
+        self.assertEqual(scheduler.stats["expired"], {"background": 1, "interactive": 1})
+        with self.assertRaises(ValueError):
+            QuotaScheduler(classes={"a": PriorityClass(0, 0.6), "b": PriorityClass(1, 0.6)})
+
+    def test_priority_order_and_bounded_queues(self):
+        classes = {"interactive": PriorityClass(0, 0.0, max_queue=1), "background": PriorityClass(1, 0.0, max_queue=1)}
+        scheduler = QuotaScheduler(rate=1, period=0.5, classes=classes)
+        self._send(scheduler)
+
+        background = threading.Thread(target=self._send, args=(scheduler, "background"))
+        background.start()
+        time.sleep(0.1)
+        with self.assertRaises(QueueFull):
+            self._send(scheduler, "background")
+        interactive = threading.Thread(target=self._send, args=(scheduler, "interactive"))
+        interactive.start()
+        interactive.join(5)
+        background.join(5)
+        self.assertListEqual(self.sent, [None, "interactive", "background"])
+        self.assertEqual(scheduler.stats["refused"]["background"], 1)
+
+    def test_follows_the_api(self):
+        scheduler = QuotaScheduler(rate=100, period=60)
+        reset = str(int(time.time() + 60))
+        self._send(scheduler, headers={"x-ratelimit-remaining": "51", "x-ratelimit-reset": reset})
+        # 51 remain, of which interactive still has 49 reserved.
+        self.assertEqual(scheduler.available("background"), 2)
+        self._send(scheduler, "background")
+        self._send(scheduler, "background")
+        self.assertEqual(scheduler.available("background"), 0)
+        self.assertEqual(scheduler.available("interactive"), 49)
+
+    def test_priority_covers_the_sdk_pools(self):
+        scheduler = QuotaScheduler(rate=100, period=60)
+        corpus = SyntheticCorpus(quotes=100, movies=4)
+        api = SyntheticTheOneApi(corpus, middleware=[scheduler])
+        with scheduler.priority("background"):
+            sdk.Quotes(api).count_by("movie", [corpus.id("movie", number) for number in range(4)])
+            sdk.Quotes(api).sample(3)
+        self.assertEqual(scheduler.stats["sent"]["interactive"], 0)
+        self.assertGreaterEqual(scheduler.stats["sent"]["background"], 6)
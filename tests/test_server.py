@@ -0,0 +1,51 @@
+import random
+import time
+import unittest
+import requests
+from theoneapi import sdk
+from theoneapi.server import StandInServer, fixed, parse_latency
+from theoneapi.synthetic import SyntheticCorpus
+
+
+class TestStandInServer(unittest.TestCase):
+
+    def test_serves_the_sdk(self):
+        corpus = SyntheticCorpus(quotes=1500, movies=4)
+        with StandInServer(corpus) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            quotes = sdk.Quotes(api, sdk.RequestOptions(limit=1000)).fetch_all()
+            self.assertEqual(len(quotes.docs), 1500)
+            self.assertEqual(quotes.docs[3].dialog, corpus.document("quote", 3)["dialog"])
+            self.assertGreater(api.transfer_summary()["ratio"], 1.0)
+
+            movie = sdk.Movies(api).sort("name").fetch().docs[0]
+            self.assertEqual(movie.name, min(doc["name"] for doc in corpus.documents("movie")))
+            self.assertTrue(all(quote.movie == movie.id for quote in movie.quotes().docs))
+            self.assertEqual(sdk.Quotes(api).by_id(corpus.id("quote", 7)).docs[0].id, corpus.id("quote", 7))
+
+            self.assertEqual(requests.get(server.url + "quote").status_code, 401)
+            self.assertEqual(requests.get(server.url + "book", headers={"Authorization": "Bearer key"}).status_code, 404)
+
+    def test_quota_and_errors(self):
+        with StandInServer(quota=2, quota_window=60) as server:
+            headers = {"Authorization": "Bearer key"}
+            statuses = [requests.get(server.url + "movie", headers=headers).status_code for _ in range(3)]
+            self.assertListEqual(statuses, [200, 200, 429])
+            response = requests.get(server.url + "movie", headers=headers)
+            self.assertEqual(response.headers["x-ratelimit-remaining"], "0")
+            self.assertTrue(0 < int(response.headers["Retry-After"]) <= 60)
+            self.assertEqual(requests.get(server.url + "movie", headers={"Authorization": "Bearer other"}).status_code, 200)
+            self.assertEqual(server.stats["throttled"], 2)
+
+        with StandInServer(error_rate=1.0, seed=1) as server:
+            response = requests.get(server.url + "movie", headers={"Authorization": "Bearer key"})
+            self.assertIn(response.status_code, [500, 502, 503])
+
+    def test_latency_and_slow_bodies(self):
+        self.assertAlmostEqual(parse_latency("uniform:0.1,0.2")(random.Random(0)), 0.18, places=1)
+        with StandInServer(SyntheticCorpus(quotes=200), latency=fixed(0.05), body_rate=200000, chunk_size=4096) as server:
+            started = time.perf_counter()
+            headers = {"Authorization": "Bearer key", "Accept-Encoding": "identity"}
+            response = requests.get(server.url + "quote", headers=headers)
+            self.assertEqual(len(response.json()["docs"]), 200)
+            self.assertGreater(time.perf_counter() - started, 0.05 + len(response.content) / 200000 * 0.5)
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from theoneapi import sdk
+from theoneapi.server import StandInServer
+from theoneapi.snapshot import Snapshot, write_snapshot
+from theoneapi.synthetic import SyntheticCorpus
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+MOVIES = [
+    {"_id": "5cd95395de30eff6ebccde5d", "name": "The Return of the King", "runtimeInMinutes": 201,
+     "boxOfficeRevenueInMillions": 1120.5, "academyAwardWins": 11},
+    {"_id": "5cd95395de30eff6ebccde5b", "name": "The Two Towers", "runtimeInMinutes": 179},
+]
+
+QUOTES = [
+    {"_id": f"5cd96e05de30eff6ebcc{i:04x}", "dialog": f"Dialog {i} ✓", "movie": MOVIES[i % 2]["_id"],
+     "character": "5cd99d4bde30eff6ebccfbe6"}
+    for i in range(50)
+]
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "lotr.snapshot")
+        write_snapshot(self.path, {"movie": MOVIES, "quote": QUOTES, "misc": [{"_id": "x", "tags": [1, None]}]})
+        self.snapshot = Snapshot(self.path, {"movie": sdk.Movie, "quote": sdk.Quote})
+        self.addCleanup(self.snapshot.close)
+
+    def test_records_round_trip(self):
+        self.assertListEqual(self.snapshot.kinds, ["movie", "quote", "misc"])
+        self.assertListEqual(list(self.snapshot["movie"].records()), MOVIES)
+        self.assertListEqual(list(self.snapshot["quote"].records()), QUOTES)
+        self.assertDictEqual(self.snapshot["misc"][0], {"_id": "x", "tags": [1, None]})
+
+    def test_id_index(self):
+        quotes = self.snapshot["quote"]
+        self.assertEqual(len(quotes), 50)
+        for row, quote in enumerate(QUOTES):
+            self.assertEqual(quotes.row_of(quote["_id"]), row)
+        self.assertIsNone(quotes.get("5cd96e05de30eff6ebccffff"))
+        self.assertIsNone(quotes.get("short"))
+        self.assertIsNone(self.snapshot.get("character", "5cd99d4bde30eff6ebccfbe6"))
+
+    def test_lazy_views(self):
+        movie = self.snapshot.get("movie", "5cd95395de30eff6ebccde5b")
+        self.assertIsInstance(movie, sdk.Movie)
+        self.assertNotIn("name", movie.__dict__)
+        self.assertEqual(movie.name, "The Two Towers")
+        self.assertIn("name", movie.__dict__)
+        self.assertFalse(hasattr(movie, "academyAwardWins"))
+        self.assertEqual(movie["id"], "5cd95395de30eff6ebccde5b")
+        with self.assertRaises(KeyError):
+            movie["academyAwardWins"]
+
+        quote = self.snapshot["quote"][-1]
+        self.assertDictEqual(quote.as_dict(), {
+            "id": QUOTES[49]["_id"], "dialog": "Dialog 49 ✓", "movie": MOVIES[1]["_id"],
+            "character": "5cd99d4bde30eff6ebccfbe6",
+        })
+        self.assertEqual(self.snapshot["movie"].column("runtimeInMinutes"), [201, 179])
+
+    def test_rejects_other_files(self):
+        with open(self.path, "r+b") as file:
+            file.write(b"JUNK")
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+    def test_save_fails_on_errors(self):
+        path = self.path + ".new"
+        with StandInServer(SyntheticCorpus(quotes=30, movies=2), quota=1) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            with self.assertRaises(sdk.ApiError):
+                api.save_snapshot(path, ["movie", "quote"])
+            self.assertFalse(os.path.exists(path))
+
+
+class TestApiSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "lotr.snapshot")
+            self.api.save_snapshot(path, ["movie", "quote"])
+            calls = len(self.api.calls)
+
+            api = FakeTheOneApi([], [])
+            api.use_snapshot(path, known_ids=True)
+            self.assertEqual(sdk.Quotes(api).count(), 25)
+            self.assertDictEqual(sdk.Quotes(api).count_by("movie", ["movie0", "movie3"]), {"movie0": 9, "movie3": 0})
+            self.assertEqual(sdk.Quotes(api).by_id("quote7").docs[0].movie.resolve().name, "The Desolation of Smaug")
+            self.assertIn("movie3", api.known_ids["movie"])
+            self.assertNotIn("movie404", api.known_ids["movie"])
+            self.assertListEqual(api.calls, [])
+            self.assertEqual(len(self.api.calls), calls)
+            api.snapshot.close()
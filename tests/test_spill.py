@@ -0,0 +1,55 @@
+import unittest
+from theoneapi import sdk
+from theoneapi.spill import SpillList
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+
+class TestSpillList(unittest.TestCase):
+
+    def setUp(self):
+        self.items = [{"_id": str(i), "dialog": "x" * (i % 7)} for i in range(100)]
+        self.spill = SpillList(10, items=self.items)
+        self.addCleanup(self.spill.close)
+
+    def test_access(self):
+        self.assertEqual(len(self.spill), 100)
+        self.assertEqual(self.spill.spilled, 90)
+        self.assertEqual(self.spill[0], self.items[0])
+        self.assertEqual(self.spill[55], self.items[55])
+        self.assertEqual(self.spill[-1], self.items[-1])
+        self.assertEqual(list(self.spill), self.items)
+        self.assertEqual(self.spill, self.items)
+        with self.assertRaises(IndexError):
+            self.spill[100]
+
+    def test_slices(self):
+        self.assertListEqual(self.spill[5:15], self.items[5:15])
+        self.assertListEqual(self.spill[95:200], self.items[95:])
+        self.assertListEqual(self.spill[::-7], self.items[::-7])
+        self.assertListEqual(self.spill[50:40], [])
+
+    def test_read_ahead(self):
+        self.spill.READ_AHEAD = 64
+        self.assertEqual(list(self.spill), self.items)
+
+    def test_encode_decode(self):
+        spill = SpillList(1, encode=lambda item: item * 2, decode=lambda record: record // 2, items=[1, 2, 3])
+        self.assertListEqual(list(spill), [1, 2, 3])
+        spill.append(4)
+        self.assertEqual(spill[3], 4)
+        spill.close()
+
+
+class TestFetchAllSpills(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_fetch_all_spills(self):
+        quotes = sdk.Quotes(self.api).limit(10).fetch_all(memory_limit=5)
+        self.assertEqual(len(quotes.docs), 25)
+        self.assertEqual(quotes.docs.spilled, 20)
+        self.assertListEqual([quote.id for quote in quotes.docs], [f"quote{i}" for i in range(25)])
+        self.assertEqual(quotes.docs[-1].movie.resolve().name, "The Battle of the Five Armies")
+        self.assertDictEqual(quotes.count_by("movie", ["movie0"]), {"movie0": 9})
+        self.assertEqual(len(self.api.calls), 4)
@@ -0,0 +1,83 @@
+import json
+import unittest
+from theoneapi import sdk
+from theoneapi.server import StandInServer
+from theoneapi.stream import DocStream
+from theoneapi.synthetic import SyntheticCorpus
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+RESPONSE = {
+    "docs": [{"_id": f"5cd96e05de30eff6ebcc{i:04x}", "dialog": f"Dialog {i} — “quoted” ✓", "n": i * 10} for i in range(30)],
+    "total": 2384,
+    "limit": 30,
+    "offset": 0,
+    "page": 1,
+    "pages": 80,
+}
+
+
+def chunked(data: bytes, size: int):
+    return (data[start:start + size] for start in range(0, len(data), size))
+
+
+class TestDocStream(unittest.TestCase):
+
+    def test_chunk_sizes(self):
+        body = json.dumps(RESPONSE, ensure_ascii=False).encode("utf-8")
+        for size in [1, 3, 64, len(body)]:
+            stream = DocStream(chunked(body, size))
+            self.assertListEqual(list(stream), RESPONSE["docs"])
+            self.assertTrue(stream.complete)
+            self.assertDictEqual(stream.metadata, {"total": 2384, "limit": 30, "offset": 0, "page": 1, "pages": 80})
+
+    def test_docs_arrive_before_the_body_ends(self):
+        body = json.dumps(RESPONSE, indent=2).encode("utf-8")
+        read = []
+
+        def chunks():
+            for chunk in chunked(body, 16):
+                read.append(len(chunk))
+                yield chunk
+
+        docs = iter(DocStream(chunks()))
+        self.assertEqual(next(docs)["n"], 0)
+        self.assertLess(sum(read), 200)
+
+    def test_metadata_before_docs_and_empty_docs(self):
+        body = b'{"total": 0, "docs" : [ ], "pages": 0}'
+        stream = DocStream(chunked(body, 5))
+        self.assertDictEqual(stream.read_all(), {"total": 0, "pages": 0, "docs": []})
+
+    def test_errors(self):
+        stream = DocStream([b'{"message": "Unauthorized.", "success": false}'])
+        self.assertListEqual(list(stream), [])
+        self.assertDictEqual(stream.metadata, {"message": "Unauthorized.", "success": False})
+        with self.assertRaises(ValueError):
+            list(DocStream([b'{"docs": [{"_id": 1}']))
+        with self.assertRaises(ValueError):
+            list(DocStream([b'{"docs": [1 2]}']))
+
+
+class TestIterDocs(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_iter_docs(self):
+        quotes = sdk.Quotes(self.api).limit(10)
+        docs = quotes.iter_docs()
+        self.assertEqual(next(docs).id, "quote0")
+        self.assertEqual(quotes.metadata["total"], 0)
+        self.assertListEqual([doc.id for doc in docs], [f"quote{i}" for i in range(1, 25)])
+        self.assertDictEqual(quotes.metadata, {"total": 25, "limit": 10, "offset": 20, "page": 3, "pages": 3})
+        self.assertListEqual(quotes.docs, [])
+        self.assertListEqual([call[2] for call in self.api.calls], [1, 2, 3])
+
+    def test_failed_pages_raise(self):
+        corpus = SyntheticCorpus(quotes=30, movies=2)
+        with StandInServer(corpus, quota=2) as server:
+            api = sdk.TheOneApi("key", base_url=server.url)
+            docs = []
+            with self.assertRaises(sdk.ApiError):
+                docs.extend(sdk.Quotes(api).limit(10).iter_docs())
+            self.assertEqual(len(docs), 20)
@@ -0,0 +1,119 @@
+import os
+import tempfile
+import unittest
+from theoneapi import sdk
+from theoneapi.server import StandInServer
+from theoneapi.snapshot import Snapshot
+from theoneapi.sync import DeltaSync, id_range_filter, record_hash
+from theoneapi.synthetic import SyntheticCorpus
+from tests.fake import FAKE_CHARACTERS, FAKE_MOVIES, FAKE_QUOTES, FakeTheOneApi
+
+RECORDS = [{"_id": f"{i:04d}", "dialog": f"Dialog {i}"} for i in range(40)]
+
+
+class TestDeltaSync(unittest.TestCase):
+
+    def setUp(self):
+        self.remote = list(RECORDS)
+        self.filters = []
+        self.sync = DeltaSync(lambda filter: len(self._select(filter)), self._select, page_size=8)
+
+    def _select(self, filter):
+        self.filters.append(filter)
+        docs = self.remote
+        for part in (filter or "").split("&"):
+            if part.startswith("_id>="):
+                docs = [doc for doc in docs if doc["_id"] >= part[5:]]
+            elif part.startswith("_id<"):
+                docs = [doc for doc in docs if doc["_id"] < part[4:]]
+        return docs
+
+    def test_pages_cover_every_id(self):
+        pages = self.sync.pages(list(reversed(RECORDS)))
+        self.assertEqual(len(pages), 5)
+        self.assertEqual((pages[0].lower, pages[0].upper), (None, "0008"))
+        self.assertEqual((pages[-1].lower, pages[-1].upper), ("0032", None))
+        self.assertEqual(id_range_filter("0008", "0016"), "_id>=0008&_id<0016")
+        self.assertIsNone(id_range_filter(None, None))
+        self.assertEqual(record_hash({"a": 1, "b": 2}), record_hash({"b": 2, "a": 1}))
+
+    def test_unchanged(self):
+        result = self.sync.sync(RECORDS)
+        self.assertFalse(result.changed)
+        self.assertListEqual(self.filters, [None])
+
+    def test_changes(self):
+        self.remote = [doc for doc in RECORDS if doc["_id"] != "0003"] + [{"_id": "0017a"}, {"_id": "0099"}]
+        self.remote[20] = dict(self.remote[20], dialog="Changed")
+        result = self.sync.sync(RECORDS)
+        self.assertTupleEqual((result.inserted, result.updated, result.deleted), (2, 1, 1))
+        self.assertEqual(result.changed_pages, 3)
+        self.assertListEqual([record["_id"] for record in result.records[-2:]], ["0017a", "0099"])
+        self.assertEqual(result.records[20]["dialog"], "Changed")
+
+    def test_empty(self):
+        self.remote = RECORDS[:3]
+        result = self.sync.sync([])
+        self.assertEqual(result.inserted, 3)
+        self.assertEqual(result.calls, 2)
+
+    def test_errors_keep_the_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory, StandInServer(SyntheticCorpus(quotes=30, movies=2)) as server:
+            path = os.path.join(directory, "lotr.snapshot")
+            api = sdk.TheOneApi("key", base_url=server.url)
+            api.save_snapshot(path, ["movie", "quote"])
+            written = os.path.getmtime(path)
+
+            server.quota = 1
+            with self.assertRaises(sdk.ApiError):
+                api.sync_snapshot(path)
+            # The failed count stops the sync, rather than every page being fetched in turn.
+            self.assertEqual(server.stats["throttled"], 1)
+            server.quota = 3
+            with self.assertRaises(sdk.ApiError):
+                api.sync_snapshot(path, page_size=10, verify=True)
+            self.assertEqual(os.path.getmtime(path), written)
+            snapshot = Snapshot(path)
+            self.assertEqual(len(list(snapshot["quote"].records())), 30)
+            snapshot.close()
+
+
+class TestSyncSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.api = FakeTheOneApi(FAKE_MOVIES, FAKE_QUOTES, FAKE_CHARACTERS)
+
+    def test_sync_snapshot_needs_a_path(self):
+        with self.assertRaises(ValueError):
+            self.api.sync_snapshot()
+        self.assertEqual(self.api.calls, [])
+
+    def test_sync_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "lotr.snapshot")
+            self.api.save_snapshot(path, ["quote"])
+            self.api.use_snapshot(path)
+            self.api.calls = []
+
+            results = self.api.sync_snapshot(page_size=5)
+            self.assertFalse(results["quote"].changed)
+            self.assertEqual(len(self.api.calls), 1)
+
+            quotes = self.api.data["quote"]
+            self.api.data["quote"] = [quote for quote in quotes if quote["_id"] != "quote12"] + [
+                {"_id": f"quote9{i}", "dialog": "New", "movie": "movie0", "character": "character0"} for i in range(2)
+            ]
+            self.api.calls = []
+            result = self.api.sync_snapshot(page_size=5)["quote"]
+            self.assertTupleEqual((result.inserted, result.updated, result.deleted), (2, 0, 1))
+            self.assertEqual(result.changed_pages, 2)
+            self.assertEqual(len(self.api.calls), result.calls)
+            self.assertEqual(sdk.Quotes(self.api).count(), 26)
+            self.assertEqual(self.api.snapshot.get("quote", "quote91").dialog, "New")
+            self.assertIsNone(self.api.snapshot.get("quote", "quote12"))
+
+            self.api.data["quote"][0] = dict(self.api.data["quote"][0], dialog="Changed")
+            self.assertFalse(self.api.sync_snapshot(page_size=5)["quote"].changed)
+            result = self.api.sync_snapshot(page_size=5, verify=True)["quote"]
+            self.assertTupleEqual((result.updated, result.changed_pages), (1, 1))
+            self.assertEqual(self.api.snapshot["quote"][0].dialog, "Changed")
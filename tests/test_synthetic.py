@@ -0,0 +1,51 @@
+import unittest
+from theoneapi import sdk
+from theoneapi.synthetic import SyntheticCorpus, SyntheticTheOneApi, matcher
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+
+    def test_documents_are_deterministic_and_shaped_like_the_api(self):
+        corpus = SyntheticCorpus(quotes=100, movies=3, characters=7)
+        quote = corpus.document("quote", 42)
+        self.assertDictEqual(quote, SyntheticCorpus(quotes=100, movies=3, characters=7).document("quote", 42))
+        self.assertNotEqual(quote, SyntheticCorpus(quotes=100, movies=3, characters=7, seed=1).document("quote", 42))
+        self.assertSetEqual(set(quote), {"_id", "dialog", "movie", "character", "id"})
+        self.assertEqual(len(quote["_id"]), 24)
+        self.assertIsNotNone(corpus.index_of("movie", quote["movie"]))
+        self.assertIsNotNone(corpus.index_of("character", quote["character"]))
+        self.assertEqual(corpus.index_of("quote", quote["_id"]), 42)
+        self.assertIsNone(corpus.index_of("quote", corpus.id("quote", 100)))
+        ids = [doc["_id"] for doc in corpus.documents("quote")]
+        self.assertListEqual(ids, sorted(ids))
+
+    def test_response_pages_and_filters(self):
+        corpus = SyntheticCorpus(quotes=2500, movies=3)
+        page = corpus.response("quote?limit=1000&page=3")
+        self.assertEqual(len(page["docs"]), 500)
+        self.assertDictEqual({key: page[key] for key in ["total", "limit", "offset", "page", "pages"]},
+                             {"total": 2500, "limit": 1000, "offset": 2000, "page": 3, "pages": 3})
+        self.assertEqual(corpus.response("quote?offset=10&limit=2")["docs"][0]["_id"], corpus.id("quote", 10))
+
+        movie = corpus.id("movie", 1)
+        quotes = corpus.response(f"movie/{movie}/quote?limit=5000")
+        self.assertTrue(0 < quotes["total"] < 2500)
+        self.assertTrue(all(quote["movie"] == movie for quote in quotes["docs"]))
+        self.assertEqual(corpus.response(f"quote?movie!={movie}")["total"], 2500 - quotes["total"])
+        self.assertEqual(corpus.response(f"quote/{corpus.id('quote', 0)}")["total"], 1)
+        self.assertEqual(corpus.response("quote/missing")["total"], 0)
+
+        self.assertTrue(matcher("runtimeInMinutes>=100&name=/ring/i")({"runtimeInMinutes": 100, "name": "The Ring"}))
+        self.assertFalse(matcher("runtimeInMinutes<100")({"runtimeInMinutes": 100}))
+        self.assertFalse(matcher("!name")({"name": "x"}))
+        self.assertEqual(corpus.response(f"quote?_id>={corpus.id('quote', 2490)}")["total"], 10)
+
+    def test_synthetic_api(self):
+        corpus = SyntheticCorpus(quotes=2345, movies=5)
+        api = SyntheticTheOneApi(corpus)
+        quotes = sdk.Quotes(api, sdk.RequestOptions(limit=1000)).fetch_all()
+        self.assertEqual(len(quotes.docs), 2345)
+        self.assertEqual(api.transfer_summary()["requests"], 3)
+        self.assertEqual(quotes.docs[7].dialog, corpus.document("quote", 7)["dialog"])
+        self.assertEqual(quotes.docs[7].movie.resolve().id, corpus.document("quote", 7)["movie"])
+        self.assertEqual(sdk.Movies(api).greater_than("runtimeInMinutes", 0).count(), 5)
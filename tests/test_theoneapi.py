@@ -1,15 +1,38 @@
 import time
 import unittest
+from unittest import mock
 from theoneapi import sdk
+from theoneapi.transport import RecordingTransport, ReplayTransport
 from decouple import config
 
 VALID_API_KEY = config("THEONEAPI_API_KEY")
 INVALID_API_KEY = "FOO"
 
+# With THEONEAPI_CASSETTE set to a cassette file, TestTheOneAPI replays the responses recorded in it instead of
+# calling the-one-api.dev, and doesn't wait out the rate limit between tests. With THEONEAPI_RECORD=True as well, the
+# tests call the API and record its responses into the cassette. The cassette only matches the api key it was
+# recorded with.
+CASSETTE = config("THEONEAPI_CASSETTE", default=None)
+RECORD = config("THEONEAPI_RECORD", default=False, cast=bool)
+
+
 class TestTheOneAPI(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        cls.transport = None
+        if CASSETTE is not None:
+            cls.transport = RECORD and RecordingTransport(CASSETTE) or ReplayTransport(CASSETTE)
+
+    def setUp(self):
+        if self.transport is not None:
+            patcher = mock.patch.object(sdk, "HttpTransport", lambda: self.transport)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
     def tearDown(self):
-        time.sleep(20)
+        if not isinstance(self.transport, ReplayTransport):
+            time.sleep(20)
 
     SORTED_MOVIE_NAMES = [
         "The Battle of the Five Armies",
@@ -531,4 +554,3 @@ class TestTheOneAPI(unittest.TestCase):
         quotes = sdk.Quotes(api).by_id("5cd96e05de30eff6ebcceb7d")
         self.assertEqual(len(quotes.docs), 1)
         self.assertListEqual([quote.dialog for quote in quotes.docs], ["'-bedin o gurth ne dagor."])
-
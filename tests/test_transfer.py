@@ -0,0 +1,76 @@
+import gzip
+import json
+import unittest
+import zlib
+from unittest import mock
+from theoneapi import sdk, transfer
+from theoneapi.transfer import accept_encoding, decode_body
+from tests.fake import FAKE_QUOTES, INVALID_API_KEY
+
+BODY = json.dumps({"docs": [{"_id": str(i), "dialog": "Deagol!"} for i in range(500)], "total": 500}).encode()
+
+
+def chunked(data: bytes, size: int = 100):
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+class TestDecodeBody(unittest.TestCase):
+
+    def decode(self, data: bytes, encoding: str) -> tuple:
+        stats = []
+        body = b"".join(decode_body(chunked(data), encoding, "quote", stats.append))
+        return body, stats[0]
+
+    def test_gzip(self):
+        compressed = gzip.compress(BODY)
+        body, stats = self.decode(compressed, "gzip")
+        self.assertEqual(body, BODY)
+        self.assertEqual((stats.url, stats.encoding), ("quote", "gzip"))
+        self.assertEqual((stats.compressed_bytes, stats.decompressed_bytes), (len(compressed), len(BODY)))
+        self.assertGreater(stats.ratio, 10)
+
+    def test_deflate(self):
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        for data in [zlib.compress(BODY), raw.compress(BODY) + raw.flush()]:
+            self.assertEqual(self.decode(data, "deflate")[0], BODY)
+
+    def test_identity_and_stacked_codings(self):
+        body, stats = self.decode(BODY, "")
+        self.assertEqual((body, stats.encoding, stats.ratio), (BODY, "identity", 1.0))
+        self.assertEqual(self.decode(gzip.compress(zlib.compress(BODY)), "deflate, gzip")[0], BODY)
+
+    def test_streams_incrementally(self):
+        chunks = iter(chunked(gzip.compress(BODY), 64))
+        first = next(decode_body(chunks, "gzip"))
+        self.assertTrue(BODY.startswith(first))
+        self.assertGreater(len(list(chunks)), 0)
+
+    def test_accept_encoding(self):
+        self.assertTrue(accept_encoding().endswith("gzip, deflate"))
+        self.assertEqual("br" in accept_encoding(), transfer.brotli is not None)
+        with self.assertRaises(ValueError):
+            list(decode_body([b"x"], "compress"))
+
+
+class TestCompressedTransfer(unittest.TestCase):
+
+    def test_compressed_transfer(self):
+        api = sdk.TheOneApi(INVALID_API_KEY)
+        body = json.dumps({"docs": FAKE_QUOTES, "total": 25, "limit": 1000, "offset": 0, "page": 1, "pages": 1})
+        compressed = gzip.compress(body.encode())
+        with mock.patch("theoneapi.sdk.requests.get") as get:
+            get.return_value.status_code = 200
+            get.return_value.headers = {"Content-Encoding": "gzip"}
+            get.return_value.raw.stream.side_effect = lambda *args, **kwargs: [compressed[:50], compressed[50:]]
+            self.assertEqual(len(api.quotes()["docs"]), 25)
+            self.assertEqual(len(list(api.stream("quote"))), 25)
+            self.assertIn("gzip", get.call_args.kwargs["headers"]["Accept-Encoding"])
+            get.return_value.raw.stream.assert_called_with(65536, decode_content=False)
+
+        self.assertEqual(api.transfers[-1].compressed_bytes, len(compressed))
+        self.assertDictEqual(api.transfer_summary(), {
+            "requests": 2,
+            "compressed_bytes": 2 * len(compressed),
+            "decompressed_bytes": 2 * len(body),
+            "ratio": len(body) / len(compressed),
+        })
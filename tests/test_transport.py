@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from theoneapi import sdk
+from theoneapi.server import StandInServer, fixed
+from theoneapi.synthetic import SyntheticCorpus
+from theoneapi.transport import CassetteMiss, RecordingTransport, ReplayTransport
+
+
+class TestTransport(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cassette = os.path.join(directory.name, "cassettes", "api.ndjson")
+
+    def test_record_and_replay(self):
+        with StandInServer(SyntheticCorpus(quotes=2100, movies=4), latency=fixed(0.02)) as server:
+            api = sdk.TheOneApi("secret key", base_url=server.url, transport=RecordingTransport(self.cassette))
+            recorded = sdk.Quotes(api, sdk.RequestOptions(limit=1000)).fetch_all()
+            missing = api.quote("5cd96e05ffffffffffffffff")
+            recorded_transfers = api.transfer_summary()
+
+        with open(self.cassette) as cassette:
+            interactions = [json.loads(line) for line in cassette]
+        self.assertEqual(len(interactions), 4)
+        self.assertNotIn("secret key", open(self.cassette).read())
+        self.assertEqual(interactions[0]["headers"]["Content-Encoding"], "gzip")
+        self.assertGreaterEqual(interactions[0]["ttfb"], 0.02)
+
+        # The server is gone, so everything has to come from the cassette.
+        api = sdk.TheOneApi("secret key", base_url=server.url, transport=ReplayTransport(self.cassette))
+        replayed = sdk.Quotes(api, sdk.RequestOptions(limit=1000)).fetch_all()
+        self.assertListEqual([quote.as_dict() for quote in replayed.docs], [quote.as_dict() for quote in recorded.docs])
+        self.assertDictEqual(api.quote("5cd96e05ffffffffffffffff"), missing)
+        self.assertDictEqual(api.transfer_summary(), recorded_transfers)
+
+        with self.assertRaises(CassetteMiss):
+            api.movies()
+        other = sdk.TheOneApi("other key", base_url=server.url, transport=ReplayTransport(self.cassette))
+        with self.assertRaises(CassetteMiss):
+            other.quote("5cd96e05ffffffffffffffff")
+        other.transport = ReplayTransport(self.cassette, match_authorization=False)
+        self.assertDictEqual(other.quote("5cd96e05ffffffffffffffff"), missing)
+
+    def test_replayed_latency(self):
+        with StandInServer(latency=fixed(0.1)) as server:
+            api = sdk.TheOneApi("key", base_url=server.url, transport=RecordingTransport(self.cassette))
+            api.movies()
+
+        for latency, check in [(False, self.assertLess), (True, self.assertGreater)]:
+            api = sdk.TheOneApi("key", base_url=server.url, transport=ReplayTransport(self.cassette, latency=latency))
+            started = time.perf_counter()
+            self.assertEqual(api.movies()["total"], 8)
+            check(time.perf_counter() - started, 0.09)
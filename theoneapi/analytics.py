@@ -0,0 +1,311 @@
+from typing import Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+Column = Union[str, "np.ndarray"]
+
+
+class MovieArrays:
+    """
+    Column oriented NumPy view of a list of Movie documents for vectorised analytics.
+
+    Each numeric movie field is stored as a contiguous float64 array (missing values are NaN), so
+    aggregates, ratios and comparisons run over whole columns instead of looping over Movie objects.
+
+    A simple example:
+    >>> arrays = sdk.Movies(api).fetch().to_arrays()
+    >>> profit = arrays.ratio("boxOfficeRevenueInMillions", "budgetInMillions")
+    >>> arrays.where(profit > 5).names
+
+    Attributes
+    ----------
+    FIELDS : list[str]
+        The numeric Movie fields that are turned into columns.
+    ids : np.ndarray
+        The movie ids, in the same order as the columns.
+    names : np.ndarray
+        The movie names, in the same order as the columns.
+    docs : np.ndarray
+        The Movie objects, in the same order as the columns.
+
+    Methods
+    -------
+    from_movies(movies: list[Movie]) -> MovieArrays
+        Builds the columns from a list of Movie objects.
+
+    column(field: str) -> np.ndarray
+        Returns the column for a field (also available as arrays[field]).
+
+    sum(field: str) -> float
+        Returns the sum of a column, ignoring missing values.
+
+    mean(field: str) -> float
+        Returns the mean of a column, ignoring missing values.
+
+    percentile(field: str, q: Union[float, list[float]]) -> Union[float, np.ndarray]
+        Returns the q-th percentile(s) of a column, ignoring missing values.
+
+    ratio(numerator: str, denominator: str) -> np.ndarray
+        Returns the element-wise ratio of two columns, with NaN where the denominator is 0 or missing.
+
+    top_k(column: Union[str, np.ndarray], k: int) -> MovieArrays
+        Returns the k movies with the largest values, largest first.
+
+    where(mask: np.ndarray) -> MovieArrays
+        Returns the movies selected by a boolean mask.
+
+    describe(field: str) -> dict
+        Returns summary statistics for a column.
+    """
+
+    FIELDS = [
+        "runtimeInMinutes",
+        "budgetInMillions",
+        "boxOfficeRevenueInMillions",
+        "academyAwardNominations",
+        "academyAwardWins",
+        "rottenTomatesScore",
+    ]
+
+    def __init__(self, ids: "np.ndarray", names: "np.ndarray", docs: "np.ndarray", columns: dict) -> None:
+        self.ids = ids
+        self.names = names
+        self.docs = docs
+        self._columns = columns
+
+    @classmethod
+    def from_movies(cls, movies: list) -> "MovieArrays":
+        """
+        Builds the columns from a list of Movie objects.
+
+        Parameters
+        ----------
+        movies : list[Movie]
+            The movies to build the columns from.
+
+        Returns
+        -------
+        MovieArrays
+            The column oriented view of the movies.
+        """
+
+        if np is None:
+            raise ImportError("NumPy is required for Movie analytics: pip install theoneapi[analytics]")
+
+        count = len(movies)
+        docs = np.empty(count, dtype=object)
+        docs[:] = movies
+        ids = np.array([getattr(movie, "id", None) for movie in movies], dtype=object)
+        names = np.array([getattr(movie, "name", None) for movie in movies], dtype=object)
+        columns = {}
+        for field in cls.FIELDS:
+            values = [getattr(movie, field, None) for movie in movies]
+            columns[field] = np.fromiter(
+                (value if isinstance(value, (int, float)) else np.nan for value in values),
+                dtype=np.float64,
+                count=count,
+            )
+        return cls(ids, names, docs, columns)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, field: str) -> "np.ndarray":
+        return self.column(field)
+
+    def column(self, field: str) -> "np.ndarray":
+        """
+        Returns the column for a field.
+
+        Parameters
+        ----------
+        field : str
+            One of the FIELDS.
+
+        Returns
+        -------
+        np.ndarray
+            The float64 column, with NaN for missing values.
+        """
+
+        if field not in self._columns:
+            raise KeyError(f"{field} is not a numeric Movie attribute.")
+
+        return self._columns[field]
+
+    def sum(self, field: str) -> float:
+        """
+        Returns the sum of a column, ignoring missing values.
+
+        Parameters
+        ----------
+        field : str
+            The field to sum.
+
+        Returns
+        -------
+        float
+            The sum of the column.
+        """
+
+        return float(np.nansum(self.column(field)))
+
+    def mean(self, field: str) -> float:
+        """
+        Returns the mean of a column, ignoring missing values.
+
+        Parameters
+        ----------
+        field : str
+            The field to average.
+
+        Returns
+        -------
+        float
+            The mean of the column, or NaN if it has no values.
+        """
+
+        column = self.column(field)
+        if np.isnan(column).all():
+            return float("nan")
+        return float(np.nanmean(column))
+
+    def percentile(self, field: str, q: Union[float, list]) -> Union[float, "np.ndarray"]:
+        """
+        Returns the q-th percentile(s) of a column, ignoring missing values.
+
+        Parameters
+        ----------
+        field : str
+            The field to use.
+        q : Union[float, list[float]]
+            The percentile (or list of percentiles) between 0 and 100.
+
+        Returns
+        -------
+        Union[float, np.ndarray]
+            The percentile value(s).
+        """
+
+        column = self.column(field)
+        column = column[~np.isnan(column)]
+        if len(column) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else float("nan")
+        result = np.percentile(column, q)
+        return result if np.ndim(result) else float(result)
+
+    def ratio(self, numerator: str, denominator: str) -> "np.ndarray":
+        """
+        Returns the element-wise ratio of two columns, e.g. revenue / budget.
+
+        Parameters
+        ----------
+        numerator : str
+            The field to divide.
+        denominator : str
+            The field to divide by.
+
+        Returns
+        -------
+        np.ndarray
+            The ratios, with NaN where the denominator is 0 or either value is missing.
+        """
+
+        top = self.column(numerator)
+        bottom = self.column(denominator)
+        result = np.full(len(self), np.nan)
+        np.divide(top, bottom, out=result, where=(bottom != 0) & ~np.isnan(bottom))
+        return result
+
+    def top_k(self, column: Column, k: int) -> "MovieArrays":
+        """
+        Returns the k movies with the largest values of a column, largest first.
+
+        Parameters
+        ----------
+        column : Union[str, np.ndarray]
+            A field name, or an array of values aligned with the movies (such as the result of ratio).
+        k : int
+            The number of movies to return.
+
+        Returns
+        -------
+        MovieArrays
+            The top k movies. Missing values are never selected.
+        """
+
+        values = self.column(column) if isinstance(column, str) else np.asarray(column, dtype=np.float64)
+        candidates = np.flatnonzero(~np.isnan(values))
+        k = min(k, len(candidates))
+        if k == 0:
+            return self._take(candidates[:0])
+
+        if k < len(candidates):
+            candidates = candidates[np.argpartition(-values[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-values[candidates], kind="stable")]
+        return self._take(order)
+
+    def where(self, mask: "np.ndarray") -> "MovieArrays":
+        """
+        Returns the movies selected by a boolean mask, e.g. arrays.where(arrays["academyAwardWins"] > 2).
+
+        Parameters
+        ----------
+        mask : np.ndarray
+            A boolean array aligned with the movies.
+
+        Returns
+        -------
+        MovieArrays
+            The selected movies.
+        """
+
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != (len(self),):
+            raise ValueError(f"mask must have shape ({len(self)},), got {mask.shape}")
+
+        return self._take(np.flatnonzero(mask))
+
+    def describe(self, field: str) -> dict:
+        """
+        Returns summary statistics for a column, ignoring missing values.
+
+        Parameters
+        ----------
+        field : str
+            The field to describe.
+
+        Returns
+        -------
+        dict
+            The count, sum, mean, min, p25, p50, p75 and max of the column.
+        """
+
+        column = self.column(field)
+        values = column[~np.isnan(column)]
+        if len(values) == 0:
+            return {"count": 0, "sum": 0.0, "mean": None, "min": None, "p25": None, "p50": None, "p75": None, "max": None}
+
+        p25, p50, p75 = np.percentile(values, [25, 50, 75])
+        return {
+            "count": int(len(values)),
+            "sum": float(values.sum()),
+            "mean": float(values.mean()),
+            "min": float(values.min()),
+            "p25": float(p25),
+            "p50": float(p50),
+            "p75": float(p75),
+            "max": float(values.max()),
+        }
+
+    def _take(self, indices: "np.ndarray") -> "MovieArrays":
+        return MovieArrays(
+            self.ids[indices],
+            self.names[indices],
+            self.docs[indices],
+            dict((field, np.ascontiguousarray(column[indices])) for (field, column) in self._columns.items()),
+        )
@@ -0,0 +1,509 @@
+import hashlib
+import math
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from typing import Callable, Hashable, Iterable, Iterator, Optional
+
+
+class IdentityMap:
+    """
+    Keeps at most one live object per document, keyed by kind and id, so a document which was fetched in a list
+    page can be returned by by_id without another request and is never hydrated into two different objects.
+
+    Entries are weak references: a document stays in the map only while something else (such as a Movies
+    or Quotes result) still holds it. An entry is fresh for ttl seconds after the document was last hydrated.
+
+    Attributes
+    ----------
+    ttl : float
+        The number of seconds an entry is considered fresh. None means entries never go stale.
+    maxsize : int
+        The maximum number of entries to keep, evicting the least recently used. None means no limit.
+
+    Methods
+    -------
+    get(kind: str, id: str, fresh: bool = True) -> Optional[TheOneApiDocBase]
+        Returns the live object for a document, if there is one (and it is fresh).
+
+    register(kind: str, doc: TheOneApiDocBase) -> TheOneApiDocBase
+        Adds a document to the map, returning the object that now represents it.
+
+    hydrate(cls: type, api: TheOneApi, data: dict) -> TheOneApiDocBase
+        Updates (or creates) the single object for the document in data.
+
+    discard(kind: str, id: str) -> None
+        Removes a document from the map.
+
+    clear() -> None
+        Removes every document from the map.
+    """
+
+    def __init__(self, ttl: float = 3600, maxsize: int = None) -> None:
+        """
+        Parameters
+        ----------
+        ttl : float, optional
+            The number of seconds an entry is considered fresh, by default 3600. None means forever.
+        maxsize : int, optional
+            The maximum number of entries to keep, by default None (no limit).
+        """
+
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._dead = deque()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge()
+            return len(self._entries)
+
+    def get(self, kind: str, id: str, fresh: bool = True) -> Optional[object]:
+        """
+        Returns the live object for a document, if there is one.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document, e.g. "movie".
+        id : str
+            The id of the document.
+        fresh : bool, optional
+            Whether to ignore entries older than ttl, by default True
+
+        Returns
+        -------
+        Optional[TheOneApiDocBase]
+            The object, or None if the document isn't in the map (or is stale).
+        """
+
+        with self._lock:
+            entry = self._entries.get((kind, id))
+            if entry is None:
+                return None
+
+            reference, hydrated_at = entry
+            doc = reference()
+            if doc is None:
+                return None
+            if fresh and self.ttl is not None and time.monotonic() - hydrated_at > self.ttl:
+                return None
+
+            self._entries.move_to_end((kind, id))
+            return doc
+
+    def register(self, kind: str, doc: object) -> object:
+        """
+        Adds a document to the map. If another live object already represents the same document, that object
+        is updated with the attributes of doc and returned instead.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document, e.g. "movie".
+        doc : TheOneApiDocBase
+            The document, which must have an id.
+
+        Returns
+        -------
+        TheOneApiDocBase
+            The object that represents the document.
+        """
+
+        with self._lock:
+            existing = self.get(kind, doc.id, fresh=False)
+            if existing is not None and existing is not doc:
+                existing.__dict__.update(doc.__dict__)
+                doc = existing
+            self._store(kind, doc)
+            return doc
+
+    def hydrate(self, cls: type, api: "TheOneApi", data: dict) -> object:
+        """
+        Updates the single object for the document in data (creating it if needed) and returns it.
+
+        Parameters
+        ----------
+        cls : type
+            The TheOneApiDocBase child class for the document. Its KIND is used as the kind.
+        api : TheOneApi
+            The TheOneApi object that was used to make the request.
+        data : dict
+            The document data returned by the API.
+
+        Returns
+        -------
+        TheOneApiDocBase
+            The object that represents the document.
+        """
+
+        id = data.get("_id")
+        if id is None:
+            return cls().from_dict(api, data)
+
+        with self._lock:
+            doc = self.get(cls.KIND, id, fresh=False)
+            if doc is None:
+                doc = cls()
+            doc.from_dict(api, data)
+            self._store(cls.KIND, doc)
+            return doc
+
+    def discard(self, kind: str, id: str) -> None:
+        """
+        Removes a document from the map.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document, e.g. "movie".
+        id : str
+            The id of the document.
+        """
+
+        with self._lock:
+            self._entries.pop((kind, id), None)
+
+    def clear(self) -> None:
+        """
+        Removes every document from the map.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, kind: str, doc: object) -> None:
+        self._purge()
+        key = (kind, doc.id)
+        entry = self._entries.get(key)
+        reference = entry is not None and entry[0]() is doc and entry[0] or weakref.ref(doc, self._remover(key))
+        self._entries[key] = (reference, time.monotonic())
+        self._entries.move_to_end(key)
+        while self.maxsize is not None and len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _remover(self, key: tuple):
+        # The callback can run from the garbage collector at any point, so it only queues the key
+        # and the entry is removed the next time the map is changed under the lock.
+        dead = self._dead
+
+        def remove(reference: weakref.ref) -> None:
+            dead.append((key, reference))
+
+        return remove
+
+    def _purge(self) -> None:
+        while self._dead:
+            key, reference = self._dead.popleft()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is reference:
+                del self._entries[key]
+
+
+class NegativeCache:
+    """
+    Remembers the ids which the API reported as not found, so repeated lookups of them are answered locally.
+
+    Attributes
+    ----------
+    ttl : float
+        The number of seconds a not found result is remembered.
+    maxsize : int
+        The maximum number of ids to remember, forgetting the oldest first.
+
+    Methods
+    -------
+    add(kind: str, id: str) -> None
+        Remembers that the document was not found.
+
+    discard(kind: str, id: str) -> None
+        Forgets a not found result.
+
+    clear() -> None
+        Forgets every not found result.
+    """
+
+    def __init__(self, ttl: float = 300, maxsize: int = 10000) -> None:
+        """
+        Parameters
+        ----------
+        ttl : float, optional
+            The number of seconds a not found result is remembered, by default 300
+        maxsize : int, optional
+            The maximum number of ids to remember, by default 10000
+        """
+
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            added_at = self._entries.get(key)
+            if added_at is None:
+                return False
+            if time.monotonic() - added_at > self.ttl:
+                del self._entries[key]
+                return False
+            return True
+
+    def add(self, kind: str, id: str) -> None:
+        """
+        Remembers that the document was not found.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document, e.g. "movie".
+        id : str
+            The id that was not found.
+        """
+
+        with self._lock:
+            self._entries[(kind, id)] = time.monotonic()
+            self._entries.move_to_end((kind, id))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, kind: str, id: str) -> None:
+        """
+        Forgets a not found result.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document, e.g. "movie".
+        id : str
+            The id to forget.
+        """
+
+        with self._lock:
+            self._entries.pop((kind, id), None)
+
+    def clear(self) -> None:
+        """
+        Forgets every not found result.
+        """
+
+        with self._lock:
+            self._entries.clear()
+
+
+class TTLCache:
+    """
+    A small thread-safe mapping whose entries expire ttl seconds after they were set, evicting the least recently
+    set entries beyond maxsize.
+
+    Attributes
+    ----------
+    ttl : float
+        The number of seconds an entry is kept.
+    maxsize : int
+        The maximum number of entries to keep, or the maximum total size of the values when weigh is given.
+
+    Methods
+    -------
+    get(key: Hashable, default: object = None) -> object
+        Returns the value for a key, or default if it is missing or has expired.
+
+    set(key: Hashable, value: object) -> None
+        Stores a value.
+
+    discard(key: Hashable) -> None
+        Removes a key.
+
+    clear() -> None
+        Removes every entry.
+    """
+
+    def __init__(self, ttl: float = 300, maxsize: int = 1000, weigh: Callable[[object], int] = None) -> None:
+        """
+        Parameters
+        ----------
+        ttl : float, optional
+            The number of seconds an entry is kept, by default 300
+        maxsize : int, optional
+            The maximum number of entries to keep, by default 1000
+        weigh : Callable[[object], int], optional
+            Returns the size of a value (e.g. its number of documents), in which case maxsize limits the total size
+            of the values rather than the number of entries, by default None
+        """
+
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._weigh = weigh
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, self) is not self
+
+    def get(self, key: Hashable, default: object = None) -> object:
+        """
+        Returns the value for a key, or default if it is missing or has expired.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key.
+        default : object, optional
+            The value returned for a missing key, by default None
+
+        Returns
+        -------
+        object
+            The value.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, set_at, _ = entry
+            if time.monotonic() - set_at > self.ttl:
+                self._remove(key)
+                return default
+            return value
+
+    def set(self, key: Hashable, value: object) -> None:
+        """
+        Stores a value, replacing any previous value for the key.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key.
+        value : object
+            The value.
+        """
+
+        size = self._weigh is None and 1 or self._weigh(value)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, time.monotonic(), size)
+            self._size += size
+            while self._entries and self._size > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, key: Hashable) -> None:
+        """
+        Removes a key.
+
+        Parameters
+        ----------
+        key : Hashable
+            The key.
+        """
+
+        with self._lock:
+            self._remove(key)
+
+    def clear(self) -> None:
+        """
+        Removes every entry.
+        """
+
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: Hashable) -> None:
+        # Called with the lock held.
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[2]
+
+
+class BloomFilter:
+    """
+    A compact probabilistic set of ids. Membership tests never give false negatives, so an id which is not in
+    the filter is certainly not one of the ids it was built from, and a lookup of it can be rejected locally.
+
+    Attributes
+    ----------
+    size : int
+        The number of bits in the filter.
+    hashes : int
+        The number of bits set per id.
+
+    Methods
+    -------
+    from_ids(ids: Iterable[str], error_rate: float = 0.001) -> BloomFilter
+        Builds a filter sized for the given ids.
+
+    add(id: str) -> None
+        Adds an id to the filter.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        """
+        Parameters
+        ----------
+        capacity : int
+            The number of ids the filter is sized for.
+        error_rate : float, optional
+            The false positive rate at capacity, by default 0.001
+        """
+
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    @classmethod
+    def from_ids(cls, ids: Iterable[str], error_rate: float = 0.001) -> "BloomFilter":
+        """
+        Builds a filter sized for the given ids.
+
+        Parameters
+        ----------
+        ids : Iterable[str]
+            Every id that exists.
+        error_rate : float, optional
+            The false positive rate, by default 0.001
+
+        Returns
+        -------
+        BloomFilter
+            The filter holding the ids.
+        """
+
+        ids = list(ids)
+        bloom = cls(len(ids), error_rate)
+        for id in ids:
+            bloom.add(id)
+        return bloom
+
+    def add(self, id: str) -> None:
+        """
+        Adds an id to the filter.
+
+        Parameters
+        ----------
+        id : str
+            The id to add.
+        """
+
+        for position in self._positions(id):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, id: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(id))
+
+    def _positions(self, id: str) -> Iterator[int]:
+        # Double hashing: the k positions are derived from two halves of a single digest.
+        digest = hashlib.blake2b(str(id).encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
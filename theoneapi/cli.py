@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+from typing import Optional
+from theoneapi import sdk
+from theoneapi.export import FORMATS, Exporter
+from theoneapi.middleware import RetryMiddleware
+
+
+def export(options: argparse.Namespace) -> int:
+    """
+    Runs theoneapi export: exports a collection to a file, resuming an interrupted export.
+
+    Parameters
+    ----------
+    options : argparse.Namespace
+        The parsed command line.
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+
+    api = sdk.TheOneApi(options.api_key, base_url=options.base_url, middleware=[RetryMiddleware(options.retries)])
+    collection = sdk.TheOneApi.COLLECTIONS[options.kind](
+        api, sdk.RequestOptions(limit=options.limit, sort=options.sort, filter=options.filter)
+    )
+    exporter = Exporter(collection, options.output, options.format, options.checkpoint)
+    state = not options.restart and exporter.state() or None
+    if state is not None:
+        print(f"Resuming after page {state['page']} of {state['pages']} ({state['docs']} docs)", file=sys.stderr)
+
+    result = exporter.run(options.restart)
+    print(f"Exported {result.docs} {options.kind} docs in {result.pages} pages to {result.path}", file=sys.stderr)
+    return 0
+
+
+def main(arguments: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(prog="theoneapi", description="Command line tools for The One API.")
+    parser.add_argument("--api-key", default=os.environ.get("THEONEAPI_API_KEY"),
+                        help="the api key, by default $THEONEAPI_API_KEY")
+    parser.add_argument("--base-url", help="the url of the API, e.g. a theoneapi-proxy or theoneapi-server")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    exporting = commands.add_parser("export", help="export a collection to NDJSON, CSV or Parquet, resumably")
+    exporting.add_argument("kind", choices=list(sdk.TheOneApi.COLLECTIONS))
+    exporting.add_argument("output", help="the output file (a directory for Parquet)")
+    exporting.add_argument("--format", choices=FORMATS, help="by default implied by the output's extension")
+    exporting.add_argument("--limit", type=int, default=Exporter.PAGE_SIZE, help="the documents per page")
+    exporting.add_argument("--sort", help='e.g. "+_id"')
+    exporting.add_argument("--filter", help='e.g. "character=5cd99d4bde30eff6ebccfe9e"')
+    exporting.add_argument("--checkpoint", help="the checkpoint file, by default OUTPUT.checkpoint")
+    exporting.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from page 1")
+    exporting.add_argument("--retries", type=int, default=3, help="retries of a failed request")
+    exporting.set_defaults(run=export)
+
+    options = parser.parse_args(arguments)
+    if not options.api_key:
+        parser.error("an api key is needed, with --api-key or THEONEAPI_API_KEY")
+    try:
+        status = options.run(options)
+    except (ValueError, ImportError, sdk.ApiError) as error:
+        parser.exit(1, f"theoneapi {options.command}: {error}\n")
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
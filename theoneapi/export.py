@@ -0,0 +1,295 @@
+import csv
+import io
+import json
+import os
+from typing import NamedTuple, Optional
+from theoneapi.analytics import MovieArrays
+from theoneapi.sdk import ApiError
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+FORMATS = ["ndjson", "csv", "parquet"]
+
+EXTENSIONS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".parquet": "parquet"}
+
+
+def export_format(path: str) -> str:
+    """
+    Returns the export format implied by the extension of an output path.
+
+    Parameters
+    ----------
+    path : str
+        The output path, e.g. "quotes.ndjson".
+
+    Returns
+    -------
+    str
+        One of FORMATS.
+    """
+
+    extension = os.path.splitext(path.rstrip("/"))[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Can't tell the format of {path!r}, expected one of {', '.join(FORMATS)}")
+    return EXTENSIONS[extension]
+
+
+def columns(doc_class: type) -> list[str]:
+    """
+    Returns the columns of an export of a document class, in the form the API sends them ("_id" first).
+
+    Parameters
+    ----------
+    doc_class : type
+        The document class, e.g. sdk.Quote.
+
+    Returns
+    -------
+    list[str]
+        The field names.
+    """
+
+    return ["_id"] + [field for field in doc_class.VALID_ATTRIBUTES if field != "id"]
+
+
+class ExportResult(NamedTuple):
+    """
+    The outcome of an export: where it went, how many pages and documents it holds, and the page it resumed after
+    (0 for a fresh export).
+    """
+
+    path: str
+    format: str
+    pages: int
+    docs: int
+    resumed_after: int
+
+
+class NdjsonWriter:
+    # One JSON document per line. The size of the file is the position to truncate back to when resuming.
+    def __init__(self, path: str, columns: list[str], offset: int) -> None:
+        self.path = path
+        self._file = open(path, offset and "r+b" or "wb")
+        self._file.truncate(offset)
+        self._file.seek(offset)
+
+    def write(self, records: list) -> None:
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8"))
+
+    def commit(self, page: int) -> int:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class CsvWriter(NdjsonWriter):
+    # One row per document under a header row, with the fields of the document class as the columns.
+    def __init__(self, path: str, columns: list[str], offset: int) -> None:
+        super().__init__(path, columns, offset)
+        self._columns = columns
+        if offset == 0:
+            self.write([dict(zip(columns, columns))])
+
+    def write(self, records: list) -> None:
+        text = io.StringIO(newline="")
+        csv.DictWriter(text, self._columns, extrasaction="ignore").writerows(records)
+        self._file.write(text.getvalue().encode("utf-8"))
+
+
+class ParquetWriter:
+    # A directory of Parquet files, one per page, which pyarrow.dataset (or pandas) reads as one table. Each file is
+    # written under a temporary name and renamed once complete, so an interrupted export never leaves half a file.
+    def __init__(self, path: str, columns: list[str], offset: int) -> None:
+        if pa is None:
+            raise ImportError("Exporting to Parquet needs pyarrow, e.g. pip install theoneapi[export]")
+        self.path = path
+        self._schema = pa.schema(
+            [(column, column in MovieArrays.FIELDS and pa.float64() or pa.string()) for column in columns]
+        )
+        self._table = None
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith("part-") and (name.endswith(".tmp") or self._page(name) > offset):
+                os.remove(os.path.join(path, name))
+
+    def write(self, records: list) -> None:
+        rows = [{name: self._value(record.get(name), self._schema.field(name).type) for name in self._schema.names}
+                for record in records]
+        self._table = pa.Table.from_pylist(rows, schema=self._schema)
+
+    def commit(self, page: int) -> int:
+        if self._table is not None:
+            name = os.path.join(self.path, f"part-{page:06d}.parquet")
+            pq.write_table(self._table, name + ".tmp")
+            os.replace(name + ".tmp", name)
+            self._table = None
+        return page
+
+    def close(self) -> None:
+        pass
+
+    def _page(self, name: str) -> int:
+        return int(name[5:].split(".")[0])
+
+    def _value(self, value: object, type: "pa.DataType") -> object:
+        if value is None or type != pa.string() or isinstance(value, str):
+            return value
+        return json.dumps(value)
+
+
+WRITERS = {"ndjson": NdjsonWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+class Exporter:
+    """
+    Exports every document of a collection (e.g. Movies or Quotes, with its filter and sort) to NDJSON, CSV or
+    Parquet, a page at a time, and can resume an interrupted export where it stopped.
+
+    The pages are requested with the same page by page loop as iter_docs, but written as the raw documents the API
+    sends, decoded with a DocStream as they arrive, so memory use is bounded by one page whatever the size of the
+    collection. After each page has been written and flushed, a checkpoint file records the last complete page and
+    the size of the output. An export started again with the same collection and query truncates the output back to
+    the checkpoint (dropping a half written page) and carries on with the next page, so no quota is spent on the
+    pages already exported. The checkpoint is removed once the export is complete. A page the API answers with an
+    error (e.g. a 429 once the quota is used up) raises ApiError and keeps the checkpoint, so the export can be run
+    again later to resume.
+
+    Parquet exports are a directory of part-NNNNNN.parquet files, one per page, with "_id" and the other fields as
+    string columns (the numeric movie fields as float64). They need pyarrow.
+
+    A simple example:
+    >>> Exporter(Quotes(api, RequestOptions(limit=1000, sort="+_id")), "quotes.ndjson").run()
+
+    Or from the command line (see theoneapi.cli):
+    $ theoneapi export quote quotes.ndjson --limit 1000
+
+    Attributes
+    ----------
+    collection : TheOneApiBase
+        The collection exported, whose options give the page size, filter and sort.
+    path : str
+        The output file, or directory for Parquet.
+    format : str
+        "ndjson", "csv" or "parquet".
+    checkpoint : str
+        The checkpoint file, by default the output path with ".checkpoint" appended.
+
+    Methods
+    -------
+    run(restart: bool = False) -> ExportResult
+        Exports the collection, resuming from the checkpoint if there is one.
+
+    state() -> Optional[dict]
+        Returns the checkpoint of an interrupted export, or None.
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(
+        self, collection: "TheOneApiBase", path: str, format: str = None, checkpoint: str = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+        collection : TheOneApiBase
+            The collection to export. Without a limit in its options, pages of PAGE_SIZE documents are requested.
+        path : str
+            The output file, or directory for Parquet.
+        format : str, optional
+            "ndjson", "csv" or "parquet", by default implied by the extension of path.
+        checkpoint : str, optional
+            The checkpoint file, by default path + ".checkpoint"
+        """
+
+        if format is not None and format not in FORMATS:
+            raise ValueError(f"Unknown export format {format!r}, expected one of {', '.join(FORMATS)}")
+        self.collection = collection
+        self.path = path
+        self.format = format or export_format(path)
+        self.checkpoint = checkpoint or path.rstrip("/") + ".checkpoint"
+
+    def state(self) -> Optional[dict]:
+        """
+        Returns the checkpoint of an interrupted export.
+
+        Returns
+        -------
+        Optional[dict]
+            The query, the last complete page, the pages and documents so far and the output offset, or None when
+            there is no checkpoint.
+        """
+
+        if not os.path.exists(self.checkpoint):
+            return None
+        with open(self.checkpoint, encoding="utf-8") as checkpoint:
+            return json.load(checkpoint)
+
+    def run(self, restart: bool = False) -> ExportResult:
+        """
+        Exports every page of the collection, resuming after the last checkpointed page unless restart is True.
+
+        Parameters
+        ----------
+        restart : bool, optional
+            Whether to ignore the checkpoint and export from the first page, by default False
+
+        Returns
+        -------
+        ExportResult
+            The output, the number of pages and documents exported and the page it resumed after.
+        """
+
+        options = self.collection.options
+        if options.offset is not None:
+            raise ValueError("An export pages through the whole collection, so it can't start at an offset.")
+        options = options.replace(limit=options.limit or self.PAGE_SIZE)
+        query = options.replace(page=None).freeze().query_string
+        kind = self.collection.DOC_CLASS.__name__.lower()
+
+        state = not restart and self.state() or None
+        if state is not None and (state["kind"], state["format"], state["query"]) != (kind, self.format, query):
+            raise ValueError(
+                f"{self.checkpoint} belongs to an export of {state['kind']} ?{state['query']} as {state['format']}; "
+                "restart the export to replace it."
+            )
+        state = state or {"kind": kind, "format": self.format, "query": query, "page": 0, "pages": None, "docs": 0,
+                          "offset": 0}
+        resumed_after = state["page"]
+
+        writer = WRITERS[self.format](self.path, columns(self.collection.DOC_CLASS), state["offset"])
+        try:
+            page = state["page"]
+            while state["pages"] is None or page < state["pages"]:
+                page += 1
+                stream = self.collection.stream_request(options.replace(page=page))
+                records = list(stream)
+                if stream.metadata.get("total") is None or stream.metadata.get("pages") is None:
+                    message = stream.metadata.get("message") or "no documents"
+                    raise ApiError(f"Page {page} of the export failed: {message}; run it again to resume.")
+                writer.write(records)
+                self.collection.set_metadata(stream.metadata)
+                pages = self.collection.metadata["pages"]
+                state = dict(state, page=page, pages=pages or page, docs=state["docs"] + len(records),
+                             offset=writer.commit(page))
+                self._save(state)
+                if len(records) == 0 or pages is None:
+                    break
+        finally:
+            writer.close()
+
+        os.remove(self.checkpoint)
+        return ExportResult(self.path, self.format, state["page"], state["docs"], resumed_after)
+
+    def _save(self, state: dict) -> None:
+        # Written to a temporary file and renamed, so a checkpoint is never half written.
+        with open(self.checkpoint + ".tmp", "w", encoding="utf-8") as checkpoint:
+            json.dump(state, checkpoint)
+        os.replace(self.checkpoint + ".tmp", self.checkpoint)
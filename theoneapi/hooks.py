@@ -0,0 +1,252 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Optional
+
+PHASES = ["queue", "ttfb", "download", "decode", "hydrate"]
+
+
+def url_template(path: str) -> str:
+    """
+    Returns the template of a request path, with the ids replaced, e.g. "movie/{id}/quote".
+
+    Parameters
+    ----------
+    path : str
+        The path relative to the API's base url, optionally with a query string.
+
+    Returns
+    -------
+    str
+        The template, which is safe to use as a metric label.
+    """
+
+    parts = path.split("?")[0].split("/")
+    return "/".join(number % 2 == 1 and "{id}" or part for (number, part) in enumerate(parts))
+
+
+@dataclass
+class RequestEvent:
+    """
+    What happened during one TheOneApi request, passed to the Hooks.
+
+    Attributes
+    ----------
+    url : str
+        The full url of the request.
+    template : str
+        The url template, e.g. "quote/{id}".
+    status : int
+        The HTTP status, or None if no response was received.
+    cache : str
+        "miss" when the API answered, "hit" when the request was answered locally (e.g. a remembered not found id
+        or a CacheMiddleware) and "fallback" when a stale response or the snapshot answered for a failing API.
+    retries : int
+        The number of times the request was retried.
+    compressed_bytes : int
+        The size of the body on the wire.
+    decompressed_bytes : int
+        The size of the body after decompression.
+    documents : int
+        The number of documents hydrated from the response.
+    phases : dict[str, float]
+        The seconds spent in each phase: queue (before the request was sent, including any rate limiting and
+        retry back off), ttfb (sending the request, including any connection set up, until the headers arrived),
+        download (reading and decompressing the body), decode (parsing the JSON) and hydrate (turning documents into
+        objects). Phases that didn't happen are missing.
+    error : str
+        The exception raised by the request, if any.
+    """
+
+    url: str
+    template: str
+    status: Optional[int] = None
+    cache: str = "miss"
+    retries: int = 0
+    compressed_bytes: int = 0
+    decompressed_bytes: int = 0
+    documents: int = 0
+    phases: dict = field(default_factory=dict)
+    error: Optional[str] = None
+    started: float = field(default_factory=time.perf_counter, repr=False, compare=False)
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.phases.values())
+
+
+class Hooks:
+    """
+    Receives the RequestEvent of every TheOneApi request. The methods do nothing; override the ones you need and
+    pass an instance as TheOneApi(hooks=...). Without hooks no events are created at all.
+
+    Methods
+    -------
+    request_finished(event: RequestEvent) -> None
+        Called once the response has been read and decoded (or the request failed).
+
+    hydrated(event: RequestEvent) -> None
+        Called once the documents of the response have been turned into objects by a collection.
+    """
+
+    def request_finished(self, event: RequestEvent) -> None:
+        pass
+
+    def hydrated(self, event: RequestEvent) -> None:
+        pass
+
+
+class MultiHooks(Hooks):
+    """
+    Passes every event to each of several Hooks, e.g. MultiHooks(LoggingHooks(), PrometheusHooks()).
+    """
+
+    def __init__(self, *hooks: Hooks) -> None:
+        self.hooks = list(hooks)
+
+    def request_finished(self, event: RequestEvent) -> None:
+        for hooks in self.hooks:
+            hooks.request_finished(event)
+
+    def hydrated(self, event: RequestEvent) -> None:
+        for hooks in self.hooks:
+            hooks.hydrated(event)
+
+
+class LoggingHooks(Hooks):
+    """
+    Logs one line per request (and one per hydration at DEBUG level), e.g.
+    "GET quote 200 cache=miss retries=0 bytes=8211/51230 queue=0.0ms ttfb=182.3ms download=12.0ms decode=1.9ms".
+
+    Attributes
+    ----------
+    logger : logging.Logger
+        The logger to use, by default the "theoneapi" logger.
+    level : int
+        The level of the request lines, by default logging.INFO. Failed requests are logged at WARNING.
+    """
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.INFO) -> None:
+        self.logger = logger or logging.getLogger("theoneapi")
+        self.level = level
+
+    def request_finished(self, event: RequestEvent) -> None:
+        level = event.error is not None and logging.WARNING or self.level
+        if not self.logger.isEnabledFor(level):
+            return
+        phases = " ".join(f"{phase}={event.phases[phase] * 1000:.1f}ms" for phase in PHASES if phase in event.phases)
+        self.logger.log(
+            level,
+            "GET %s %s cache=%s retries=%d bytes=%d/%d %s%s",
+            event.template,
+            event.status,
+            event.cache,
+            event.retries,
+            event.compressed_bytes,
+            event.decompressed_bytes,
+            phases,
+            event.error is not None and f" error={event.error}" or "",
+        )
+
+    def hydrated(self, event: RequestEvent) -> None:
+        self.logger.debug(
+            "hydrated %d documents from %s in %.1fms", event.documents, event.template, event.phases["hydrate"] * 1000
+        )
+
+
+class PrometheusHooks(Hooks):
+    """
+    Aggregates the events into Prometheus style metrics and renders them in the text exposition format, for serving
+    from a /metrics endpoint.
+
+    Metrics
+    -------
+    theoneapi_requests_total{template, status, cache}
+    theoneapi_retries_total{template}
+    theoneapi_bytes_total{template, encoding="compressed"|"decompressed"}
+    theoneapi_documents_total{template}
+    theoneapi_phase_seconds{template, phase} (histogram)
+
+    Methods
+    -------
+    render() -> str
+        Returns the metrics in the Prometheus text format.
+    """
+
+    BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+    def __init__(self, prefix: str = "theoneapi") -> None:
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def request_finished(self, event: RequestEvent) -> None:
+        with self._lock:
+            self._increment("requests_total", (("template", event.template), ("status", str(event.status)),
+                                                ("cache", event.cache)))
+            self._increment("retries_total", (("template", event.template),), event.retries)
+            self._increment("bytes_total", (("template", event.template), ("encoding", "compressed")),
+                            event.compressed_bytes)
+            self._increment("bytes_total", (("template", event.template), ("encoding", "decompressed")),
+                            event.decompressed_bytes)
+            for phase in PHASES:
+                if phase in event.phases and phase != "hydrate":
+                    self._observe(event.template, phase, event.phases[phase])
+
+    def hydrated(self, event: RequestEvent) -> None:
+        with self._lock:
+            self._increment("documents_total", (("template", event.template),), event.documents)
+            self._observe(event.template, "hydrate", event.phases["hydrate"])
+
+    def render(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+
+        Returns
+        -------
+        str
+            The metrics.
+        """
+
+        lines = []
+        with self._lock:
+            for name in sorted(set(name for (name, _) in self._counters)):
+                lines.append(f"# TYPE {self.prefix}_{name} counter")
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f"{self.prefix}_{name}{self._labels(labels)} {value:g}")
+
+            if self._histograms:
+                name = f"{self.prefix}_phase_seconds"
+                lines.append(f"# TYPE {name} histogram")
+            for labels, (counts, total, count) in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket in zip(self.BUCKETS, counts):
+                    cumulative += bucket
+                    lines.append(f"{name}_bucket{self._labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{self._labels(labels + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{self._labels(labels)} {total:g}")
+                lines.append(f"{name}_count{self._labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def _increment(self, name: str, labels: tuple, amount: float = 1) -> None:
+        self._counters[(name, labels)] = self._counters.get((name, labels), 0) + amount
+
+    def _observe(self, template: str, phase: str, seconds: float) -> None:
+        labels = (("template", template), ("phase", phase))
+        counts, total, count = self._histograms.get(labels) or ([0] * len(self.BUCKETS), 0.0, 0)
+        position = bisect_left(self.BUCKETS, seconds)
+        if position < len(counts):
+            counts[position] += 1
+        self._histograms[labels] = (counts, total + seconds, count + 1)
+
+    def _labels(self, labels: tuple) -> str:
+        escaped = (f'{key}="{_escape(value)}"' for (key, value) in labels)
+        return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
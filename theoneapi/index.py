@@ -0,0 +1,322 @@
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from typing import Iterable, NamedTuple
+
+
+class NameMatch(NamedTuple):
+    """
+    A single ranked result returned by NameIndex.resolve.
+
+    Attributes
+    ----------
+    score : float
+        How closely the name matched the query, from 0.0 to 1.0.
+    name : str
+        The name as it was added to the index.
+    id : str
+        The id of the document the name belongs to.
+    """
+
+    score: float
+    name: str
+    id: str
+
+
+def normalise(text: str) -> str:
+    """
+    Returns a lowercase, accent free version of the text with punctuation collapsed to single spaces.
+
+    Parameters
+    ----------
+    text : str
+        The text to normalise.
+
+    Returns
+    -------
+    str
+        The normalised text.
+    """
+
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.split(r"[^0-9a-z]+", text.lower())).strip()
+
+
+def trigrams(text: str) -> set:
+    """
+    Returns the set of word-padded trigrams for some normalised text.
+
+    Each word is padded with two leading spaces and one trailing space, so that short prefixes
+    typed into an autocomplete box still share trigrams with the words they start.
+
+    Parameters
+    ----------
+    text : str
+        Normalised text to split into trigrams.
+
+    Returns
+    -------
+    set[str]
+        The trigrams found in the text.
+    """
+
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def edit_distance(a: str, b: str, limit: int = None) -> int:
+    """
+    Returns the Levenshtein distance between two strings.
+
+    Parameters
+    ----------
+    a : str
+        The first string.
+    b : str
+        The second string.
+    limit : int, optional
+        Stop early and return limit + 1 once the distance is known to exceed limit, by default None
+
+    Returns
+    -------
+    int
+        The number of single character edits needed to turn a into b.
+    """
+
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class NameIndex:
+    """
+    An in-memory index for turning human entered names into document ids without calling the API.
+
+    Names are grouped by kind (e.g. "movie" or "character"). Each name is normalised and broken into
+    trigrams which are kept in an inverted index, so a lookup only scores the handful of names that share
+    at least one trigram with the query. Word-start prefixes are also kept in a sorted list so that
+    autocomplete style lookups are answered with a binary search.
+
+    Attributes
+    ----------
+    CANDIDATE_LIMIT : int
+        The number of trigram candidates that are re-scored using edit distance.
+
+    Methods
+    -------
+    add(kind: str, name: str, id: str) -> NameIndex
+        Adds (or renames) a document in the index.
+
+    add_all(kind: str, entries: Iterable[tuple[str, str]]) -> NameIndex
+        Adds a list of (name, id) pairs to the index.
+
+    resolve(kind: str, query: str, limit: int = 5, min_score: float = 0.3) -> list[NameMatch]
+        Returns the best matches for the query, best first.
+    """
+
+    CANDIDATE_LIMIT = 10
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._names = {}
+        self._grams = {}
+        self._prefixes = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(names) for names in self._names.values())
+
+    def __contains__(self, key: tuple) -> bool:
+        kind, id = key
+        return id in self._names.get(kind, {})
+
+    def add(self, kind: str, name: str, id: str) -> "NameIndex":
+        """
+        Adds a document name to the index, replacing any name previously stored for the same id.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document the name belongs to, e.g. "movie".
+        name : str
+            The human readable name.
+        id : str
+            The id of the document.
+
+        Returns
+        -------
+        NameIndex
+            The object for chaining.
+        """
+
+        if name is None or id is None:
+            return self
+
+        with self._lock:
+            names = self._names.setdefault(kind, {})
+            grams = self._grams.setdefault(kind, {})
+            prefixes = self._prefixes.setdefault(kind, [])
+            if id in names:
+                if names[id][0] == name:
+                    return self
+                for gram in names[id][2]:
+                    grams[gram].discard(id)
+                for suffix in self._word_suffixes(names[id][1]):
+                    prefixes.remove((suffix, id))
+
+            normalised = normalise(name)
+            entry_grams = trigrams(normalised)
+            names[id] = (name, normalised, entry_grams)
+            for gram in entry_grams:
+                grams.setdefault(gram, set()).add(id)
+            for suffix in self._word_suffixes(normalised):
+                bisect.insort(prefixes, (suffix, id))
+
+        return self
+
+    def add_all(self, kind: str, entries: Iterable[tuple]) -> "NameIndex":
+        """
+        Adds a list of (name, id) pairs to the index.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document the names belong to.
+        entries : Iterable[tuple[str, str]]
+            The (name, id) pairs to add.
+
+        Returns
+        -------
+        NameIndex
+            The object for chaining.
+        """
+
+        for name, id in entries:
+            self.add(kind, name, id)
+        return self
+
+    def resolve(self, kind: str, query: str, limit: int = 5, min_score: float = 0.3) -> list[NameMatch]:
+        """
+        Returns the names of the given kind which best match the query, best first.
+
+        Exact matches score 1.0, names containing a word starting with the query (autocomplete) score
+        0.9 or more, and everything else is scored using trigram overlap refined with per-word edit distance
+        so that small typos ("felowship") still resolve. The lookup holds the index's lock, so it never sees a
+        name which is half added by a concurrent fetch.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document to search, e.g. "movie".
+        query : str
+            The text entered by the user.
+        limit : int, optional
+            The maximum number of matches to return, by default 5
+        min_score : float, optional
+            Matches scoring below this are dropped, by default 0.3
+
+        Returns
+        -------
+        list[NameMatch]
+            The ranked matches.
+        """
+
+        normalised = normalise(query)
+        with self._lock:
+            return self._resolve(kind, normalised, limit, min_score)
+
+    def _resolve(self, kind: str, normalised: str, limit: int, min_score: float) -> list[NameMatch]:
+        names = self._names.get(kind, {})
+        if not normalised or not names:
+            return []
+
+        prefixed = self._prefixed(kind, normalised, limit)
+        if len(prefixed) >= limit:
+            return prefixed
+
+        grams = self._grams.get(kind, {})
+        query_grams = trigrams(normalised)
+        postings = sorted((grams.get(gram, ()) for gram in query_grams), key=len)
+        # Trigrams shared by most names say little about which name was meant, so only the
+        # selective ones are used to pick candidates (unless nothing else matches).
+        common = max(self.CANDIDATE_LIMIT, len(names) // 4)
+        shared = {}
+        for posting in postings:
+            if len(posting) > common and shared:
+                break
+            for id in posting:
+                shared[id] = shared.get(id, 0) + 1
+
+        candidates = heapq.nlargest(self.CANDIDATE_LIMIT, shared.items(), key=lambda item: item[1])
+        query_words = normalised.split()
+        matches = []
+        for id, _ in candidates:
+            name, entry, entry_grams = names[id]
+            count = len(query_grams & entry_grams)
+            score = self._score(normalised, query_words, query_grams, entry, entry_grams, count)
+            if score >= min_score:
+                matches.append(NameMatch(round(score, 4), name, id))
+
+        matches.sort(key=lambda match: (-match.score, match.name))
+        return matches[:limit]
+
+    def _prefixed(self, kind: str, normalised: str, limit: int) -> list[NameMatch]:
+        names = self._names[kind]
+        prefixes = self._prefixes[kind]
+        scores = {}
+        i = bisect.bisect_left(prefixes, (normalised, ""))
+        while i < len(prefixes) and prefixes[i][0].startswith(normalised):
+            id = prefixes[i][1]
+            entry = names[id][1]
+            scores[id] = entry == normalised and 1.0 or 0.9 + 0.1 * len(normalised) / len(entry)
+            i += 1
+
+        matches = [NameMatch(round(score, 4), names[id][0], id) for id, score in scores.items()]
+        matches.sort(key=lambda match: (-match.score, match.name))
+        return matches[:limit]
+
+    @staticmethod
+    def _word_suffixes(normalised: str) -> list[str]:
+        return [normalised[m.start():] for m in re.finditer(r"\S+", normalised)]
+
+    @staticmethod
+    def _score(query: str, query_words: list, query_grams: set, entry: str, entry_grams: set, shared: int) -> float:
+        if query == entry:
+            return 1.0
+
+        entry_words = entry.split()
+        padded = f" {entry}"
+        if padded.find(f" {query}") >= 0:
+            return 0.9 + 0.1 * len(query) / len(entry)
+        if query in entry:
+            return 0.8 + 0.1 * len(query) / len(entry)
+
+        dice = 2.0 * shared / (len(query_grams) + len(entry_grams))
+        word_scores = []
+        for word in query_words:
+            best = 0.0
+            for candidate in entry_words:
+                allowed = max(1, len(word) // 3)
+                distance = edit_distance(word, candidate[: len(word) + allowed], allowed)
+                if distance <= allowed:
+                    best = max(best, 1.0 - distance / max(len(word), 1))
+            word_scores.append(best)
+        fuzzy = sum(word_scores) / len(word_scores)
+        return 0.8 * max(dice, fuzzy)
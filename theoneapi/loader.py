@@ -0,0 +1,250 @@
+import threading
+import weakref
+from typing import Callable, Iterable, Optional
+
+
+class LazyReference(str):
+    """
+    The id of a related document (e.g. Quote.movie) which can be resolved into the document on demand.
+
+    A LazyReference is a str, so it compares, hashes and serialises exactly like the bare id it replaces.
+    Resolving goes through a BatchLoader, so resolving the references of a whole page of documents costs
+    one batched request rather than one request per reference.
+
+    Attributes
+    ----------
+    id : str
+        The id of the referenced document.
+
+    Methods
+    -------
+    resolve() -> Optional[TheOneApiDocBase]
+        Returns the referenced document, loading it (and every other pending reference) if needed.
+    """
+
+    def __new__(cls, id: str, loader: "BatchLoader", slot: "_Slot" = None) -> "LazyReference":
+        reference = super().__new__(cls, id)
+        reference._loader = loader
+        reference._slot = slot
+        return reference
+
+    def __reduce__(self) -> tuple:
+        return (str, (str(self),))
+
+    @property
+    def id(self) -> str:
+        return str(self)
+
+    def resolve(self) -> Optional[object]:
+        """
+        Returns the referenced document, loading it (and every other pending reference) if needed.
+
+        Returns
+        -------
+        Optional[TheOneApiDocBase]
+            The referenced document, or None if the API does not know the id.
+        """
+
+        return self._loader.load(str(self))
+
+
+class _Slot:
+    # Holds the document loaded for an id. The references to the id share the slot and the loader only keeps a weak
+    # reference to it, so a document loaded in a batch lives exactly as long as the references which may resolve it.
+    __slots__ = ("doc", "__weakref__")
+
+    def __init__(self) -> None:
+        self.doc = None
+
+
+class BatchLoader:
+    """
+    Collects the ids of related documents as they are seen and loads them in batches, DataLoader style.
+
+    Every reference created by the loader queues its id. When one of them is resolved, its id is loaded together
+    with the ids queued since the last batch (up to BATCH_SIZE of them, oldest first) in a single request. A loaded
+    document is kept by the references to it rather than by the loader, and ids the API does not know are
+    remembered in the not found cache (when one is given) so that they expire with it.
+
+    Attributes
+    ----------
+    BATCH_SIZE : int
+        The maximum number of ids loaded by a single request.
+
+    Methods
+    -------
+    reference(id: str) -> LazyReference
+        Returns a lazy reference to the document and queues its id for the next batch.
+
+    load(id: str) -> Optional[TheOneApiDocBase]
+        Returns the document with the given id, loading it (and the queued ids) if it is not known yet.
+
+    load_many(ids: Iterable[str]) -> dict
+        Returns the documents for all of the given ids, loading the unknown ones in batches.
+
+    prime(doc: TheOneApiDocBase) -> None
+        Stores an already fetched document so that it doesn't need to be loaded.
+    """
+
+    BATCH_SIZE = 100
+
+    def __init__(
+        self,
+        fetch_many: Callable[[list], list],
+        batch_size: int = None,
+        lookup: Callable[[str], Optional[object]] = None,
+        kind: str = None,
+        not_found: object = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        fetch_many : Callable[[list[str]], list[TheOneApiDocBase]]
+            Loads the documents for a list of ids (with a single request), raising if the request fails so that the
+            ids stay pending rather than being taken to be unknown.
+        batch_size : int, optional
+            The maximum number of ids passed to fetch_many at once, by default BATCH_SIZE
+        lookup : Callable[[str], Optional[TheOneApiDocBase]], optional
+            Returns an already fetched document (e.g. from an identity map) so that it doesn't need to be loaded.
+        kind : str, optional
+            The kind of document loaded, e.g. "movie", used as the key in not_found.
+        not_found : NegativeCache, optional
+            Remembers the ids the API does not know, so that they aren't loaded again until they expire.
+        """
+
+        self._fetch_many = fetch_many
+        self._lookup = lookup
+        self._batch_size = batch_size or self.BATCH_SIZE
+        self._kind = kind
+        self._not_found = not_found
+        self._lock = threading.Lock()
+        self._slots = weakref.WeakValueDictionary()
+        self._pending = {}
+
+    def reference(self, id: str) -> LazyReference:
+        """
+        Returns a lazy reference to the document and queues its id for the next batch.
+
+        Parameters
+        ----------
+        id : str
+            The id of the document.
+
+        Returns
+        -------
+        LazyReference
+            The reference, which is also a str equal to id.
+        """
+
+        with self._lock:
+            slot = self._slots.get(id)
+            if slot is None:
+                slot = self._slots[id] = _Slot()
+            if slot.doc is None:
+                self._pending[id] = None
+        return LazyReference(id, self, slot)
+
+    def prime(self, doc: object) -> None:
+        """
+        Stores an already fetched document so that it doesn't need to be loaded.
+
+        Parameters
+        ----------
+        doc : TheOneApiDocBase
+            The document, which must have an id.
+        """
+
+        with self._lock:
+            slot = self._slots.get(doc.id)
+            if slot is not None:
+                slot.doc = doc
+            self._pending.pop(doc.id, None)
+
+    def load(self, id: str) -> Optional[object]:
+        """
+        Returns the document with the given id, loading it (and the queued ids) if it is not known yet.
+
+        Parameters
+        ----------
+        id : str
+            The id of the document.
+
+        Returns
+        -------
+        Optional[TheOneApiDocBase]
+            The document, or None if the API does not know the id.
+        """
+
+        return self.load_many([id])[id]
+
+    def load_many(self, ids: Iterable[str]) -> dict:
+        """
+        Returns the documents for all of the given ids, loading the unknown ones (and the ids queued since the last
+        batch) in batches.
+
+        Parameters
+        ----------
+        ids : Iterable[str]
+            The ids of the documents.
+
+        Returns
+        -------
+        dict
+            The documents keyed by id, with None for ids the API does not know.
+        """
+
+        ids = [str(id) for id in ids]
+        found = {}
+        with self._lock:
+            wanted = []
+            for id in ids:
+                if id in found or id in wanted:
+                    continue
+                doc = self._known(id)
+                if doc is not None or self._missing(id):
+                    found[id] = doc
+                else:
+                    wanted.append(id)
+
+            batch = list(wanted)
+            for id in self._pending:
+                if len(batch) >= self._batch_size:
+                    break
+                if id not in found and id not in wanted and id in self._slots:
+                    if self._known(id) is None and not self._missing(id):
+                        batch.append(id)
+            self._pending = {}
+
+        # The requests are made without the lock, so other threads can queue (and resolve) references meanwhile.
+        for start in range(0, len(batch), self._batch_size):
+            chunk = batch[start:start + self._batch_size]
+            try:
+                loaded = dict((doc.id, doc) for doc in self._fetch_many(chunk))
+            except Exception:
+                # Queue whatever wasn't loaded again so that the next resolution retries it.
+                with self._lock:
+                    self._pending.update((id, None) for id in batch[start:] if id in self._slots)
+                raise
+
+            with self._lock:
+                for id in chunk:
+                    doc = loaded.get(id)
+                    if doc is None and self._not_found is not None:
+                        self._not_found.add(self._kind, id)
+                    slot = self._slots.get(id)
+                    if slot is not None:
+                        slot.doc = doc
+                    if id in wanted:
+                        found[id] = doc
+
+        return dict((id, found[id]) for id in ids)
+
+    def _known(self, id: str) -> Optional[object]:
+        # An already fetched document, preferring the lookup (which knows when a document has gone stale).
+        if self._lookup is not None:
+            return self._lookup(id)
+        slot = self._slots.get(id)
+        return slot is not None and slot.doc or None
+
+    def _missing(self, id: str) -> bool:
+        return self._not_found is not None and (self._kind, id) in self._not_found
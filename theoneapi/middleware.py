@@ -0,0 +1,314 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional, Union
+import requests
+from theoneapi.cache import TTLCache
+from theoneapi.hooks import RequestEvent
+from theoneapi.transport import Response
+
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+
+@dataclass
+class Request:
+    """
+    A request on its way through the middleware of a TheOneApi to its transport.
+
+    Attributes
+    ----------
+    url : str
+        The full url, with the query string.
+    path : str
+        The url relative to the API's base url, e.g. "movie/{id}/quote?limit=10".
+    headers : dict
+        The request headers.
+    timeout : Union[float, tuple]
+        The connect and read timeouts in seconds.
+    chunk_size : int
+        The size of the chunks the body is read in.
+    event : RequestEvent
+        The RequestEvent of the request when hooks are set, or None.
+    """
+
+    url: str
+    path: str
+    headers: dict = field(default_factory=dict)
+    timeout: Optional[Union[float, tuple]] = None
+    chunk_size: int = 65536
+    event: Optional[RequestEvent] = None
+
+    @property
+    def endpoint(self) -> str:
+        return self.path.split("?")[0].split("/")[0]
+
+
+Handler = Callable[[Request], Response]
+
+
+class Middleware:
+    """
+    One step of the request pipeline of a TheOneApi. handle gets each request and the next step of the pipeline,
+    and can answer the request itself (short-circuit), change the request or the response, or just observe them.
+
+    Middleware is given as TheOneApi(middleware=[...]), outermost first, and can be changed through api.middleware.
+    It runs inside the endpoint's circuit breaker, for every request the SDK makes (by id, lists, streams and any
+    endpoint requested through api.get).
+
+    A simple example, which adds a header to every request and counts the responses by status:
+    >>> class Tagging(Middleware):
+    ...     def __init__(self):
+    ...         self.statuses = collections.Counter()
+    ...     def handle(self, request, next):
+    ...         request.headers["User-Agent"] = "my-app/1.0"
+    ...         response = next(request)
+    ...         self.statuses[response.status_code] += 1
+    ...         return response
+
+    Methods
+    -------
+    handle(request: Request, next: Callable[[Request], Response]) -> Response
+        Handles a request, usually by passing it on with next(request).
+    """
+
+    def handle(self, request: Request, next: Handler) -> Response:
+        return next(request)
+
+
+def chain(middleware: list, terminal: Handler) -> Handler:
+    """
+    Returns a handler which passes a request through each middleware in order and then to the terminal handler.
+
+    Parameters
+    ----------
+    middleware : list[Middleware]
+        The middleware, outermost first.
+    terminal : Callable[[Request], Response]
+        The last step, which sends the request.
+
+    Returns
+    -------
+    Callable[[Request], Response]
+        The pipeline.
+    """
+
+    handler = terminal
+    for step in reversed(middleware):
+        handler = lambda request, step=step, next=handler: step.handle(request, next)
+    return handler
+
+
+class CacheMiddleware(Middleware):
+    """
+    Keeps the successful responses of each url for ttl seconds and answers repeated requests with them, without
+    using the network. Bodies are kept as they arrived (still compressed), so a cached response costs about as much
+    memory as it did bandwidth. Cached answers carry an "X-Cache: HIT" header and are reported with cache="hit" to
+    the hooks.
+
+    Attributes
+    ----------
+    cache : TTLCache
+        The cached status, headers and body chunks by url.
+    """
+
+    def __init__(self, ttl: float = 300, maxsize: int = 1000) -> None:
+        """
+        Parameters
+        ----------
+        ttl : float, optional
+            How many seconds a response is reused, by default 300
+        maxsize : int, optional
+            The maximum number of responses kept, by default 1000
+        """
+
+        self.cache = TTLCache(ttl, maxsize)
+
+    def handle(self, request: Request, next: Handler) -> Response:
+        cached = self.cache.get(request.url)
+        if cached is not None:
+            if request.event is not None:
+                request.event.cache = "hit"
+            headers, chunks = cached
+            return Response(200, dict(headers, **{"X-Cache": "HIT"}), iter(chunks))
+
+        response = next(request)
+        if response.status_code != 200:
+            return response
+        response.body = self._keep(request.url, dict(response.headers), response.body)
+        return response
+
+    def _keep(self, url: str, headers: dict, body: Iterator[bytes]) -> Iterator[bytes]:
+        # The body is stored once it has been read completely, so a failed read is never cached.
+        chunks = []
+        for chunk in body:
+            chunks.append(chunk)
+            yield chunk
+        self.cache.set(url, (headers, chunks))
+
+
+class RetryMiddleware(Middleware):
+    """
+    Retries requests which failed with a connection error, a timeout or a 429 or 5xx status, waiting with
+    exponential back off and full jitter between attempts, or as long as the Retry-After header asks. Each retry is
+    counted in the request's RequestEvent.
+
+    Attributes
+    ----------
+    retries : int
+        The number of retries after the first attempt.
+    backoff : float
+        The maximum wait before the first retry in seconds, doubling with each retry.
+    max_wait : float
+        The longest wait before a retry. A longer Retry-After returns the response instead of waiting.
+    statuses : list[int]
+        The statuses which are retried.
+    """
+
+    def __init__(
+        self,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_wait: float = 30,
+        statuses: list[int] = None,
+        rng: random.Random = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        retries : int, optional
+            The number of retries after the first attempt, by default 3
+        backoff : float, optional
+            The maximum wait before the first retry in seconds, by default 0.5
+        max_wait : float, optional
+            The longest wait before a retry in seconds, by default 30
+        statuses : list[int], optional
+            The statuses which are retried, by default RETRY_STATUSES (429, 500, 502, 503 and 504).
+        rng : random.Random, optional
+            The random number generator of the jitter.
+        """
+
+        self.retries = retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.statuses = statuses or RETRY_STATUSES
+        self._rng = rng or random.Random()
+
+    def handle(self, request: Request, next: Handler) -> Response:
+        attempt = 0
+        while True:
+            try:
+                response = next(request)
+            except requests.RequestException:
+                if attempt >= self.retries:
+                    raise
+                response = None
+
+            if response is not None and (response.status_code not in self.statuses or attempt >= self.retries):
+                return response
+            wait = self._wait(attempt, response)
+            if wait > self.max_wait:
+                return response
+            if response is not None:
+                response.close()
+
+            time.sleep(wait)
+            attempt += 1
+            if request.event is not None:
+                request.event.retries = attempt
+
+    def _wait(self, attempt: int, response: Optional[Response]) -> float:
+        retry_after = response is not None and response.headers.get("Retry-After") or None
+        if retry_after is not None:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return min(self.max_wait, self._rng.uniform(0, self.backoff * 2 ** attempt))
+
+
+class RateLimitMiddleware(Middleware):
+    """
+    Limits the request rate with a token bucket, so that no more than rate requests are sent per period (and at
+    most burst at once), waiting for a token rather than being refused by the API. The bucket also follows the
+    API's x-ratelimit-remaining header, so requests made elsewhere with the same key are accounted for. The waiting shows up in the queue phase of the RequestEvent.
+
+    Attributes
+    ----------
+    rate : int
+        The number of requests allowed per period.
+    period : float
+        The length of the period in seconds.
+    burst : int
+        The size of the bucket.
+
+    Methods
+    -------
+    available() -> float
+        Returns the number of requests which can be sent now without waiting.
+    """
+
+    def __init__(self, rate: int = 100, period: float = 3600, burst: int = None) -> None:
+        """
+        Parameters
+        ----------
+        rate : int, optional
+            The number of requests allowed per period, by default 100 (the API's limit)
+        period : float, optional
+            The length of the period in seconds, by default 3600
+        burst : int, optional
+            The size of the bucket, by default rate.
+        """
+
+        self.rate = rate
+        self.period = period
+        self.burst = burst or rate
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def handle(self, request: Request, next: Handler) -> Response:
+        while True:
+            wait = self._take()
+            if wait == 0:
+                break
+            time.sleep(wait)
+
+        response = next(request)
+        self._follow(response.headers)
+        return response
+
+    def available(self) -> float:
+        """
+        Returns the number of requests which can be sent now without waiting, i.e. the tokens in the bucket.
+
+        Returns
+        -------
+        float
+            The tokens.
+        """
+
+        with self._lock:
+            return min(self.burst, self._tokens + (time.monotonic() - self._updated) * self.rate / self.period)
+
+    def _take(self) -> float:
+        # Takes a token and returns 0, or returns how long until one will be available.
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate / self.period)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) * self.period / self.rate
+
+    def _follow(self, headers: dict) -> None:
+        remaining = headers.get("x-ratelimit-remaining")
+        if remaining is None:
+            return
+        try:
+            remaining = float(remaining)
+        except ValueError:
+            return
+        with self._lock:
+            self._tokens = min(self._tokens, remaining)
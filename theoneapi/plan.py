@@ -0,0 +1,185 @@
+import statistics
+from typing import NamedTuple, Optional
+from theoneapi.middleware import CacheMiddleware, RateLimitMiddleware
+from theoneapi.scheduler import QuotaScheduler
+
+# The seconds a request is assumed to take before the api has timed any.
+ASSUMED_SECONDS = 0.5
+
+
+class BudgetExceeded(RuntimeError):
+    """
+    Raised by QueryPlan.check when a query would use more requests or time than allowed, or its cost is unknown.
+    """
+
+
+class QueryPlan(NamedTuple):
+    """
+    The predicted cost of a query, as returned by explain (see TheOneApiBase.explain).
+
+    Attributes
+    ----------
+    operation : str
+        The operation explained, e.g. "fetch_all".
+    calls : Optional[int]
+        The number of requests to the API, or None when the number of documents isn't known.
+    cached : int
+        The number of requests a CacheMiddleware will answer instead, which don't count towards calls.
+    local : bool
+        Whether the query is answered without any request to the API.
+    total : Optional[int]
+        The number of matching documents, if known.
+    pages : Optional[int]
+        The number of pages of matching documents, if known.
+    page_size : int
+        The number of documents per request.
+    source : Optional[str]
+        Where the total came from: "docs", "snapshot", "metadata", "totals" or "probe".
+    budget : Optional[int]
+        The requests the rate limiting middleware (a RateLimitMiddleware or QuotaScheduler) allows right now, or None
+        when there is none.
+    seconds : Optional[float]
+        The expected wall clock time, including any wait for the quota, or None when calls is unknown.
+    """
+
+    operation: str
+    calls: Optional[int]
+    cached: int
+    local: bool
+    total: Optional[int]
+    pages: Optional[int]
+    page_size: int
+    source: Optional[str]
+    budget: Optional[int]
+    seconds: Optional[float]
+
+    @property
+    def within_budget(self) -> bool:
+        return self.calls is not None and (self.budget is None or self.calls <= self.budget)
+
+    def check(self, max_calls: int = None, max_seconds: float = None) -> "QueryPlan":
+        """
+        Raises BudgetExceeded unless the query fits the current rate limit budget and the given limits, so a job can
+        refuse to start rather than run out of quota part way through.
+
+        Parameters
+        ----------
+        max_calls : int, optional
+            The most requests the query may make, by default no limit beyond the budget.
+        max_seconds : float, optional
+            The longest the query may take in seconds, by default no limit.
+
+        Returns
+        -------
+        QueryPlan
+            The plan, for chaining.
+        """
+
+        if self.calls is None:
+            raise BudgetExceeded(f"The cost of {self.operation} is unknown; explain it with probe=True.")
+        if self.budget is not None and self.calls > self.budget:
+            raise BudgetExceeded(f"{self.operation} needs {self.calls} requests, but only {self.budget} are available.")
+        if max_calls is not None and self.calls > max_calls:
+            raise BudgetExceeded(f"{self.operation} needs {self.calls} requests, more than {max_calls}.")
+        if max_seconds is not None and self.seconds > max_seconds:
+            raise BudgetExceeded(f"{self.operation} would take {self.seconds:.1f}s, longer than {max_seconds:g}s.")
+        return self
+
+
+def seconds_per_call(api: "TheOneApi") -> float:
+    """
+    Returns how long a request of the api takes, from the median time to the headers and to read the body of its
+    recent requests.
+
+    Parameters
+    ----------
+    api : TheOneApi
+        The api.
+
+    Returns
+    -------
+    float
+        The seconds, or ASSUMED_SECONDS when no request has been timed yet.
+    """
+
+    latencies = list(api.latencies)
+    if len(latencies) == 0:
+        return ASSUMED_SECONDS
+    downloads = [stats.seconds for stats in list(api.transfers)]
+    return statistics.median(latencies) + (downloads and statistics.median(downloads) or 0.0)
+
+
+def budget(api: "TheOneApi") -> tuple:
+    """
+    Returns the requests the api's rate limiting middleware allows now, and the rate at which more become available.
+
+    Parameters
+    ----------
+    api : TheOneApi
+        The api.
+
+    Returns
+    -------
+    tuple
+        The available requests and the requests per second, or (None, None) without rate limiting middleware.
+    """
+
+    limits = []
+    for middleware in api.middleware:
+        if isinstance(middleware, QuotaScheduler):
+            limits.append((middleware.available(middleware.current()), middleware.rate / middleware.period))
+        elif isinstance(middleware, RateLimitMiddleware):
+            limits.append((int(middleware.available()), middleware.rate / middleware.period))
+    if len(limits) == 0:
+        return None, None
+    return min(limits)
+
+
+def plan(
+    api: "TheOneApi",
+    operation: str,
+    urls: Optional[list],
+    total: int = None,
+    page_size: int = 0,
+    source: str = None,
+) -> QueryPlan:
+    """
+    Returns the plan of a query which requests the given urls in turn.
+
+    Parameters
+    ----------
+    api : TheOneApi
+        The api which makes the requests.
+    operation : str
+        The operation explained.
+    urls : Optional[list[str]]
+        The urls which will be requested, or None when they aren't known.
+    total : int, optional
+        The number of matching documents, if known.
+    page_size : int, optional
+        The number of documents per request.
+    source : str, optional
+        Where the total came from.
+
+    Returns
+    -------
+    QueryPlan
+        The plan.
+    """
+
+    caches = [middleware.cache for middleware in api.middleware if isinstance(middleware, CacheMiddleware)]
+    cached, calls = 0, None
+    if urls is not None:
+        cached = sum(1 for url in urls if any(url in cache for cache in caches))
+        calls = len(urls) - cached
+
+    available, rate = budget(api)
+    seconds = None
+    if calls is not None:
+        seconds = calls * seconds_per_call(api)
+        if available is not None and calls > available:
+            seconds += (calls - available) / rate
+    pages = None
+    if total is not None and page_size:
+        pages = -(-total // page_size)
+    return QueryPlan(operation, calls, cached, calls == 0, total, pages, page_size, source, available, seconds)
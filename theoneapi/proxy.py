@@ -0,0 +1,396 @@
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple, Optional
+import requests
+from theoneapi.cache import TTLCache
+from theoneapi.middleware import RateLimitMiddleware, Request, RetryMiddleware, chain
+from theoneapi.transfer import decode_body
+from theoneapi.transport import HttpTransport, Transport
+
+UPSTREAM = "https://the-one-api.dev/v2/"
+
+# Response headers which describe the upstream connection rather than the response, so aren't passed on.
+HOP_BY_HOP = ["connection", "keep-alive", "transfer-encoding", "content-length", "date", "server", "set-cookie"]
+
+
+class CachedResponse(NamedTuple):
+    """
+    An upstream response as stored by the CachingProxy, with its body as it arrived (possibly compressed).
+    """
+
+    status: int
+    headers: dict
+    body: bytes
+    fetched: float
+
+
+class _Flight:
+    # One upstream request which concurrent identical requests wait for instead of making their own.
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class CachingProxy:
+    """
+    A caching proxy sidecar in front of the-one-api.dev, shared by many SDK clients, so that the whole fleet makes one
+    upstream request per unique query and stays within one api key's quota.
+
+    Each request path (with its query string) is answered:
+    - from the cache while the response is younger than ttl ("X-Cache: HIT"),
+    - from the cache while it is younger than ttl + stale_ttl, with the response revalidated in the background
+      (stale-while-revalidate, "X-Cache: STALE"),
+    - otherwise by the upstream ("X-Cache: MISS"). Concurrent identical requests share one upstream request
+      (single-flight), and upstream requests are rate limited with a RateLimitMiddleware and retried with a
+      RetryMiddleware. If the upstream fails, an expired cached response is served rather than the error while it is
+      still held.
+
+    The proxy authenticates upstream with its own api key, so anyone who can reach it spends that key's quota. Only
+    expose it inside the cluster (it listens on 127.0.0.1 by default), and give it client_keys so that only clients
+    with one of them as their "Authorization: Bearer <key>" are answered (others get a 401). Point clients at it with
+    TheOneApi(client_key, base_url=proxy.url). Statistics are served as JSON from /_proxy/stats.
+
+    A simple example:
+    >>> with CachingProxy(api_key, port=8081, client_keys=["fleet"]) as proxy:
+    ...     api = TheOneApi("fleet", base_url=proxy.url)
+
+    Or from the command line:
+    $ THEONEAPI_API_KEY=... theoneapi-proxy --port 8081 --ttl 3600 --client-key fleet
+
+    Attributes
+    ----------
+    upstream : str
+        The base url of the API.
+    url : str
+        The base url to give TheOneApi, e.g. "http://127.0.0.1:8081/v2/".
+    ttl : float
+        How many seconds a response is served without revalidation.
+    stale_ttl : float
+        How many seconds longer an expired response is served while it is revalidated.
+    middleware : list[Middleware]
+        The pipeline of the upstream requests, by default retries and the rate limit.
+    client_keys : Optional[set[str]]
+        The keys clients must send, or None to answer any client.
+    stats : dict[str, int]
+        The number of hits, stale hits, misses, coalesced requests, upstream requests, revalidations and errors.
+
+    Methods
+    -------
+    start() -> CachingProxy
+        Starts serving on a background thread.
+
+    stop() -> None
+        Stops serving.
+
+    serve_forever() -> None
+        Serves on the current thread until interrupted.
+
+    fetch(path: str) -> tuple[CachedResponse, str]
+        Answers a request path, returning the response and how it was answered.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        upstream: str = UPSTREAM,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ttl: float = 300,
+        stale_ttl: float = 3600,
+        maxsize: int = 10000,
+        rate: int = 100,
+        period: float = 3600,
+        retries: int = 2,
+        timeout: tuple = (3.05, 30),
+        transport: Transport = None,
+        client_keys: list[str] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        api_key : str
+            The api key used for the upstream requests.
+        upstream : str, optional
+            The base url of the API, by default https://the-one-api.dev/v2/
+        host : str, optional
+            The address to listen on, by default "127.0.0.1"
+        port : int, optional
+            The port to listen on, by default 0 (any free port, see url).
+        ttl : float, optional
+            How many seconds a response is served without revalidation, by default 300
+        stale_ttl : float, optional
+            How many seconds longer an expired response is served while it is revalidated, by default 3600
+        maxsize : int, optional
+            The maximum number of responses cached, by default 10000
+        rate : int, optional
+            The number of upstream requests allowed per period, by default 100
+        period : float, optional
+            The length of the rate limit period in seconds, by default 3600
+        retries : int, optional
+            The number of retries of a failed upstream request, by default 2
+        timeout : tuple, optional
+            The connect and read timeouts of upstream requests, by default (3.05, 30)
+        transport : Transport, optional
+            Sends the upstream requests, by default an HttpTransport with its own requests.Session.
+        client_keys : list[str], optional
+            The keys clients must send as "Authorization: Bearer <key>", by default any client is answered.
+        """
+
+        self.upstream = upstream
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.timeout = timeout
+        self.middleware = [RetryMiddleware(retries), RateLimitMiddleware(rate, period)]
+        self.transport = transport or HttpTransport(requests.Session())
+        self.client_keys = client_keys is not None and set(client_keys) or None
+        self.stats = {"hits": 0, "stale": 0, "misses": 0, "coalesced": 0, "upstream": 0, "revalidations": 0,
+                      "errors": 0}
+        self._api_key = api_key
+        self._cache = TTLCache(ttl + stale_ttl, maxsize)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2/"
+
+    def start(self) -> "CachingProxy":
+        """
+        Starts serving on a background thread.
+
+        Returns
+        -------
+        CachingProxy
+            The proxy, for chaining.
+        """
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="theoneapi-proxy", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        Serves on the current thread until interrupted.
+        """
+
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """
+        Stops serving and closes the socket.
+        """
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "CachingProxy":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def fetch(self, path: str) -> tuple:
+        """
+        Answers a request path relative to the base url, from the cache or the upstream.
+
+        Parameters
+        ----------
+        path : str
+            The path with its query string, e.g. "quote?limit=10".
+
+        Returns
+        -------
+        tuple[CachedResponse, str]
+            The response and how it was answered: "HIT", "STALE" or "MISS".
+        """
+
+        cached = self._cache.get(path)
+        if cached is not None:
+            age = time.monotonic() - cached.fetched
+            if age < self.ttl:
+                self._count("hits")
+                return cached, "HIT"
+            if age < self.ttl + self.stale_ttl:
+                self._count("stale")
+                self._revalidate(path)
+                return cached, "STALE"
+
+        self._count("misses")
+        try:
+            response = self._single_flight(path)
+        except requests.RequestException:
+            if cached is None:
+                raise
+            return cached, "STALE"
+        if response.status >= 500 and cached is not None:
+            return cached, "STALE"
+        return response, "MISS"
+
+    def _single_flight(self, path: str) -> CachedResponse:
+        with self._lock:
+            flight = self._flights.get(path)
+            leader = flight is None
+            if leader:
+                flight = self._flights[path] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self._upstream(path)
+            return flight.response
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[path]
+            flight.done.set()
+
+    def _revalidate(self, path: str) -> None:
+        with self._lock:
+            if path in self._flights:
+                return
+        self._count("revalidations")
+
+        def revalidate() -> None:
+            try:
+                self._single_flight(path)
+            except requests.RequestException:
+                pass
+
+        threading.Thread(target=revalidate, name="theoneapi-proxy-revalidate", daemon=True).start()
+
+    def _upstream(self, path: str) -> CachedResponse:
+        self._count("upstream")
+        headers = {"Authorization": "Bearer " + self._api_key, "Accept-Encoding": "gzip, deflate"}
+        request = Request(self.upstream + path, path, headers, self.timeout)
+        try:
+            response = chain(self.middleware, self._send)(request)
+            body = b"".join(response.body)
+        except requests.RequestException:
+            self._count("errors")
+            raise
+
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in HOP_BY_HOP}
+        fetched = CachedResponse(response.status_code, headers, body, time.monotonic())
+        if response.status_code == 200:
+            self._cache.set(path, fetched)
+        elif response.status_code >= 500:
+            self._count("errors")
+        return fetched
+
+    def _send(self, request: Request):
+        return self.transport.send(request.url, request.headers, request.timeout, request.chunk_size)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _handler(self) -> type:
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                authorization = self.headers.get("Authorization") or ""
+                key = authorization[:7] == "Bearer " and authorization[7:] or None
+                if proxy.client_keys is not None and key not in proxy.client_keys:
+                    return self._reply(401, {"Content-Type": "application/json"},
+                                       b'{"success":false,"message":"Unauthorized."}')
+                if self.path == "/_proxy/stats":
+                    with proxy._lock:
+                        stats = json.dumps(proxy.stats).encode("utf-8")
+                    return self._reply(200, {"Content-Type": "application/json"}, stats)
+                if self.path[:4] != "/v2/":
+                    return self._reply(404, {"Content-Type": "application/json"},
+                                       b'{"success":false,"message":"Endpoint not found."}')
+
+                try:
+                    response, outcome = proxy.fetch(self.path[4:])
+                except requests.RequestException as error:
+                    message = json.dumps({"success": False, "message": f"Upstream request failed: {error}"})
+                    return self._reply(502, {"Content-Type": "application/json"}, message.encode())
+
+                headers = dict(response.headers, **{"X-Cache": outcome})
+                body = response.body
+                encoding = headers.get("Content-Encoding") or ""
+                accepted = self.headers.get("Accept-Encoding") or ""
+                if encoding and any(coding.strip() not in accepted for coding in encoding.split(",")):
+                    body = b"".join(decode_body([body], encoding))
+                    del headers["Content-Encoding"]
+                self._reply(response.status, headers, body)
+
+            def _reply(self, status: int, headers: dict, body: bytes) -> None:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+
+def main(arguments: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve a shared caching proxy in front of the-one-api.dev.")
+    parser.add_argument("--api-key", default=os.environ.get("THEONEAPI_API_KEY"),
+                        help="the upstream api key, by default $THEONEAPI_API_KEY")
+    parser.add_argument("--upstream", default=UPSTREAM)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--ttl", type=float, default=300, help="seconds a response is served as is")
+    parser.add_argument("--stale-ttl", type=float, default=3600, help="seconds longer it is served while revalidated")
+    parser.add_argument("--maxsize", type=int, default=10000, help="the number of responses cached")
+    parser.add_argument("--rate", type=int, default=100, help="upstream requests allowed per period")
+    parser.add_argument("--period", type=float, default=3600, help="the rate limit period in seconds")
+    parser.add_argument("--client-key", action="append", dest="client_keys",
+                        help="a key clients must send (repeatable), by default any client is answered")
+    options = parser.parse_args(arguments)
+    if not options.api_key:
+        parser.error("an api key is needed, with --api-key or THEONEAPI_API_KEY")
+
+    proxy = CachingProxy(
+        options.api_key,
+        options.upstream,
+        options.host,
+        options.port,
+        ttl=options.ttl,
+        stale_ttl=options.stale_ttl,
+        maxsize=options.maxsize,
+        rate=options.rate,
+        period=options.period,
+        client_keys=options.client_keys,
+    )
+    print(f"Proxying {options.upstream} at {proxy.url}")
+    try:
+        proxy.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.stop()
+
+
+if __name__ == "__main__":
+    main()
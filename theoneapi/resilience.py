@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+from collections import deque
+from enum import Enum
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised instead of making a request while the circuit breaker of its endpoint is open.
+
+    Attributes
+    ----------
+    endpoint : str
+        The endpoint whose circuit is open, e.g. "quote".
+    retry_after : float
+        The number of seconds until a trial request will be allowed.
+    """
+
+    def __init__(self, endpoint: str, retry_after: float) -> None:
+        super().__init__(f"The circuit for the {endpoint} endpoint is open, retry in {retry_after:.1f}s")
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class FallbackBody:
+    """
+    A response body answered locally (from a stale response or a snapshot) instead of by the API.
+
+    Attributes
+    ----------
+    data : dict
+        The decoded response.
+    """
+
+    def __init__(self, data: dict) -> None:
+        self.data = data
+
+    def __iter__(self):
+        yield json.dumps(self.data).encode("utf-8")
+
+
+class CircuitBreaker:
+    """
+    Tracks the outcome of recent requests to one endpoint and stops requests being made while it is failing.
+
+    The breaker starts closed. Once at least min_calls requests have finished within the last window seconds and
+    at least failure_rate of them failed, it opens and every request is refused for reset_timeout seconds. It then
+    becomes half-open and lets a single trial request through: if that succeeds the breaker closes again (forgetting
+    the old failures), otherwise it opens for another reset_timeout.
+
+    Attributes
+    ----------
+    failure_rate : float
+        The proportion of failed requests in the window that opens the breaker.
+    min_calls : int
+        The number of requests needed in the window before the failure rate is considered.
+    window : float
+        The number of seconds of history used for the failure rate.
+    reset_timeout : float
+        The number of seconds the breaker stays open before allowing a trial request.
+
+    Methods
+    -------
+    allow() -> bool
+        Returns whether a request may be made now.
+
+    record_success() -> None
+        Records that a request succeeded.
+
+    record_failure() -> None
+        Records that a request failed.
+
+    retry_after() -> float
+        Returns the number of seconds until a request will be allowed.
+    """
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        min_calls: int = 5,
+        window: float = 60,
+        reset_timeout: float = 30,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        failure_rate : float, optional
+            The proportion of failed requests in the window that opens the breaker, by default 0.5
+        min_calls : int, optional
+            The number of requests needed in the window before the failure rate is considered, by default 5
+        window : float, optional
+            The number of seconds of history used for the failure rate, by default 60
+        reset_timeout : float, optional
+            The number of seconds the breaker stays open before allowing a trial request, by default 30
+        """
+
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._outcomes = deque()
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._trial_at = None
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return CircuitState.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """
+        Returns whether a request may be made now. While half-open only one trial request is allowed at a time.
+
+        Returns
+        -------
+        bool
+            True if the request should be made.
+        """
+
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            # A trial request which never reported back doesn't block the breaker for more than reset_timeout.
+            if self._trial_at is not None and now - self._trial_at < self.reset_timeout:
+                return False
+            self._state = CircuitState.HALF_OPEN
+            self._trial_at = now
+            return True
+
+    def record_success(self) -> None:
+        """
+        Records that a request succeeded, closing the breaker after a successful trial request.
+        """
+
+        with self._lock:
+            if self._state != CircuitState.CLOSED:
+                self._state = CircuitState.CLOSED
+                self._trial_at = None
+                self._outcomes.clear()
+            self._add(True)
+
+    def record_failure(self) -> None:
+        """
+        Records that a request failed, opening the breaker if the failure rate has been reached.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            if self._state != CircuitState.CLOSED:
+                self._state = CircuitState.OPEN
+                self._opened_at = now
+                self._trial_at = None
+                return
+
+            self._add(False)
+            failures = sum(1 for (_, success) in self._outcomes if not success)
+            if len(self._outcomes) >= self.min_calls and failures >= self.failure_rate * len(self._outcomes):
+                self._state = CircuitState.OPEN
+                self._opened_at = now
+
+    def retry_after(self) -> float:
+        """
+        Returns the number of seconds until a request will be allowed.
+
+        Returns
+        -------
+        float
+            0 when the breaker is closed or a trial request is due.
+        """
+
+        with self._lock:
+            if self._state == CircuitState.CLOSED:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def _add(self, success: bool) -> None:
+        now = time.monotonic()
+        self._outcomes.append((now, success))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
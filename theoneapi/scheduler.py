@@ -0,0 +1,307 @@
+import contextvars
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple, Optional
+from theoneapi.middleware import Handler, Middleware, Request
+from theoneapi.transport import Response
+
+
+class PriorityClass(NamedTuple):
+    """
+    A class of requests sharing a QuotaScheduler: its priority (lower goes first), the share of the quota reserved for
+    it, the most requests it may have waiting and the longest any of them may wait in seconds (None for no limit).
+    """
+
+    priority: int
+    share: float = 0.0
+    max_queue: int = 1000
+    deadline: Optional[float] = None
+
+
+class QueueFull(RuntimeError):
+    """
+    Raised by a QuotaScheduler instead of queueing a request whose priority class already has max_queue waiting.
+    """
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Raised by a QuotaScheduler when a request has waited longer than its deadline without a share of the quota.
+    """
+
+
+class _Ticket:
+    # One waiting request.
+    def __init__(self, name: str, deadline: Optional[float]) -> None:
+        self.name = name
+        self.deadline = deadline
+        self.granted = False
+
+
+class QuotaScheduler(Middleware):
+    """
+    Shares the API's hourly quota between classes of requests, so that background work (prefetching, syncing, bulk
+    exports) only uses the headroom interactive requests leave, and can't starve them for the rest of the hour.
+
+    Every request belongs to a PriorityClass, chosen with the priority context manager (by default the default class).
+    The class is held in a context variable, so it also covers the requests the SDK makes from its thread pools (e.g.
+    count_by and sample), which run in a copy of the caller's context.
+    The requests sent in the last period are counted per class, and a class may send while the quota has room for it
+    after the unused reservations of the other classes: each class with a share keeps share * rate requests per period
+    to itself, and the rest is shared. Waiting requests are queued per class and sent highest priority first (first
+    come, first served within a class) as soon as the quota allows. A class with max_queue requests waiting refuses more
+    with QueueFull, and a request which would have to wait longer than its deadline raises DeadlineExceeded, so that
+    callers can shed work rather than queue it for an hour. The API's x-ratelimit-remaining header is followed, so
+    requests made elsewhere with the same key are accounted for.
+
+    The default classes are "interactive", which reserves half of the quota and may use all of it, waiting at most 30
+    seconds, and "background", which reserves nothing and waits as long as it takes.
+
+    A simple example:
+    >>> scheduler = QuotaScheduler()
+    >>> api = TheOneApi(key, middleware=[scheduler])
+    >>> with scheduler.priority("background"):
+    ...     Quotes(api, RequestOptions(limit=1000)).fetch_all()
+
+    Attributes
+    ----------
+    CLASSES : dict[str, PriorityClass]
+        The default priority classes.
+    rate : int
+        The number of requests allowed per period.
+    period : float
+        The length of the period in seconds.
+    classes : dict[str, PriorityClass]
+        The priority classes by name.
+    default : str
+        The class of requests made outside of priority.
+    stats : dict[str, Counter]
+        The number of requests sent, refused (QueueFull) and expired (DeadlineExceeded) per class.
+
+    Methods
+    -------
+    priority(name: str, deadline: float = None) -> ContextManager
+        Makes the requests of the current context belong to a priority class within the with block.
+
+    current() -> str
+        Returns the priority class of the requests of the current context.
+
+    usage() -> dict[str, int]
+        Returns the number of requests sent per class in the current period.
+
+    available(name: str) -> int
+        Returns the number of requests a class could send now.
+    """
+
+    CLASSES = {
+        "interactive": PriorityClass(0, share=0.5, max_queue=100, deadline=30.0),
+        "background": PriorityClass(1, share=0.0, max_queue=10000, deadline=None),
+    }
+
+    def __init__(
+        self,
+        rate: int = 100,
+        period: float = 3600,
+        classes: dict = None,
+        default: str = "interactive",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        rate : int, optional
+            The number of requests allowed per period, by default 100 (the API's limit)
+        period : float, optional
+            The length of the period in seconds, by default 3600
+        classes : dict[str, PriorityClass], optional
+            The priority classes by name, by default CLASSES. The shares must add up to at most 1.
+        default : str, optional
+            The class of requests made outside of priority, by default "interactive"
+        clock : Callable[[], float], optional
+            Returns the current time in seconds, by default time.monotonic
+        """
+
+        self.rate = rate
+        self.period = period
+        self.classes = dict(classes or self.CLASSES)
+        if sum(priority_class.share for priority_class in self.classes.values()) > 1:
+            raise ValueError("The shares of the priority classes add up to more than the whole quota.")
+        if default not in self.classes:
+            raise ValueError(f"Unknown default priority class {default!r}")
+        self.default = default
+        self.stats = {"sent": Counter(), "refused": Counter(), "expired": Counter()}
+        self._clock = clock
+        self._order = sorted(self.classes, key=lambda name: self.classes[name].priority)
+        self._sent = deque()
+        self._used = Counter()
+        self._queues = {name: deque() for name in self.classes}
+        self._hint = None
+        self._current = contextvars.ContextVar(f"theoneapi_priority_{id(self)}", default=None)
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def priority(self, name: str, deadline: float = None) -> Iterator[None]:
+        """
+        Makes the requests of the current context belong to a priority class within the with block.
+
+        Parameters
+        ----------
+        name : str
+            The priority class, e.g. "background".
+        deadline : float, optional
+            The longest a request may wait in seconds, by default the deadline of the class.
+        """
+
+        if name not in self.classes:
+            raise ValueError(f"Unknown priority class {name!r}, expected one of {', '.join(self.classes)}")
+        token = self._current.set((name, deadline))
+        try:
+            yield
+        finally:
+            self._current.reset(token)
+
+    def current(self) -> str:
+        """
+        Returns the priority class of the requests of the current context.
+
+        Returns
+        -------
+        str
+            The name of the class.
+        """
+
+        return (self._current.get() or (self.default, None))[0]
+
+    def usage(self) -> dict:
+        """
+        Returns the number of requests sent per class in the current period.
+
+        Returns
+        -------
+        dict[str, int]
+            The requests sent by each class.
+        """
+
+        with self._condition:
+            self._expire(self._clock())
+            return {name: self._used[name] for name in self.classes}
+
+    def available(self, name: str) -> int:
+        """
+        Returns the number of requests a class could send now: the quota left after the unused reservations of the
+        other classes.
+
+        Parameters
+        ----------
+        name : str
+            The priority class.
+
+        Returns
+        -------
+        int
+            The number of requests.
+        """
+
+        with self._condition:
+            now = self._clock()
+            self._expire(now)
+            return self._available(name)
+
+    def handle(self, request: Request, next: Handler) -> Response:
+        name, deadline = self._current.get() or (self.default, None)
+        priority_class = self.classes[name]
+        if deadline is None:
+            deadline = priority_class.deadline
+
+        with self._condition:
+            now = self._clock()
+            if len(self._queues[name]) >= priority_class.max_queue:
+                self.stats["refused"][name] += 1
+                raise QueueFull(f"{len(self._queues[name])} {name} requests are already waiting for the quota.")
+            ticket = _Ticket(name, None if deadline is None else now + deadline)
+            self._queues[name].append(ticket)
+            self._dispatch(now)
+            while not ticket.granted:
+                wait = self._next_slot(now)
+                if ticket.deadline is not None:
+                    if now >= ticket.deadline or wait is not None and now + wait > ticket.deadline:
+                        self._queues[name].remove(ticket)
+                        self.stats["expired"][name] += 1
+                        self._dispatch(now)
+                        raise DeadlineExceeded(
+                            f"A {name} request can't be sent within {deadline:g}s under the quota of {self.rate} "
+                            f"requests per {self.period:g}s."
+                        )
+                    wait = ticket.deadline - now if wait is None else min(wait, ticket.deadline - now)
+                self._condition.wait(wait)
+                now = self._clock()
+                self._dispatch(now)
+
+        response = next(request)
+        self._follow(response.headers)
+        return response
+
+    def _expire(self, now: float) -> None:
+        while self._sent and self._sent[0][0] <= now - self.period:
+            self._used[self._sent.popleft()[1]] -= 1
+        if self._hint is not None and now >= self._hint[1]:
+            self._hint = None
+
+    def _available(self, name: str) -> int:
+        remaining = self.rate - len(self._sent)
+        if self._hint is not None:
+            remaining = min(remaining, self._hint[0])
+        reserved = sum(
+            max(0, int(priority_class.share * self.rate) - self._used[other])
+            for other, priority_class in self.classes.items()
+            if other != name
+        )
+        return max(0, remaining - reserved)
+
+    def _dispatch(self, now: float) -> None:
+        # Grants the waiting requests the quota allows, highest priority first. A class which can't send doesn't
+        # hold up a lower one with a reservation of its own.
+        self._expire(now)
+        granted = False
+        for name in self._order:
+            queue = self._queues[name]
+            while queue and self._available(name) > 0:
+                ticket = queue.popleft()
+                ticket.granted = True
+                granted = True
+                self._sent.append((now, name))
+                self._used[name] += 1
+                self.stats["sent"][name] += 1
+                if self._hint is not None:
+                    self._hint = (self._hint[0] - 1, self._hint[1])
+        if granted:
+            self._condition.notify_all()
+
+    def _next_slot(self, now: float) -> Optional[float]:
+        # How long until the oldest request sent leaves the period, or None when nothing has been sent.
+        if not self._sent:
+            return None if self._hint is None else max(0.0, self._hint[1] - now)
+        return max(0.0, self._sent[0][0] + self.period - now)
+
+    def _follow(self, headers: dict) -> None:
+        # The API's count of the remaining requests also covers other clients with the same key. It holds until
+        # the API's reset time, or for a period.
+        remaining = headers.get("x-ratelimit-remaining")
+        if remaining is None:
+            return
+        try:
+            remaining = int(float(remaining))
+        except ValueError:
+            return
+        with self._condition:
+            now = self._clock()
+            reset = headers.get("x-ratelimit-reset")
+            try:
+                until = now + max(0.0, float(reset) - time.time())
+            except (TypeError, ValueError):
+                until = now + self.period
+            self._hint = (remaining, until)
+            if remaining > 0:
+                self._dispatch(now)
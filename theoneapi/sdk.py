@@ -1,7 +1,31 @@
-from typing import TypeVar, Generic, Union
+from typing import TypeVar, Generic, Union, Optional, Iterable, Iterator
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from enum import Enum
+from functools import cached_property
+import contextvars
+import json
+import random
+import threading
+import time
 import requests
+from theoneapi.analytics import MovieArrays
+from theoneapi.cache import BloomFilter, IdentityMap, NegativeCache, TTLCache
+from theoneapi.codec import decode_result, encode_result
+from theoneapi.hooks import Hooks, RequestEvent, url_template
+from theoneapi.index import NameIndex, NameMatch
+from theoneapi.loader import BatchLoader, LazyReference
+from theoneapi.resilience import CircuitBreaker, CircuitOpenError, FallbackBody
+from theoneapi.snapshot import Snapshot, write_snapshot
+from theoneapi.spill import SpillList
+from theoneapi.stream import DocStream
+from theoneapi.sync import DeltaSync, SyncResult
+from theoneapi.transfer import TransferStats, accept_encoding, decode_body
+from theoneapi.middleware import Middleware, Request, chain
+from theoneapi.plan import QueryPlan, plan
+from theoneapi.transport import HttpTransport, Response, Transport
 
 
 class SortOrder(Enum):
@@ -9,10 +33,27 @@ class SortOrder(Enum):
     DESCENDING = "-"
 
 
+def _map_in_context(executor: ThreadPoolExecutor, function, items: list) -> Iterator:
+    # executor.map, with each call run in a copy of the caller's context, so context variables such as the priority
+    # of a QuotaScheduler carry over to the pool's threads.
+    contexts = [contextvars.copy_context() for _ in items]
+    return executor.map(lambda context, item: context.run(function, item), contexts, items)
+
+
+class ApiError(RuntimeError):
+    """
+    Raised where an error response from the API (e.g. a 429 once the quota is used up) would otherwise be taken for
+    an empty result, such as when loading references in a batch or syncing a snapshot.
+    """
+
+
 class TheOneApiBase(ABC):
     """
     Base class for objects that will be retrived using TheOneApi
 
+    The query methods (sort, limit, filter, ...) never change the options object in place; they replace the
+    options attribute with an updated copy, so one RequestOptions or Query can safely be shared between collections.
+
     Attributes
     ----------
     api : TheOneApi
@@ -66,6 +107,12 @@ class TheOneApiBase(ABC):
     previous_page() -> TheOneApiBase
         Fetches the previous page of results and returns the object for chaining.
 
+    iter_pages() -> Iterator[TheOneApiBase]
+        Fetches each page of results in turn, starting at the current page, yielding the object after each one.
+
+    fetch_all() -> TheOneApiBase
+        Fetches every page of results into docs and returns the object for chaining.
+
     filter(filter: str) -> TheOneApiBase
         Sets the filter option to the given value and returns the object for chaining.
 
@@ -93,15 +140,38 @@ class TheOneApiBase(ABC):
 
     by_id(id: str) -> TheOneApiBase
         Get a specific document from the collection based on the idea and returns the collection object for chaining.
+
+    request(options: RequestOptions) -> dict
+        Makes the low-level request for this collection with the given options and returns the raw response.
+
+    count() -> int
+        Returns the number of documents matching the current filter using a metadata-only request.
+
+    count_by(field: str, values: list(Union[str, int, float])) -> dict
+        Returns the number of documents matching the current filter for each of the given field values.
+
+    sample(k: int, rng: random.Random = None) -> list[T]
+        Returns k random documents matching the current filter, with O(k) small requests.
+
+    to_bytes() -> bytes
+        Encodes the docs, metadata and options into a compact binary form which api.from_bytes decodes.
+
+    explain(operation: str = "fetch_all", probe: bool = False) -> QueryPlan
+        Predicts the requests, quota and time an operation will take, without making it.
     """
 
     METADATA_FIELDS = ["total", "limit", "offset", "page", "pages"]
+    DEFAULT_LIMIT = 1000
+    COUNT_WORKERS = 8
+    SAMPLE_GAP = 4
+    DOC_CLASS = None
 
     def __init__(self, api: "TheOneApi", options: "RequestOptions" = None) -> None:
         self.api = api
         self.options = options is not None and options or RequestOptions()
         self.docs = []
         self.metadata = {"total": 0, "limit": 0, "offset": 0, "page": 0, "pages": 0}
+        self._fetched_filter = None
 
     def set_metadata(self, data: dict) -> "TheOneApiBase":
         """
@@ -116,6 +186,8 @@ class TheOneApiBase(ABC):
 
         metadata = [(k, k in data and data[k] or None) for k in self.METADATA_FIELDS]
         self.metadata = dict(metadata)
+        # A total of 0 is kept, to tell an empty result from a failed request, which has no total.
+        self.metadata["total"] = data.get("total")
         return self
 
     def set_options(self, options: "RequestOptions") -> "TheOneApiBase":
@@ -156,6 +228,42 @@ class TheOneApiBase(ABC):
 
         pass
 
+    @abstractmethod
+    def request(self, options: "RequestOptions") -> dict:  # pragma: no cover
+        """
+        Makes the low-level request for this collection with the given options and returns the raw response data.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request.
+
+        Returns
+        -------
+        dict
+            The data returned by the API.
+        """
+
+        pass
+
+    @abstractmethod
+    def stream_request(self, options: "RequestOptions") -> DocStream:  # pragma: no cover
+        """
+        Makes the low-level request for this collection with the given options, streaming the response.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request.
+
+        Returns
+        -------
+        DocStream
+            The raw documents, decoded as they arrive.
+        """
+
+        pass
+
     def sort(
         self, field: str, order: SortOrder = SortOrder.ASCENDING
     ) -> "TheOneApiBase":
@@ -175,7 +283,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.sort = order.value + field
+        self.options = self.options.replace(sort=order.value + field)
         return self
 
     def limit(self, limit: int) -> "TheOneApiBase":
@@ -193,7 +301,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.limit = limit
+        self.options = self.options.replace(limit=limit)
         return self
 
     def page(self, page: int) -> "TheOneApiBase":
@@ -211,7 +319,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.page = page
+        self.options = self.options.replace(page=page)
         return self
 
     def offset(self, offset: int) -> "TheOneApiBase":
@@ -229,7 +337,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.offset = offset
+        self.options = self.options.replace(offset=offset)
         return self
 
     def next_page(self) -> "TheOneApiBase":
@@ -242,7 +350,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.page = ("page" in self.metadata) and (self.metadata["page"] + 1) or 1
+        self.options = self.options.replace(page=("page" in self.metadata) and (self.metadata["page"] + 1) or 1)
         return self.fetch()
     
     # TODO: There is an error which occurs if page is < 1
@@ -256,8 +364,127 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.page = ("page" in self.metadata) and (self.metadata["page"] - 1) or 1
+        self.options = self.options.replace(page=("page" in self.metadata) and (self.metadata["page"] - 1) or 1)
         return self.fetch()
+
+    def iter_pages(self) -> Iterator["TheOneApiBase"]:
+        """
+        Fetches each page of results in turn, starting at the current page, yielding the object after each one.
+        Stops after the last page (or the first empty one). If an offset is set only one request is made,
+        since the API ignores the page when an offset is given.
+
+        Returns
+        -------
+        Iterator[TheOneApiBase]
+            The object, holding the docs of one page at a time.
+        """
+
+        page = self.options.page or 1
+        while True:
+            if self.options.offset is None:
+                self.options = self.options.replace(page=page)
+            self.fetch()
+            yield self
+
+            pages = self.metadata["pages"]
+            if self.options.offset is not None or len(self.docs) == 0 or pages is None or page >= pages:
+                break
+            page += 1
+
+    def iter_docs(self) -> Iterator["TheOneApiDocBase"]:
+        """
+        Streams every page of results in turn, starting at the current page, yielding each document as soon as it
+        has been decoded from the response. Unlike iter_pages, no page is ever held in memory as a whole, and the
+        first document is available before the rest of its page has been received. The metadata is updated at the
+        end of each page; docs is left untouched. A page which fails raises ApiError, rather than ending the
+        iteration as if it were the last one.
+
+        Returns
+        -------
+        Iterator[TheOneApiDocBase]
+            The documents, one at a time.
+
+        Raises
+        ------
+        ApiError
+            If a page fails.
+        """
+
+        page = self.options.page or 1
+        while True:
+            if self.options.offset is None:
+                self.options = self.options.replace(page=page)
+            stream = self.stream_request(self.options)
+            count = 0
+            for data in stream:
+                doc = self.api.identity.hydrate(self.DOC_CLASS, self.api, data)
+                self._index([doc])
+                count += 1
+                yield doc
+            if stream.metadata.get("total") is None:
+                message = stream.metadata.get("message") or "no documents"
+                raise ApiError(f"The {self.DOC_CLASS.KIND} request failed: {message}")
+            self.set_metadata(stream.metadata)
+
+            pages = self.metadata["pages"]
+            if self.options.offset is not None or count == 0 or pages is None or page >= pages:
+                break
+            page += 1
+
+    def fetch_all(self, memory_limit: int = None) -> "TheOneApiBase":
+        """
+        Fetches every page of results into docs and returns the object for chaining. A page which fails raises
+        ApiError, rather than leaving docs holding only the pages before it.
+
+        Parameters
+        ----------
+        memory_limit : int, optional
+            The number of docs to keep in memory, by default None (no limit). Beyond it docs is a SpillList and the
+            remaining docs are stored in a temporary file and hydrated again when they are read.
+
+        Returns
+        -------
+        TheOneApiBase
+            The object for chaining.
+
+        Raises
+        ------
+        ApiError
+            If a page fails.
+        """
+
+        docs = []
+        if memory_limit is not None:
+            docs = SpillList(
+                memory_limit,
+                lambda doc: doc.to_record(),
+                lambda record: self.api.identity.hydrate(self.DOC_CLASS, self.api, record),
+            )
+        page = self.options.page or 1
+        for data in self._checked_pages():
+            # Like iter_pages, the options are left on the last page fetched.
+            if self.options.offset is None:
+                self.options = self.options.replace(page=page)
+            self.set_metadata(data)
+            self._fetched_filter = self.options.filter
+            docs.extend(self._hydrate(data))
+            page += 1
+        self.docs = docs
+        return self
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the docs, the metadata and the options into a compact, versioned binary form (see theoneapi.codec),
+        for passing the result to another process or storing it in a cache. api.from_bytes turns it back into the
+        same collection, several times faster than going through as_dict and JSON.
+
+        Returns
+        -------
+        bytes
+            The encoded collection.
+        """
+
+        return encode_result(self)
     
     def filter(self, filter: str) -> "TheOneApiBase":
         """
@@ -274,7 +501,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.filter = f"{filter}"
+        self.options = self.options.replace(filter=f"{filter}")
         return self
     
     def match(self, field: str, value: Union[str, int, float], negate: bool = False) -> "TheOneApiBase":
@@ -294,7 +521,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.filter = f"{field}{negate and '!' or ''}={value}"
+        self.options = self.options.replace(filter=f"{field}{negate and '!' or ''}={value}")
         return self
     
     def include(self, field: str, values: list[Union[str, int, float]], negate: bool = False) -> "TheOneApiBase":
@@ -316,7 +543,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.filter = f"{field}{negate and '!' or ''}={','.join(map(str,values))}"
+        self.options = self.options.replace(filter=f"{field}{negate and '!' or ''}={','.join(map(str,values))}")
         return self
     
     def exclude(self, field: str, values: list[Union[str, int, float]]) -> "TheOneApiBase":
@@ -355,7 +582,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.filter = f"{negate and '!' or ''}{field}"
+        self.options = self.options.replace(filter=f"{negate and '!' or ''}{field}")
         return self
     
     def regex(self, field: str, regex: str, negate: bool = False) -> "TheOneApiBase":
@@ -377,7 +604,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.filter = f"{field}{negate and '!' or ''}={regex}"
+        self.options = self.options.replace(filter=f"{field}{negate and '!' or ''}={regex}")
         return self
     
     def less_than(self, field: str, value: Union[str, int, float], orEqual: bool = False) -> "TheOneApiBase":
@@ -398,7 +625,7 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.filter = f"{field}<{orEqual and '=' or ''}{value}"
+        self.options = self.options.replace(filter=f"{field}<{orEqual and '=' or ''}{value}")
         return self
     
     def greater_than(self, field: str, value: Union[str, int, float], orEqual: bool = False) -> "TheOneApiBase":
@@ -419,9 +646,264 @@ class TheOneApiBase(ABC):
             The object for chaining.
         """
 
-        self.options.filter = f"{field}>{orEqual and '=' or ''}{value}"
+        self.options = self.options.replace(filter=f"{field}>{orEqual and '=' or ''}{value}")
         return self
 
+    def count(self) -> Optional[int]:
+        """
+        Returns the number of documents matching the current filter.
+
+        The count is read from the metadata of a request with a limit of 1, so no more than one document is
+        downloaded. If the docs already hold every document for the current filter no request is made.
+
+        Returns
+        -------
+        int
+            The number of matching documents, or None if the request failed.
+        """
+
+        docs = self._local_docs()
+        if docs is not None:
+            return len(docs)
+
+        return self._count(self.options.filter)
+
+    def count_by(self, field: str, values: list[Union[str, int, float]]) -> dict:
+        """
+        Returns the number of documents matching the current filter for each of the given field values.
+
+        One metadata-only request is made per value and the requests are run concurrently. If the docs already
+        hold every document for the current filter the counts are worked out locally instead.
+
+        Parameters
+        ----------
+        field : str
+            The field to group by, e.g. "movie" for quotes.
+        values : list[Union[str,int,float]]
+            The values of the field to count.
+
+        Returns
+        -------
+        dict
+            The number of matching documents keyed by value.
+        """
+
+        docs = self._local_docs()
+        if docs is not None:
+            counts = dict((str(value), 0) for value in values)
+            # A snapshot decodes the one column rather than building a view per document.
+            column = hasattr(docs, "column") and docs.column(field) or [getattr(doc, field, None) for doc in docs]
+            for value in column:
+                key = str(value)
+                if key in counts:
+                    counts[key] += 1
+            return dict((value, counts[str(value)]) for value in values)
+
+        filters = [
+            "&".join(f for f in [self.options.filter, f"{field}={value}"] if f is not None)
+            for value in values
+        ]
+        if len(filters) == 0:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.COUNT_WORKERS, len(filters))) as executor:
+            return dict(zip(values, _map_in_context(executor, self._count, filters)))
+
+    def sample(self, k: int, rng: random.Random = None) -> list:
+        """
+        Returns k random documents matching the current filter (fewer if there aren't k of them), without replacement.
+
+        The total is learnt from a metadata-only request, which is cached on the api (see TheOneApi.totals), and only
+        the chosen positions are then fetched with offset and limit requests, run concurrently. Positions within
+        SAMPLE_GAP of each other share a request, so the cost is at most k + 1 requests whatever the size of the
+        collection. When the docs or the api's snapshot hold every matching document the sample is taken locally. If
+        a request fails ApiError is raised, and nothing is cached.
+
+        Parameters
+        ----------
+        k : int
+            The number of documents to return.
+        rng : random.Random, optional
+            The random number generator to use, by default a new one.
+
+        Returns
+        -------
+        list[TheOneApiDocBase]
+            The sampled documents, in random order.
+        """
+
+        rng = rng or random.Random()
+        docs = self._local_docs()
+        if docs is not None:
+            return [docs[position] for position in rng.sample(range(len(docs)), min(k, len(docs)))]
+
+        key = (self.DOC_CLASS.KIND, self.options.filter)
+        total = self.api.totals.get(key)
+        if total is None:
+            total = self._count(self.options.filter, strict=True)
+            self.api.totals.set(key, total)
+        positions = rng.sample(range(total), min(k, total))
+        if len(positions) == 0:
+            return []
+
+        runs = []
+        for position in sorted(positions):
+            if len(runs) > 0 and position - runs[-1][1] <= self.SAMPLE_GAP:
+                runs[-1][1] = position
+            else:
+                runs.append([position, position])
+
+        def fetch_run(run: list) -> list:
+            options = self.options.replace(offset=run[0], limit=run[1] - run[0] + 1, page=None)
+            return self._hydrate(self._checked(self.request(options)))
+
+        found = {}
+        with ThreadPoolExecutor(max_workers=min(self.COUNT_WORKERS, len(runs))) as executor:
+            for run, docs in zip(runs, _map_in_context(executor, fetch_run, runs)):
+                found.update((run[0] + number, doc) for (number, doc) in enumerate(docs))
+        if any(position not in found for position in positions):
+            # The collection shrank since the total was cached.
+            self.api.totals.discard(key)
+        return [found[position] for position in positions if position in found]
+
+    def explain(self, operation: str = "fetch_all", probe: bool = False) -> QueryPlan:
+        """
+        Predicts what an operation on the collection with its current options will cost, without making it: the
+        number of requests to the API, whether it can be answered locally, and its share of the rate limit budget
+        and wall clock time. A job can call explain(...).check() to refuse to start when it would blow the budget.
+
+        The number of pages comes from the documents already known for the current filter (the docs, the snapshot,
+        the metadata of the last fetch, or a total cached by sample), so explaining is free. When none is known the
+        calls are None, unless probe is True, in which case one metadata-only request finds the total (and caches
+        it for later plans and samples). Requests a CacheMiddleware will answer are counted as cached rather than as
+        calls, the budget is read from a RateLimitMiddleware or QuotaScheduler, and the time from the api's recent
+        requests (see theoneapi.plan).
+
+        Parameters
+        ----------
+        operation : str, optional
+            "fetch", "fetch_all" (or "iter_pages", "iter_docs") or "count", by default "fetch_all"
+        probe : bool, optional
+            Whether to spend a request on finding an unknown total, by default False
+
+        Returns
+        -------
+        QueryPlan
+            The predicted requests, total, pages, budget and seconds.
+        """
+
+        docs = self._local_docs()
+        total, source = self._known_total(docs, probe)
+        limit = self.options.limit or self.DEFAULT_LIMIT
+
+        if operation == "count":
+            urls = docs is None and [self._url(RequestOptions(limit=1, filter=self.options.filter))] or []
+        elif operation == "fetch":
+            urls = [self._url(self.options)]
+        elif operation in ["fetch_all", "iter_pages", "iter_docs"]:
+            urls = None
+            if self.options.offset is not None:
+                urls = [self._url(self.options)]
+            elif total is not None:
+                first = self.options.page or 1
+                pages = range(first, max(first, -(-total // limit)) + 1)
+                urls = [self._url(self.options.replace(page=page)) for page in pages]
+        else:
+            raise ValueError(f"Can't explain {operation!r}, expected fetch, fetch_all, iter_pages, iter_docs or count")
+        return plan(self.api, operation, urls, total, limit, source)
+
+    def _known_total(self, docs: Optional[list], probe: bool) -> tuple:
+        # The number of documents matching the current filter, and where it came from, without a request if possible.
+        if docs is not None:
+            return len(docs), hasattr(docs, "column") and "snapshot" or "docs"
+        # Metadata from a response holds the total even when it is 0; a new collection's metadata has a limit of 0.
+        fetched = self._fetched_filter == self.options.filter and bool(self.metadata.get("limit"))
+        if fetched and self.metadata.get("total") is not None:
+            return self.metadata["total"], "metadata"
+        key = (self.DOC_CLASS.KIND, self.options.filter)
+        total = self.api.totals.get(key)
+        if total is not None:
+            return total, "totals"
+        if not probe:
+            return None, None
+        total = self._count(self.options.filter)
+        if total is None:
+            return None, None
+        self.api.totals.set(key, total)
+        return total, "probe"
+
+    def _url(self, options: "RequestOptions") -> str:
+        return options.url_with_query(self.api.BASE_URL + self.DOC_CLASS.KIND)
+
+    def _count(self, filter: str, strict: bool = False) -> Optional[int]:
+        # None for a failed request, unless strict, in which case ApiError is raised.
+        data = self.request(RequestOptions(limit=1, filter=filter))
+        if strict:
+            self._checked(data)
+        return data.get("total")
+
+    def _checked_pages(self) -> Iterator[dict]:
+        # The data of every page for the current options, raising ApiError at a failed page rather than stopping there.
+        page = self.options.page or 1
+        while True:
+            data = self._checked(self.request(self.options.replace(page=page)))
+            yield data
+            # The API ignores the page when an offset is given, so there is only one.
+            pages = data.get("pages")
+            if self.options.offset is not None or len(data["docs"]) == 0 or pages is None or page >= pages:
+                break
+            page += 1
+
+    def _checked(self, data: dict) -> dict:
+        # The data of a successful response, or ApiError for an error body, which has a message rather than docs.
+        if "docs" not in data or data.get("total") is None:
+            raise ApiError(f"The {self.DOC_CLASS.KIND} request failed: {data.get('message') or 'no documents'}")
+        return data
+
+    def _hydrate(self, data: dict) -> list:
+        hooks = self.api.hooks
+        event = hooks is not None and getattr(self.api._events, "last", None) or None
+        hydrating = event is not None and time.perf_counter()
+
+        # Docs go through the api's identity map, so each document is only ever represented by one object.
+        docs = [self.api.identity.hydrate(self.DOC_CLASS, self.api, doc) for doc in data["docs"]]
+        self._index(docs)
+
+        if event is not None:
+            self.api._events.last = None
+            event.documents = len(docs)
+            event.phases["hydrate"] = time.perf_counter() - hydrating
+            hooks.hydrated(event)
+        return docs
+
+    def _index(self, docs: list) -> None:
+        pass
+
+    def _by_id_local(self, id: str) -> bool:
+        doc = self.api._lookup(self.DOC_CLASS.KIND, id)
+        if doc is None:
+            return False
+
+        self.docs = [doc]
+        self.metadata = {"total": 1, "limit": 1000, "offset": 0, "page": 1, "pages": 1}
+        self._fetched_filter = f"_id={id}"
+        return True
+
+    def _local_docs(self) -> Optional[list]:
+        # An unfiltered query is answered by the api's snapshot when it holds this kind of document.
+        snapshot = self.api.snapshot
+        if self.options.filter is None and snapshot is not None and self.DOC_CLASS.KIND in snapshot:
+            return snapshot[self.DOC_CLASS.KIND]
+
+        # The docs can answer for the current filter only when they are the complete result of it.
+        if (
+            len(self.docs) > 0
+            and self.metadata["total"] == len(self.docs)
+            and self._fetched_filter == self.options.filter
+        ):
+            return self.docs
+
+        return None
+
 
 class TheOneApiDocBase:
     """
@@ -442,6 +924,9 @@ class TheOneApiDocBase:
 
     asdict() -> dict
         Returns a dictionary of the object's attributes.
+
+    to_record() -> dict
+        Returns the document in the form returned by the API, with "_id" rather than "id".
     """
 
     VALID_ATTRIBUTES = []
@@ -482,6 +967,21 @@ class TheOneApiDocBase:
 
         return {k: v for (k, v) in self.__dict__.items() if k in self.VALID_ATTRIBUTES}
 
+    def to_record(self) -> dict:
+        """
+        Returns the document in the form returned by the API, which from_dict turns back into the same document.
+
+        Returns
+        -------
+        dict
+            The known data members, with the id as "_id".
+        """
+
+        record = self.as_dict()
+        if "id" in record:
+            record["_id"] = record.pop("id")
+        return record
+
     def from_dict(self, api: "TheOneApi", data: dict) -> "TheOneApiDocBase":
         """
         Updates the attributes of the Movie object with the values from the data dict.
@@ -530,8 +1030,10 @@ class Movie(TheOneApiDocBase):
     -------
     quotes() -> Quotes
         Returns a Quotes object for the given Movie.
+        If the quotes were prefetched with Movies.prefetch_quotes they are returned without a request.
     """
 
+    KIND = "movie"
     VALID_ATTRIBUTES = [
         "id",
         "name",
@@ -556,6 +1058,10 @@ class Movie(TheOneApiDocBase):
             A Quotes object for the given Movie.
         """
 
+        prefetched = self.__dict__.get("_quotes")
+        if prefetched is not None:
+            return prefetched
+
         return Quotes(self.api).match("movie", self.id).fetch()
 
 
@@ -569,17 +1075,107 @@ class Quote(TheOneApiDocBase):
         The unique identifier for the quote.
     dialog : str
         The dialog of the quote.
-    movie : str
-        The unique identifier for the movie the quote is from.
-    character : str
+    movie : LazyReference
         The unique identifier for the movie the quote is from.
+        Calling movie.resolve() returns the Movie, batching the lookup with every other unresolved quote.
+    character : LazyReference
+        The unique identifier for the character the quote is from.
+        Calling character.resolve() returns the Character, batching the lookup with every other unresolved quote.
     """
 
+    KIND = "quote"
     VALID_ATTRIBUTES = ["id", "dialog", "movie", "character"]
+    REFERENCES = ["movie", "character"]
+
+    def __init__(self) -> None:
+        super().__init__()
+
+    def from_dict(self, api: "TheOneApi", data: dict) -> "Quote":
+        """
+        Updates the attributes of the Quote object with the values from the data dict.
+        The movie and character ids are wrapped in lazy references when an api is given.
+
+        Parameters
+        ----------
+        api : TheOneApi
+            The TheOneApi object that was used to make the request.
+        data : dict
+            A dictionary of key/value pairs to update the Quote object with.
+        """
+
+        super().from_dict(api, data)
+        if api is not None:
+            for field in self.REFERENCES:
+                if isinstance(self.__dict__.get(field), str):
+                    self.__dict__[field] = api.loaders[field].reference(self.__dict__[field])
+        return self
+
+
+class Character(TheOneApiDocBase):
+    """
+    A structure for representing a character's data returned from the-one-api.dev.
+
+    Attributes
+    ----------
+    id : str
+        The unique identifier for the character.
+    name : str
+        The name of the character.
+    race : str
+        The race of the character.
+    gender : str
+        The gender of the character.
+    birth : str
+        When the character was born.
+    death : str
+        When the character died.
+    realm : str
+        The realm of the character.
+    hair : str
+        The hair of the character.
+    height : str
+        The height of the character.
+    spouse : str
+        The spouse of the character.
+    wikiUrl : str
+        The url of the character's page on the LOTR wiki.
+
+    Methods
+    -------
+    quotes() -> Quotes
+        Returns a Quotes object for the given Character.
+    """
+
+    KIND = "character"
+    VALID_ATTRIBUTES = [
+        "id",
+        "name",
+        "race",
+        "gender",
+        "birth",
+        "death",
+        "realm",
+        "hair",
+        "height",
+        "spouse",
+        "wikiUrl",
+    ]
 
     def __init__(self) -> None:
         super().__init__()
 
+    def quotes(self) -> "Quotes":
+        """
+        Returns a Quotes object for the given Character.
+
+        Returns
+        -------
+        Quotes
+            A Quotes object for the given Character.
+        """
+
+        return Quotes(self.api).match("character", self.id).fetch()
+
 
 class Movies(TheOneApiBase):
     """
@@ -589,10 +1185,27 @@ class Movies(TheOneApiBase):
     ----------
     docs : list[Movie]
         The list of Movie objects returned by the request.
+
+    Methods
+    -------
+    resolve(name: str, limit: int = 5) -> list[NameMatch]
+        Resolves a human entered movie name to ranked movie ids using the local name index.
+
+    to_arrays() -> MovieArrays
+        Returns NumPy columns of the numeric movie fields for vectorised analytics.
+
+    prefetch_quotes(limit: int = None) -> Movies
+        Fetches the quotes of every movie in docs with one paginated query so Movie.quotes() is served from memory.
     """
 
+    DOC_CLASS = Movie
+
     def __init__(self, api: "TheOneApi", options: "RequestOptions" = None) -> None:
         super().__init__(api, options)
+        self._arrays = (None, None)
+
+    def _index(self, docs: list) -> None:
+        self.api.names.add_all("movie", ((getattr(movie, "name", None), movie.id) for movie in docs))
 
     # TODO: Error handling - sending a page number of 0 or less returns an error message JSON
     def fetch(self) -> "Movies":
@@ -606,13 +1219,48 @@ class Movies(TheOneApiBase):
         """
 
         self.docs = []
-        data = self.api.movies(self.options)
+        data = self.request(self.options)
         super().set_metadata(data)
+        self._fetched_filter = self.options.filter
 
         if "docs" in data:
-            self.docs = [Movie().from_dict(self.api, movie) for movie in data["docs"]]
+            self.docs = self._hydrate(data)
 
         return self
+
+    def request(self, options: "RequestOptions") -> dict:
+        """
+        Makes the low-level movies request with the given options and returns the raw response data.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request.
+
+        Returns
+        -------
+        dict
+            The data returned by the API.
+        """
+
+        return self.api.movies(options)
+
+    def stream_request(self, options: "RequestOptions") -> DocStream:
+        """
+        Makes the low-level movies request with the given options, streaming the response.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request.
+
+        Returns
+        -------
+        DocStream
+            The raw movie documents, decoded as they arrive.
+        """
+
+        return self.api.stream("movie", options)
     
     def by_id(self, id: str) -> "Movies":
         """
@@ -629,14 +1277,133 @@ class Movies(TheOneApiBase):
             The object for chaining.
         """
 
+        if self._by_id_local(id):
+            self.match("_id", id)
+            self._fetched_filter = self.options.filter
+            return self
+
         self.docs = []
         data = self.api.movie(id)
         super().set_metadata(data)
         # TODO - there's probably more work to be done here to reset the RequestOptions in an ideal way
         self.match("_id", id)
+        self._fetched_filter = self.options.filter
 
         if "docs" in data:
-            self.docs = [Movie().from_dict(self.api, movie) for movie in data["docs"]]
+            self.docs = self._hydrate(data)
+
+        return self
+
+    def resolve(self, name: str, limit: int = 5) -> list[NameMatch]:
+        """
+        Resolves a human entered movie name (e.g. "fellowship") to ranked movie ids without calling the API.
+
+        Matches come from the name index kept on the TheOneApi object, which holds every movie that has been
+        fetched through it so far.
+
+        Parameters
+        ----------
+        name : str
+            The (partial or misspelled) movie name.
+        limit : int, optional
+            The maximum number of matches to return, by default 5
+
+        Returns
+        -------
+        list[NameMatch]
+            The matching movies, best first.
+        """
+
+        return self.api.names.resolve("movie", name, limit)
+
+    def explain(self, operation: str = "fetch_all", probe: bool = False) -> QueryPlan:
+        """
+        Predicts what an operation will cost, as TheOneApiBase.explain, with two more operations: "quotes", calling
+        Movie.quotes() for every movie in docs (one request per movie whose quotes weren't prefetched), and
+        "prefetch_quotes".
+
+        Parameters
+        ----------
+        operation : str, optional
+            "fetch", "fetch_all", "count", "quotes" or "prefetch_quotes", by default "fetch_all"
+        probe : bool, optional
+            Whether to spend a request on finding an unknown total, by default False
+
+        Returns
+        -------
+        QueryPlan
+            The predicted requests, total, pages, budget and seconds.
+        """
+
+        if operation == "quotes":
+            pending = [Quotes(self.api).match("movie", movie.id) for movie in self.docs
+                       if "_quotes" not in movie.__dict__]
+            urls = [quotes._url(quotes.options) for quotes in pending]
+            return plan(self.api, operation, urls, None, Quotes.DEFAULT_LIMIT)
+        if operation == "prefetch_quotes":
+            quotes = Quotes(self.api).include("movie", [movie.id for movie in self.docs])
+            return quotes.explain("fetch_all", probe)._replace(operation=operation)
+        return super().explain(operation, probe)
+
+    def to_arrays(self) -> MovieArrays:
+        """
+        Returns NumPy columns of the numeric movie fields for vectorised analytics (requires numpy).
+
+        The columns are built once per fetch and reused until the docs change.
+
+        Returns
+        -------
+        MovieArrays
+            The column oriented view of the docs.
+        """
+
+        docs, arrays = self._arrays
+        if docs is not self.docs:
+            arrays = MovieArrays.from_movies(self.docs)
+            self._arrays = (self.docs, arrays)
+
+        return arrays
+
+    def prefetch_quotes(self, limit: int = None) -> "Movies":
+        """
+        Fetches the quotes of every movie in docs and attaches them to the movies, so that later calls to
+        Movie.quotes() are answered from memory.
+
+        All of the quotes are fetched with one include("movie", ids) query, paging through every page of results,
+        instead of one request (and only the first page) per movie. Nothing is attached unless every page was fetched,
+        so a failed request (raising ApiError) leaves Movie.quotes() to fetch the quotes itself.
+
+        Parameters
+        ----------
+        limit : int, optional
+            The page size to use when fetching the quotes, by default the API's default.
+
+        Returns
+        -------
+        Movies
+            The object for chaining.
+        """
+
+        ids = [movie.id for movie in self.docs]
+        if len(ids) == 0:
+            return self
+
+        quotes = Quotes(self.api).include("movie", ids)
+        if limit is not None:
+            quotes.limit(limit)
+
+        by_movie = dict((id, []) for id in ids)
+        for data in quotes._checked_pages():
+            for quote in quotes._hydrate(data):
+                by_movie.setdefault(quote.movie, []).append(quote)
+
+        for movie in self.docs:
+            docs = by_movie[movie.id]
+            movie_quotes = Quotes(self.api).match("movie", movie.id)
+            movie_quotes.docs = docs
+            movie_quotes.metadata = {"total": len(docs), "limit": len(docs), "offset": 0, "page": 1, "pages": 1}
+            movie_quotes._fetched_filter = movie_quotes.options.filter
+            movie.__dict__["_quotes"] = movie_quotes
 
         return self
 
@@ -649,11 +1416,26 @@ class Quotes(TheOneApiBase):
     ----------
     docs : list[Quote]
         The list of Quote objects returned by the request.
+
+    Methods
+    -------
+    resolve_character(name: str, limit: int = 5) -> list[NameMatch]
+        Resolves a character name or partial id to ranked character ids using the local name index.
     """
 
+    DOC_CLASS = Quote
+
     def __init__(self, api: "TheOneApi", options: "RequestOptions" = None) -> None:
         super().__init__(api, options)
 
+    def _index(self, docs: list) -> None:
+        # Only the ids are known for characters seen in quotes, so they never replace an indexed name.
+        characters = set(getattr(quote, "character", None) for quote in docs)
+        self.api.names.add_all(
+            "character",
+            ((character, character) for character in characters if ("character", character) not in self.api.names),
+        )
+
     def fetch(self) -> "Quotes":
         """
         Fetches quote data from the API using the given options and returns the object for chaining.
@@ -665,39 +1447,225 @@ class Quotes(TheOneApiBase):
         """
 
         self.docs = []
-        data = self.api.quotes(self.options)
+        data = self.request(self.options)
         super().set_metadata(data)
+        self._fetched_filter = self.options.filter
 
         if "docs" in data:
-            self.docs = [Quote().from_dict(self.api, quote) for quote in data["docs"]]
+            self.docs = self._hydrate(data)
 
         return self
 
-    def by_id(self, id: str) -> "Quotes":
+    def request(self, options: "RequestOptions") -> dict:
         """
-        Gets a specific quote by id.
+        Makes the low-level quotes request with the given options and returns the raw response data.
 
         Parameters
         ----------
-        id : str
-            The id to match.
+        options : RequestOptions
+            The options to use when making the request.
 
         Returns
         -------
-        TheOneApiBase
-            The object for chaining.
+        dict
+            The data returned by the API.
         """
 
+        return self.api.quotes(options)
+
+    def stream_request(self, options: "RequestOptions") -> DocStream:
+        """
+        Makes the low-level quotes request with the given options, streaming the response.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request.
+
+        Returns
+        -------
+        DocStream
+            The raw quote documents, decoded as they arrive.
+        """
+
+        return self.api.stream("quote", options)
+
+    def by_id(self, id: str) -> "Quotes":
+        """
+        Gets a specific quote by id.
+
+        Parameters
+        ----------
+        id : str
+            The id to match.
+
+        Returns
+        -------
+        TheOneApiBase
+            The object for chaining.
+        """
+
+        if self._by_id_local(id):
+            return self
+
         self.docs = []
         data = self.api.quote(id)
         super().set_metadata(data)
+        self._fetched_filter = f"_id={id}"
 
         # TODO - what happens if self.api is None?
         if "docs" in data:
-            self.docs = [Quote().from_dict(self.api, quote) for quote in data["docs"]]
+            self.docs = self._hydrate(data)
 
         return self
 
+    def resolve_character(self, name: str, limit: int = 5) -> list[NameMatch]:
+        """
+        Resolves a character name or partial id to ranked character ids without calling the API.
+
+        Character ids seen in fetched quotes are indexed automatically. Character names can be added
+        with TheOneApi.names.add("character", name, id).
+
+        Parameters
+        ----------
+        name : str
+            The (partial or misspelled) character name or id.
+        limit : int, optional
+            The maximum number of matches to return, by default 5
+
+        Returns
+        -------
+        list[NameMatch]
+            The matching characters, best first.
+        """
+
+        return self.api.names.resolve("character", name, limit)
+
+
+class Characters(TheOneApiBase):
+    """
+    A class for retrieving a list of characters from the-one-api.dev and representing them as a list of Character objects.
+
+    Attributes
+    ----------
+    docs : list[Character]
+        The list of Character objects returned by the request.
+
+    Methods
+    -------
+    resolve(name: str, limit: int = 5) -> list[NameMatch]
+        Resolves a human entered character name to ranked character ids using the local name index.
+    """
+
+    DOC_CLASS = Character
+
+    def __init__(self, api: "TheOneApi", options: "RequestOptions" = None) -> None:
+        super().__init__(api, options)
+
+    def _index(self, docs: list) -> None:
+        self.api.names.add_all("character", ((getattr(character, "name", None), character.id) for character in docs))
+
+    def fetch(self) -> "Characters":
+        """
+        Fetches character data from the API using the given options and returns the object for chaining.
+
+        Returns
+        -------
+        TheOneApiBase
+            The object for chaining.
+        """
+
+        self.docs = []
+        data = self.request(self.options)
+        super().set_metadata(data)
+        self._fetched_filter = self.options.filter
+
+        if "docs" in data:
+            self.docs = self._hydrate(data)
+
+        return self
+
+    def request(self, options: "RequestOptions") -> dict:
+        """
+        Makes the low-level characters request with the given options and returns the raw response data.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request.
+
+        Returns
+        -------
+        dict
+            The data returned by the API.
+        """
+
+        return self.api.characters(options)
+
+    def stream_request(self, options: "RequestOptions") -> DocStream:
+        """
+        Makes the low-level characters request with the given options, streaming the response.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request.
+
+        Returns
+        -------
+        DocStream
+            The raw character documents, decoded as they arrive.
+        """
+
+        return self.api.stream("character", options)
+
+    def by_id(self, id: str) -> "Characters":
+        """
+        Gets a specific character by id.
+
+        Parameters
+        ----------
+        id : str
+            The id to match.
+
+        Returns
+        -------
+        TheOneApiBase
+            The object for chaining.
+        """
+
+        if self._by_id_local(id):
+            return self
+
+        self.docs = []
+        data = self.api.character(id)
+        super().set_metadata(data)
+        self._fetched_filter = f"_id={id}"
+
+        if "docs" in data:
+            self.docs = self._hydrate(data)
+
+        return self
+
+    def resolve(self, name: str, limit: int = 5) -> list[NameMatch]:
+        """
+        Resolves a human entered character name to ranked character ids without calling the API.
+
+        Parameters
+        ----------
+        name : str
+            The (partial or misspelled) character name.
+        limit : int, optional
+            The maximum number of matches to return, by default 5
+
+        Returns
+        -------
+        list[NameMatch]
+            The matching characters, best first.
+        """
+
+        return self.api.names.resolve("character", name, limit)
+
 
 class RequestOptions:
     """
@@ -722,6 +1690,10 @@ class RequestOptions:
     -------
     url_with_query(url: str)
         Returns the url with the query options included as a query string.
+    replace(**changes) -> RequestOptions
+        Returns a copy of the options with the given attributes changed.
+    freeze() -> Query
+        Returns an immutable, hashable Query with the same options.
     """
 
     def __init__(
@@ -761,6 +1733,7 @@ class RequestOptions:
 
         For each of the defined options, if the option is not None, then add an appropriate part of the query string.
         Join all the parts with a '&' and include a '?' at the beginning as needed and return the resultant url.
+        The options themselves are left unchanged, so the same options can be used for any number of requests.
 
         Parameters
         ----------
@@ -773,6 +1746,91 @@ class RequestOptions:
             The url with the query options included as a query string.
         """
 
+        return self.freeze().url_with_query(url)
+
+    def replace(self, **changes) -> "RequestOptions":
+        """
+        Returns a copy of the options with the given attributes changed, leaving these options untouched.
+
+        Parameters
+        ----------
+        **changes
+            The attributes to change, e.g. page=2.
+
+        Returns
+        -------
+        RequestOptions
+            The new options.
+        """
+
+        options = dict(limit=self.limit, page=self.page, offset=self.offset, sort=self.sort, filter=self.filter)
+        options.update(changes)
+        return RequestOptions(**options)
+
+    def freeze(self) -> "Query":
+        """
+        Returns an immutable, hashable Query with the same options.
+
+        Returns
+        -------
+        Query
+            The frozen options.
+        """
+
+        return Query(limit=self.limit, page=self.page, offset=self.offset, sort=self.sort, filter=self.filter)
+
+
+@dataclass(frozen=True)
+class Query:
+    """
+    An immutable, hashable version of RequestOptions.
+
+    The sort is stored in its canonical "field:asc" / "field:desc" form, so equivalent queries compare (and hash)
+    equal, and the query string is only built once per Query. A Query can therefore be shared freely between
+    threads, reused for any number of requests and used as a cache key. It can be passed anywhere RequestOptions
+    can, and replace returns a new Query rather than changing this one.
+
+    Attributes
+    ----------
+    limit : int
+        The number of results to return per page.
+    page : int
+        The page number to return.
+    offset : int
+        The number of results to skip before returning results.
+    sort : str
+        The field to sort by, as "field:asc" or "field:desc". "+field", "-field" and "field" are accepted too.
+    filter : str
+        A mongoDB style query string.
+    query_string : str
+        The canonical query string (without the leading "?"), built once.
+
+    Methods
+    -------
+    url_with_query(url: str) -> str
+        Returns the url with the query string appended.
+    replace(**changes) -> Query
+        Returns a new Query with the given attributes changed.
+    """
+
+    limit: Optional[int] = None
+    page: Optional[int] = None
+    offset: Optional[int] = None
+    sort: Optional[str] = None
+    filter: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.sort and self.sort[-4:] != ":asc" and self.sort[-5:] != ":desc":
+            if self.sort[0] == "-":
+                sort = self.sort[1:] + ":desc"
+            elif self.sort[0] == "+":
+                sort = self.sort[1:] + ":asc"
+            else:
+                sort = self.sort + ":asc"
+            object.__setattr__(self, "sort", sort)
+
+    @cached_property
+    def query_string(self) -> str:
         url_option_strings = []
 
         if self.offset is not None:
@@ -783,21 +1841,57 @@ class RequestOptions:
         if self.page is not None and self.offset is None:
             url_option_strings.append("page=" + str(self.page))
         if self.sort is not None:
-            if self.sort[0] == "-":
-                self.sort = self.sort[1:] + ":desc"
-            elif self.sort[0] == "+":
-                self.sort = self.sort[1:] + ":asc"
-            else:
-                self.sort = self.sort + ":asc"
             url_option_strings.append("sort=" + self.sort)
         if self.filter is not None:
             url_option_strings.append(self.filter)
 
-        return (
-            len(url_option_strings) > 0
-            and url + "?" + "&".join(url_option_strings)
-            or url
-        )
+        return "&".join(url_option_strings)
+
+    def url_with_query(self, url: str) -> str:
+        """
+        Returns the url with the query string appended.
+
+        Parameters
+        ----------
+        url : str
+            The url to add the query options to.
+
+        Returns
+        -------
+        str
+            The url with the query options included as a query string.
+        """
+
+        return len(self.query_string) > 0 and url + "?" + self.query_string or url
+
+    def replace(self, **changes) -> "Query":
+        """
+        Returns a new Query with the given attributes changed.
+
+        Parameters
+        ----------
+        **changes
+            The attributes to change, e.g. page=2.
+
+        Returns
+        -------
+        Query
+            The new query.
+        """
+
+        return replace(self, **changes)
+
+    def freeze(self) -> "Query":
+        """
+        Returns the Query itself, since it is already immutable.
+
+        Returns
+        -------
+        Query
+            This query.
+        """
+
+        return self
 
 
 class TheOneApi:
@@ -814,6 +1908,37 @@ class TheOneApi:
     ----------
     api_key : str
         The API key to use when making requests to The One API
+    names : NameIndex
+        A local index of the movie names and character ids seen in responses, used for resolving names.
+    identity : IdentityMap
+        Weak references to every hydrated document by kind and id, used to answer by_id without a request.
+    loaders : dict[str, BatchLoader]
+        The batch loaders used to resolve the lazy "movie" and "character" references of quotes.
+    not_found : NegativeCache
+        The ids which the API recently reported as not found, so looking them up again doesn't make a request.
+    known_ids : dict[str, BloomFilter]
+        Optional Bloom filters of every existing id by kind. Ids missing from a filter are rejected locally.
+    snapshot : Snapshot
+        The memory-mapped snapshot opened with use_snapshot, or None.
+    transfers : deque[TransferStats]
+        The compressed and decompressed size of the most recent TRANSFER_HISTORY responses.
+    latencies : deque[float]
+        The seconds until the headers arrived of the most recent TRANSFER_HISTORY requests, used by explain.
+    totals : TTLCache
+        The totals learnt by sample, keyed by kind and filter, kept for totals_ttl seconds.
+    breakers : dict[str, CircuitBreaker]
+        The circuit breaker of each endpoint. While one is open, requests to its endpoint fall back or fail fast.
+    stale : TTLCache
+        The last good list response of each url, used as a fallback while the API is failing. It is only filled when
+        fallback is set, and holds at most STALE_MAX_DOCS documents.
+    hooks : Hooks
+        The instrumentation hooks which receive a RequestEvent for every request, or None.
+    BASE_URL : str
+        The url of the API, https://the-one-api.dev/v2/ unless a base_url was given.
+    transport : Transport
+        Sends the HTTP requests, by default over the network with an HttpTransport.
+    middleware : list[Middleware]
+        The request pipeline every request passes through on its way to the transport, outermost first.
 
     Methods
     -------
@@ -827,19 +1952,132 @@ class TheOneApi:
         Returns a quote collection containing one movie from The One API based on the provided quote id.
     movie_quotes(id: str)
         Returns a quote collection containing quotes from one movie from The One API based on the provided movie id.
+    characters(options: RequestOptions = None)
+        Returns a list of characters (paginated, sorted, or filtered) from The One API based on the provided options.
+    character(id: str)
+        Returns a character collection containing one character from The One API based on the provided character id.
+    books(options: RequestOptions = None) / book(id: str) / book_chapters(id: str, options: RequestOptions = None)
+        Return books, one book, or the chapters of a book from The One API.
+    get(path: str, options: RequestOptions = None)
+        Requests any endpoint of The One API through the middleware pipeline.
+    stream(endpoint: str, options: RequestOptions = None)
+        Returns the documents of a list endpoint as a DocStream, decoded as the response arrives.
+    transfer_summary()
+        Returns the total size of the responses read, on the wire and after decompression.
+    load_known_ids(kind: str, ids: Iterable[str], error_rate: float = 0.001)
+        Builds the Bloom filter of every existing id of a kind, e.g. from a full listing.
+    save_snapshot(path: str, kinds: list[str] = None)
+        Fetches every document of the given kinds and writes them to a snapshot file.
+    use_snapshot(path: str, known_ids: bool = False)
+        Opens a snapshot file and answers unfiltered counts and by_id lookups from it.
+    from_bytes(data: bytes)
+        Decodes a collection encoded with to_bytes, e.g. by another process.
+    sync_snapshot(path: str = None, page_size: int = None, verify: bool = False)
+        Brings a snapshot file up to date, re-fetching only the pages that changed.
     """
 
+    NOT_FOUND = {"docs": [], "total": 0, "limit": 1000, "offset": 0, "page": 1, "pages": 0}
+
+    COLLECTIONS = {"movie": Movies, "quote": Quotes, "character": Characters}
+
+    ACCEPT_ENCODING = accept_encoding()
+
+    TRANSFER_HISTORY = 100
+
+    STALE_MAX_DOCS = 10000
+
     BASE_URL = "https://the-one-api.dev/v2/"
 
-    def __init__(self, api_key) -> None:
+    def __init__(
+        self,
+        api_key,
+        identity_ttl: float = 3600,
+        identity_maxsize: int = None,
+        not_found_ttl: float = 300,
+        totals_ttl: float = 300,
+        timeout: Union[float, tuple] = (3.05, 30),
+        breaker_options: dict = None,
+        fallback: bool = True,
+        stale_ttl: float = 86400,
+        hooks: Hooks = None,
+        base_url: str = None,
+        transport: Transport = None,
+        middleware: list[Middleware] = None,
+    ) -> None:
         """
         Parameters
         ----------
         api_key : str
             The API key to use when making requests to The One API
+        identity_ttl : float, optional
+            How many seconds a fetched document can be reused by by_id, by default 3600. None means forever.
+        identity_maxsize : int, optional
+            The maximum number of documents kept in the identity map, by default None (no limit).
+        not_found_ttl : float, optional
+            How many seconds an id which was not found is remembered, by default 300
+        totals_ttl : float, optional
+            How many seconds the total of a collection is reused by sample, by default 300
+        timeout : Union[float, tuple], optional
+            The connect and read timeouts of each request in seconds, by default (3.05, 30)
+        breaker_options : dict, optional
+            Keyword arguments for the CircuitBreaker of each endpoint, e.g. {"reset_timeout": 60}.
+        fallback : bool, optional
+            Whether to answer from the last good response or the snapshot when a request fails or its circuit is
+            open, rather than raising, by default True
+        stale_ttl : float, optional
+            How many seconds the last good response of each url is kept for falling back to (up to STALE_MAX_DOCS
+            documents in all), by default 86400
+        hooks : Hooks, optional
+            Receives a RequestEvent with the timing, size and outcome of every request (see theoneapi.hooks), by
+            default None, in which case no events are created.
+        base_url : str, optional
+            The url of the API to use instead of BASE_URL, e.g. the url of a local StandInServer (see
+            theoneapi.server), by default None
+        transport : Transport, optional
+            Sends the HTTP requests (see theoneapi.transport), by default an HttpTransport. A RecordingTransport
+            records the responses to a cassette file and a ReplayTransport answers from one without the network.
+        middleware : list[Middleware], optional
+            The request pipeline, outermost first (see theoneapi.middleware), e.g.
+            [CacheMiddleware(), RetryMiddleware(), RateLimitMiddleware()]. By default there is none.
         """
 
         self._api_key = api_key
+        self.BASE_URL = base_url or self.BASE_URL
+        self.transport = transport or HttpTransport()
+        self.middleware = list(middleware or [])
+        self.names = NameIndex()
+        self.identity = IdentityMap(identity_ttl, identity_maxsize)
+        self.not_found = NegativeCache(not_found_ttl)
+        self.totals = TTLCache(totals_ttl)
+        self.timeout = timeout
+        self.fallback = fallback
+        self.stale = TTLCache(stale_ttl, maxsize=self.STALE_MAX_DOCS, weigh=lambda data: max(1, len(data["docs"])))
+        self.breakers = {}
+        self._breaker_options = breaker_options or {}
+        self._breakers_lock = threading.Lock()
+        self.hooks = hooks
+        self._events = threading.local()
+        self.known_ids = {}
+        self.snapshot = None
+        self._snapshot_known_ids = False
+        self.transfers = deque(maxlen=self.TRANSFER_HISTORY)
+        self.latencies = deque(maxlen=self.TRANSFER_HISTORY)
+        self._transfer_totals = (0, 0, 0)
+        self._transfer_lock = threading.Lock()
+        self.loaders = {
+            "movie": BatchLoader(
+                lambda ids: self._load_many("movie", ids),
+                lookup=lambda id: self._lookup("movie", id),
+                kind="movie",
+                not_found=self.not_found,
+            ),
+            "character": BatchLoader(
+                lambda ids: self._load_many("character", ids),
+                lookup=lambda id: self._lookup("character", id),
+                kind="character",
+                not_found=self.not_found,
+            ),
+        }
 
     def movies(self, options: RequestOptions = None) -> dict:
         """
@@ -857,12 +2095,7 @@ class TheOneApi:
 
         """
 
-        # TODO - Deal with error conditions - get happy path working first
-        url = self.BASE_URL + "movie"
-        url = options and options.url_with_query(url) or url
-        headers = {"Authorization": "Bearer " + self._api_key}
-        response = requests.get(url, headers=headers)
-        return response.json()
+        return self.get("movie", options)
 
     def movie(self, id: str) -> dict:
         """
@@ -880,11 +2113,7 @@ class TheOneApi:
 
         """
 
-        # TODO - Deal with error conditions - get happy path working first
-        url = self.BASE_URL + "movie/" + id
-        headers = {"Authorization": "Bearer " + self._api_key}
-        response = requests.get(url, headers=headers)
-        return response.json()
+        return self._document("movie", id)
     
     def quotes(self, options: RequestOptions = None) -> dict:
         """
@@ -902,12 +2131,7 @@ class TheOneApi:
 
         """
             
-        # TODO - Deal with error conditions - get happy path working first
-        url = f"{self.BASE_URL}quote"
-        url = options and options.url_with_query(url) or url
-        headers = {"Authorization": "Bearer " + self._api_key}
-        response = requests.get(url, headers=headers)
-        return response.json()
+        return self.get("quote", options)
     
     def quote(self, id: str) -> dict:
         """
@@ -925,11 +2149,7 @@ class TheOneApi:
 
         """
             
-        # TODO - Deal with error conditions - get happy path working first
-        url = f"{self.BASE_URL}quote/{id}"
-        headers = {"Authorization": "Bearer " + self._api_key}
-        response = requests.get(url, headers=headers)
-        return response.json()
+        return self._document("quote", id)
     
     def movie_quotes(self, id: str, options: RequestOptions = None) -> dict:
         """
@@ -946,9 +2166,514 @@ class TheOneApi:
             A quote collection from The One API based on the provided movie id.
 
         """
-        # TODO - Deal with error conditions - get happy path working first
-        url = f"{self.BASE_URL}movie/{id}/quote"
+        return self.get(f"movie/{id}/quote", options)
+
+    def characters(self, options: RequestOptions = None) -> dict:
+        """
+        Returns a list of characters (paginated, sorted, or filtered) from The One API based on the provided options.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request. Default is None.
+
+        Returns
+        -------
+        list[dict]
+            A list of characters from The One API based on the provided options.
+
+        """
+
+        return self.get("character", options)
+
+    def character(self, id: str) -> dict:
+        """
+        Returns a character collection containing one character from The One API based on the provided character id.
+
+        Parameters
+        ----------
+        id : str
+            The id of the character to return.
+
+        Returns
+        -------
+        dict
+            A character from The One API based on the provided character id.
+
+        """
+
+        return self._document("character", id)
+
+    def books(self, options: RequestOptions = None) -> dict:
+        """
+        Returns a list of books (paginated, sorted, or filtered) from The One API based on the provided options.
+
+        Parameters
+        ----------
+        options : RequestOptions
+            The options to use when making the request. Default is None.
+
+        Returns
+        -------
+        dict
+            A list of books from The One API based on the provided options.
+        """
+
+        return self.get("book", options)
+
+    def book(self, id: str) -> dict:
+        """
+        Returns a book collection containing one book from The One API based on the provided book id.
+
+        Parameters
+        ----------
+        id : str
+            The id of the book to return.
+
+        Returns
+        -------
+        dict
+            A book from The One API based on the provided book id.
+        """
+
+        return self._document("book", id)
+
+    def book_chapters(self, id: str, options: RequestOptions = None) -> dict:
+        """
+        Returns the chapters of one book from The One API based on the provided book id.
+
+        Parameters
+        ----------
+        id : str
+            The id of the book to return chapters for.
+        options : RequestOptions
+            The options to use when making the request. Default is None.
+
+        Returns
+        -------
+        dict
+            A chapter collection from The One API based on the provided book id.
+        """
+
+        return self.get(f"book/{id}/chapter", options)
+
+    def get(self, path: str, options: RequestOptions = None) -> dict:
+        """
+        Requests any endpoint of the API through the middleware pipeline and returns the decoded response. Every
+        low-level function is built on this, so an endpoint without one of its own is requested the same way.
+
+        Parameters
+        ----------
+        path : str
+            The endpoint relative to BASE_URL, e.g. "chapter" or "book/{id}/chapter".
+        options : RequestOptions
+            The options to use when making the request. Default is None.
+
+        Returns
+        -------
+        dict
+            The decoded response.
+        """
+
+        url = self.BASE_URL + path
         url = options and options.url_with_query(url) or url
-        headers = {"Authorization": "Bearer " + self._api_key}
-        response = requests.get(url, headers=headers)
-        return response.json()
\ No newline at end of file
+        return self._get(url)
+
+    def stream(self, endpoint: str, options: RequestOptions = None, chunk_size: int = 65536) -> DocStream:
+        """
+        Requests a list endpoint and returns its documents as a DocStream, which decodes them one by one as the
+        response arrives instead of buffering the whole body like response.json().
+
+        Parameters
+        ----------
+        endpoint : str
+            The list endpoint, e.g. "quote" or "movie".
+        options : RequestOptions
+            The options to use when making the request. Default is None.
+        chunk_size : int, optional
+            The number of bytes read from the response at a time, by default 65536
+
+        Returns
+        -------
+        DocStream
+            The documents, with the metadata filled in once they have all been read.
+        """
+
+        url = self.BASE_URL + endpoint
+        url = options and options.url_with_query(url) or url
+        if self.hooks is None:
+            return DocStream(self._open(url, chunk_size))
+
+        event = self._start_event(url)
+        try:
+            body = self._open(url, chunk_size, event)
+        except Exception as error:
+            event.error = repr(error)
+            self._finish_event(event)
+            raise
+        return DocStream(self._stream_events(body, event))
+
+    def transfer_summary(self) -> dict:
+        """
+        Returns the number of responses read and their total size on the wire and after decompression.
+
+        Returns
+        -------
+        dict
+            The requests, compressed_bytes, decompressed_bytes and ratio (decompressed / compressed).
+        """
+
+        with self._transfer_lock:
+            requests_made, compressed, decompressed = self._transfer_totals
+        return {
+            "requests": requests_made,
+            "compressed_bytes": compressed,
+            "decompressed_bytes": decompressed,
+            "ratio": compressed and decompressed / compressed or 1.0,
+        }
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """
+        Returns the circuit breaker of an endpoint, creating it with the breaker options if needed.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint, e.g. "quote".
+
+        Returns
+        -------
+        CircuitBreaker
+            The endpoint's breaker.
+        """
+
+        with self._breakers_lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(**self._breaker_options)
+            return self.breakers[endpoint]
+
+    def _get(self, url: str) -> dict:
+        return self._answer(url)[0]
+
+    def _answer(self, url: str) -> tuple:
+        # The decoded response, and whether it was answered by the fallback rather than the API.
+        event = self.hooks is not None and self._start_event(url) or None
+        try:
+            body = self._open(url, event=event)
+            fallback = isinstance(body, FallbackBody)
+            if fallback:
+                data = body.data
+            else:
+                raw = b"".join(body)
+                decoding = time.perf_counter()
+                data = json.loads(raw)
+                if event is not None:
+                    event.phases["decode"] = time.perf_counter() - decoding
+                if self.fallback and "docs" in data:
+                    self.stale.set(url, data)
+        except Exception as error:
+            if event is not None:
+                event.error = repr(error)
+                self._finish_event(event)
+            raise
+
+        if event is not None:
+            self._finish_event(event)
+        return data, fallback
+
+    def _open(self, url: str, chunk_size: int = 65536, event: RequestEvent = None) -> Iterator[bytes]:
+        endpoint = url[len(self.BASE_URL):].split("?")[0].split("/")[0]
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            return self._fall_back(url, event, CircuitOpenError(endpoint, breaker.retry_after()))
+
+        # Compression is negotiated explicitly and undone here rather than by the transport, so that both the bytes
+        # on the wire and the decompressed bytes can be counted, and streamed bodies are decompressed as they arrive.
+        headers = {"Authorization": "Bearer " + self._api_key, "Accept-Encoding": self.ACCEPT_ENCODING}
+        request = Request(url, url[len(self.BASE_URL):], headers, self.timeout, chunk_size, event)
+        try:
+            response = chain(self.middleware, self._transmit)(request)
+        except requests.RequestException as error:
+            breaker.record_failure()
+            return self._fall_back(url, event, error)
+        if event is not None:
+            event.status = response.status_code
+        if response.status_code >= 500:
+            breaker.record_failure()
+            fallback = self.fallback and self._fallback(url) or None
+            if fallback is not None:
+                response.close()
+                return self._fall_back(url, event, None, fallback)
+
+        encoding = response.headers.get("Content-Encoding", "")
+        on_done = event is None and self._record_transfer or (lambda stats: self._record_transfer(stats, event))
+        if response.headers.get("X-Cache") == "HIT":
+            # Answered by a CacheMiddleware, so nothing was transferred.
+            on_done = None
+        return self._guard(decode_body(response.body, encoding, url, on_done), breaker, response.status_code)
+
+    def _transmit(self, request: Request) -> Response:
+        # The last step of the middleware pipeline. Everything before it (e.g. rate limiting) is queueing.
+        event = request.event
+        sending = time.perf_counter()
+        if event is not None:
+            event.phases["queue"] = sending - event.started
+        response = self.transport.send(request.url, request.headers, request.timeout, request.chunk_size)
+        ttfb = time.perf_counter() - sending
+        self.latencies.append(ttfb)
+        if event is not None:
+            event.phases["ttfb"] = ttfb
+        return response
+
+    def _fall_back(self, url: str, event: RequestEvent, error: Exception, fallback: dict = None) -> FallbackBody:
+        fallback = fallback or self.fallback and self._fallback(url) or None
+        if fallback is None:
+            raise error
+        if event is not None:
+            event.cache = "fallback"
+        return FallbackBody(fallback)
+
+    def _guard(self, body: Iterator[bytes], breaker: CircuitBreaker, status: int) -> Iterator[bytes]:
+        # A read timeout can happen part way through the body, so the outcome is only known once it has been read.
+        try:
+            yield from body
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        if status < 500:
+            breaker.record_success()
+
+    def _start_event(self, url: str) -> RequestEvent:
+        return RequestEvent(url, url_template(url[len(self.BASE_URL):]))
+
+    def _finish_event(self, event: RequestEvent) -> None:
+        # Kept for the collection that hydrates the response, which adds the hydrate phase (see TheOneApiBase).
+        self._events.last = event
+        self.hooks.request_finished(event)
+
+    def _stream_events(self, body: Iterator[bytes], event: RequestEvent) -> Iterator[bytes]:
+        try:
+            yield from body
+        except Exception as error:
+            event.error = repr(error)
+            raise
+        finally:
+            self._finish_event(event)
+
+    def _fallback(self, url: str) -> Optional[dict]:
+        # The last good response for the url, or else an answer from the snapshot for by id and unfiltered list urls.
+        data = self.stale.get(url)
+        if data is not None or self.snapshot is None:
+            return data
+
+        path, _, query = url[len(self.BASE_URL):].partition("?")
+        parts = path.split("/")
+        if parts[0] not in self.snapshot:
+            return None
+        collection = self.snapshot[parts[0]]
+        if len(parts) == 2:
+            row = collection.row_of(parts[1])
+            docs = row is not None and [collection.record(row)] or []
+            return dict(self.NOT_FOUND, docs=docs, total=len(docs), pages=len(docs))
+
+        # Any other part of the query (a filter such as "name", "!name" or "runtimeInMinutes<102") would change the
+        # documents returned, so only plain pages of the whole collection are answered.
+        options = dict(part.partition("=")[::2] for part in query.split("&") if part)
+        if len(parts) != 1 or set(options) - set(["limit", "page", "offset"]):
+            return None
+        limit = int(options.get("limit", 1000))
+        page = int(options.get("page", 1))
+        offset = int(options.get("offset", (page - 1) * limit))
+        docs = [collection.record(row) for row in range(offset, min(offset + limit, len(collection)))]
+        return {
+            "docs": docs,
+            "total": len(collection),
+            "limit": limit,
+            "offset": offset,
+            "page": page,
+            "pages": -(-len(collection) // limit),
+        }
+
+    def _record_transfer(self, stats: TransferStats, event: RequestEvent = None) -> None:
+        if event is not None:
+            event.compressed_bytes = stats.compressed_bytes
+            event.decompressed_bytes = stats.decompressed_bytes
+            event.phases["download"] = stats.seconds
+        with self._transfer_lock:
+            self.transfers.append(stats)
+            requests_made, compressed, decompressed = self._transfer_totals
+            self._transfer_totals = (
+                requests_made + 1, compressed + stats.compressed_bytes, decompressed + stats.decompressed_bytes
+            )
+
+    def load_known_ids(self, kind: str, ids: Iterable[str], error_rate: float = 0.001) -> BloomFilter:
+        """
+        Builds the Bloom filter of every existing id of a kind, so lookups of ids that can't exist are rejected
+        without a request. The ids should come from a full listing, e.g. Quotes(api).fetch_all().
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document, one of "movie", "quote" or "character".
+        ids : Iterable[str]
+            Every id of that kind.
+        error_rate : float, optional
+            The rate at which ids that don't exist still get looked up, by default 0.001
+
+        Returns
+        -------
+        BloomFilter
+            The filter now used for the kind.
+        """
+
+        self.known_ids[kind] = BloomFilter.from_ids(ids, error_rate)
+        return self.known_ids[kind]
+
+    def from_bytes(self, data: bytes) -> TheOneApiBase:
+        """
+        Decodes a collection encoded with to_bytes (e.g. by another process, or taken from a cache), hydrating its
+        docs through the identity map.
+
+        Parameters
+        ----------
+        data : bytes
+            The encoded collection.
+
+        Returns
+        -------
+        TheOneApiBase
+            The collection, e.g. a Quotes object, with its docs, metadata and options.
+        """
+
+        return decode_result(data, self)
+
+    def save_snapshot(self, path: str, kinds: list[str] = None) -> None:
+        """
+        Fetches every document of the given kinds and writes them to a snapshot file (see Snapshot). If any request
+        fails ApiError is raised and nothing is written.
+
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file.
+        kinds : list[str], optional
+            The kinds of document to include, by default ["movie", "quote", "character"]
+        """
+
+        kinds = kinds or list(self.COLLECTIONS)
+        write_snapshot(path, dict((kind, self._records(kind, None)) for kind in kinds))
+
+    def sync_snapshot(self, path: str = None, page_size: int = None, verify: bool = False) -> dict:
+        """
+        Brings a snapshot file up to date by re-fetching only the id ranges whose document count changed (see
+        DeltaSync), then rewrites the file. When nothing changed this costs one request per kind. If any request
+        fails ApiError is raised and the file is left as it was.
+
+        Parameters
+        ----------
+        path : str, optional
+            The path of the snapshot file, by default the one opened with use_snapshot. If it is the open snapshot,
+            the updated file is opened in its place.
+        page_size : int, optional
+            The number of documents per compared page, by default DeltaSync.PAGE_SIZE
+        verify : bool, optional
+            Whether to also re-fetch every page to find updates which don't change any count, by default False
+
+        Returns
+        -------
+        dict
+            A SyncResult for each kind in the snapshot.
+
+        Raises
+        ------
+        ValueError
+            If no path is given and no snapshot is open.
+        ApiError
+            If a request fails.
+        """
+
+        if path is None and self.snapshot is None:
+            raise ValueError("A path is needed to sync a snapshot when none is open, see use_snapshot")
+        path = path or self.snapshot.path
+        snapshot = Snapshot(path)
+        results = {}
+        try:
+            for kind in snapshot.kinds:
+                sync = DeltaSync(
+                    lambda filter, kind=kind: self.COLLECTIONS[kind](self)._count(filter, strict=True),
+                    lambda filter, kind=kind: self._records(kind, filter),
+                    page_size,
+                )
+                results[kind] = sync.sync(list(snapshot[kind].records()), verify)
+        finally:
+            snapshot.close()
+
+        if any(result.changed for result in results.values()):
+            write_snapshot(path, dict((kind, result.records) for (kind, result) in results.items()))
+            if self.snapshot is not None and self.snapshot.path == path:
+                self.use_snapshot(path, known_ids=self._snapshot_known_ids)
+        return results
+
+    def use_snapshot(self, path: str, known_ids: bool = False) -> Snapshot:
+        """
+        Opens a snapshot file with mmap, so every process using the same file shares one copy of it in memory.
+        Unfiltered count and count_by calls and by_id lookups are then answered from the snapshot.
+
+        Parameters
+        ----------
+        path : str
+            The path of a snapshot file written by save_snapshot.
+        known_ids : bool, optional
+            Whether to also build the Bloom filter of known ids from the snapshot, by default False
+
+        Returns
+        -------
+        Snapshot
+            The opened snapshot, also available as api.snapshot.
+        """
+
+        # The previous snapshot isn't closed, so views already read from it keep working until they are released.
+        snapshot = Snapshot(path, {"movie": Movie, "quote": Quote, "character": Character}, self)
+        self.snapshot = snapshot
+        self._snapshot_known_ids = known_ids
+        if known_ids:
+            for kind in snapshot.kinds:
+                self.load_known_ids(kind, snapshot[kind].ids())
+        return snapshot
+
+    def _records(self, kind: str, filter: Optional[str]) -> list:
+        # Every matching document, or ApiError, since an error response mustn't be stored as an empty collection.
+        collection = self.COLLECTIONS[kind](self, RequestOptions(limit=1000, filter=filter))
+        return [doc.to_record() for data in collection._checked_pages() for doc in collection._hydrate(data)]
+
+    def _load_many(self, kind: str, ids: list) -> list:
+        # One batch of a BatchLoader, which raises on an error response so that the ids aren't taken to be unknown.
+        collection = self.COLLECTIONS[kind](self).include("_id", ids).limit(len(ids))
+        return collection._hydrate(collection._checked(collection.request(collection.options)))
+
+    def _lookup(self, kind: str, id: str) -> Optional[TheOneApiDocBase]:
+        doc = self.identity.get(kind, id)
+        if doc is None and self.snapshot is not None and kind in self.snapshot:
+            doc = self.snapshot.get(kind, id)
+        return doc
+
+    def _document(self, kind: str, id: str) -> dict:
+        if self._known_missing(kind, id):
+            return dict(self.NOT_FOUND)
+        data, fallback = self._answer(f"{self.BASE_URL}{kind}/{id}")
+        # A stale response or a snapshot not having the document doesn't mean that the API doesn't have it.
+        return fallback and data or self._remember_not_found(kind, id, data)
+
+    def _known_missing(self, kind: str, id: str) -> bool:
+        known = self.known_ids.get(kind)
+        missing = (kind, id) in self.not_found or known is not None and id not in known
+        if missing and self.hooks is not None:
+            event = self._start_event(f"{self.BASE_URL}{kind}/{id}")
+            event.cache = "hit"
+            self._finish_event(event)
+        return missing
+
+    def _remember_not_found(self, kind: str, id: str, data: dict) -> dict:
+        if "docs" in data and len(data["docs"]) == 0:
+            self.not_found.add(kind, id)
+        return data
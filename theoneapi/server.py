@@ -0,0 +1,345 @@
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from theoneapi.synthetic import SyntheticCorpus
+
+ENDPOINTS = ["movie", "quote", "character"]
+
+TOO_MANY_REQUESTS = {"success": False, "message": "Too many requests, please try again later."}
+
+
+def fixed(seconds: float) -> Callable[[random.Random], float]:
+    """
+    Returns a latency distribution which always takes the given number of seconds.
+    """
+
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Callable[[random.Random], float]:
+    """
+    Returns a latency distribution uniform between low and high seconds.
+    """
+
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Callable[[random.Random], float]:
+    """
+    Returns a long-tailed latency distribution with the given median in seconds, like real network latencies.
+    """
+
+    return lambda rng: median * rng.lognormvariate(0, sigma)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Returns the latency distribution described by a command line spec: "fixed:0.05", "uniform:0.01,0.2" or
+    "lognormal:0.1,0.5".
+
+    Parameters
+    ----------
+    spec : str
+        The name of the distribution and its comma separated parameters.
+
+    Returns
+    -------
+    Callable[[random.Random], float]
+        The distribution.
+    """
+
+    name, _, parameters = spec.partition(":")
+    distributions = {"fixed": fixed, "uniform": uniform, "lognormal": lognormal}
+    if name not in distributions:
+        raise ValueError(f"Unknown latency distribution {name!r}, expected one of {', '.join(distributions)}")
+    return distributions[name](*[float(parameter) for parameter in parameters.split(",") if parameter])
+
+
+class StandInServer:
+    """
+    A local HTTP stand-in for the-one-api.dev, answering /v2/movie, /v2/movie/{id}, /v2/movie/{id}/quote, /v2/quote,
+    /v2/quote/{id} (and the character endpoints) from a SyntheticCorpus, with the same limit/page/offset/sort and filter
+    syntax, and with injected latency, 429 quotas, 5xx errors and slow bodies for testing how the SDK copes.
+
+    Requests need an "Authorization: Bearer <key>" header (any key, unless api_keys is given), and each key gets quota
+    requests per quota_window seconds, after which a 429 is answered with Retry-After and the x-ratelimit-* headers the
+    API sends. Bodies are gzip compressed when the request accepts it.
+
+    A simple example:
+    >>> with StandInServer(SyntheticCorpus(quotes=10000), latency=lognormal(0.05), quota=100) as server:
+    ...     api = TheOneApi("any key", base_url=server.url)
+    ...     quotes = Quotes(api, RequestOptions(limit=1000)).fetch_all()
+
+    Or from the command line:
+    $ theoneapi-server --port 8080 --quotes 100000 --latency lognormal:0.05,0.5 --quota 100 --error-rate 0.01
+
+    Attributes
+    ----------
+    corpus : SyntheticCorpus
+        The documents served.
+    url : str
+        The base url to give TheOneApi, e.g. "http://127.0.0.1:8080/v2/".
+    stats : dict[str, int]
+        The number of requests answered, throttled (429) and failed (5xx) so far.
+
+    Methods
+    -------
+    start() -> StandInServer
+        Starts serving on a background thread.
+
+    stop() -> None
+        Stops serving.
+
+    serve_forever() -> None
+        Serves on the current thread until interrupted.
+    """
+
+    def __init__(
+        self,
+        corpus: SyntheticCorpus = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: Callable[[random.Random], float] = None,
+        quota: int = None,
+        quota_window: float = 3600,
+        error_rate: float = 0.0,
+        body_rate: float = None,
+        chunk_size: int = 16384,
+        api_keys: list[str] = None,
+        seed: int = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        corpus : SyntheticCorpus, optional
+            The documents served, by default a SyntheticCorpus of 1000 quotes.
+        host : str, optional
+            The address to listen on, by default "127.0.0.1"
+        port : int, optional
+            The port to listen on, by default 0 (any free port, see url).
+        latency : Callable[[random.Random], float], optional
+            The distribution of seconds to wait before answering (see fixed, uniform and lognormal), by default none.
+        quota : int, optional
+            The number of requests allowed per api key and quota_window, by default None (no limit).
+        quota_window : float, optional
+            The length of the quota window in seconds, by default 3600 like the API's 100 requests per hour.
+        error_rate : float, optional
+            The proportion of requests answered with a 500, 502 or 503, by default 0.0
+        body_rate : float, optional
+            The bytes per second to send bodies at, in chunks of chunk_size, by default None (as fast as possible).
+        chunk_size : int, optional
+            The size of the chunks of a slow body, by default 16384
+        api_keys : list[str], optional
+            The accepted api keys, by default any.
+        seed : int, optional
+            The seed of the latency and error injection, for repeatable runs.
+        """
+
+        self.corpus = corpus or SyntheticCorpus()
+        self.latency = latency
+        self.quota = quota
+        self.quota_window = quota_window
+        self.error_rate = error_rate
+        self.body_rate = body_rate
+        self.chunk_size = chunk_size
+        self.api_keys = api_keys is not None and set(api_keys) or None
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._thread = None
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v2/"
+
+    def start(self) -> "StandInServer":
+        """
+        Starts serving on a background thread.
+
+        Returns
+        -------
+        StandInServer
+            The server, for chaining.
+        """
+
+        self._thread = threading.Thread(target=self._server.serve_forever, name="theoneapi-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        Serves on the current thread until interrupted.
+        """
+
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        """
+        Stops serving and closes the socket.
+        """
+
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def answer(self, path: str, headers: dict) -> tuple:
+        """
+        Decides the response to a request, without any of the waiting.
+
+        Parameters
+        ----------
+        path : str
+            The request path, e.g. "/v2/quote?limit=10".
+        headers : dict
+            The request headers.
+
+        Returns
+        -------
+        tuple
+            The status, the extra response headers and the response object.
+        """
+
+        with self._lock:
+            self.stats["requests"] += 1
+            failing = self.error_rate > 0 and self._rng.random() < self.error_rate
+            error = self._rng.choice([500, 502, 503])
+
+        authorization = headers.get("Authorization") or ""
+        key = authorization[:7] == "Bearer " and authorization[7:] or None
+        if key is None or self.api_keys is not None and key not in self.api_keys:
+            return 401, {}, {"success": False, "message": "Unauthorized."}
+
+        limits = {}
+        if self.quota is not None:
+            remaining, reset = self._take(key)
+            limits = {
+                "x-ratelimit-limit": str(self.quota),
+                "x-ratelimit-remaining": str(max(0, remaining)),
+                "x-ratelimit-reset": str(int(reset)),
+            }
+            if remaining < 0:
+                with self._lock:
+                    self.stats["throttled"] += 1
+                limits["Retry-After"] = str(max(1, int(reset - time.time() + 0.999)))
+                return 429, limits, TOO_MANY_REQUESTS
+
+        if failing:
+            with self._lock:
+                self.stats["errors"] += 1
+            return error, limits, {"success": False, "message": "Something went wrong."}
+
+        if path[:4] != "/v2/" or path[4:].split("?")[0].split("/")[0] not in ENDPOINTS:
+            return 404, limits, {"success": False, "message": "Endpoint not found."}
+        try:
+            return 200, limits, self.corpus.response(path[4:])
+        except (KeyError, ValueError):
+            return 404, limits, {"success": False, "message": "Endpoint not found."}
+
+    def _take(self, key: str) -> tuple:
+        # A fixed window per key, like the API's hourly quota: the remaining requests and when the window resets.
+        with self._lock:
+            now = time.time()
+            used, reset = self._windows.get(key, (0, now + self.quota_window))
+            if now >= reset:
+                used, reset = 0, now + self.quota_window
+            self._windows[key] = (used + 1, reset)
+            return self.quota - used - 1, reset
+
+    def _delay(self) -> float:
+        if self.latency is None:
+            return 0.0
+        with self._lock:
+            return max(0.0, self.latency(self._rng))
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                status, headers, data = server.answer(self.path, self.headers)
+                time.sleep(server._delay())
+
+                body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    body = gzip.compress(body)
+                    headers = dict(headers, **{"Content-Encoding": "gzip"})
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+
+                if server.body_rate is None:
+                    self.wfile.write(body)
+                    return
+                for start in range(0, len(body), server.chunk_size):
+                    chunk = body[start:start + server.chunk_size]
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+                    time.sleep(len(chunk) / server.body_rate)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
+
+
+def main(arguments: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the-one-api.dev.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--quotes", type=int, default=1000, help="the number of quotes in the corpus")
+    parser.add_argument("--movies", type=int, default=8, help="the number of movies in the corpus")
+    parser.add_argument("--characters", type=int, help="the number of characters, by default one per three quotes")
+    parser.add_argument("--latency", type=parse_latency, help='e.g. "fixed:0.05", "lognormal:0.1,0.5"')
+    parser.add_argument("--quota", type=int, help="requests allowed per api key and window")
+    parser.add_argument("--quota-window", type=float, default=3600, help="the quota window in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="the proportion of 5xx responses")
+    parser.add_argument("--body-rate", type=float, help="send bodies at this many bytes per second")
+    parser.add_argument("--seed", type=int, help="the seed of the corpus and the injected faults")
+    options = parser.parse_args(arguments)
+
+    corpus = SyntheticCorpus(options.quotes, options.movies, options.characters, options.seed or 0)
+    server = StandInServer(
+        corpus,
+        options.host,
+        options.port,
+        latency=options.latency,
+        quota=options.quota,
+        quota_window=options.quota_window,
+        error_rate=options.error_rate,
+        body_rate=options.body_rate,
+        seed=options.seed,
+    )
+    print(f"Serving a stand-in for The One API at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
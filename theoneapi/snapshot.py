@@ -0,0 +1,534 @@
+import json
+import mmap
+import os
+import struct
+from typing import Iterator, Optional, Union
+
+MAGIC = b"TOAS"
+VERSION = 1
+
+FILE_HEADER = struct.Struct("<4sHH")
+SECTION_ENTRY = struct.Struct("<16sQQ")
+SECTION_HEADER = struct.Struct("<IHH4Q")
+ROW = struct.Struct("<I")
+LENGTH = struct.Struct("<H")
+INT = struct.Struct("<q")
+FLOAT = struct.Struct("<d")
+
+
+def encode_value(value: object) -> bytes:
+    """
+    Encodes a document value for the string heap as a one byte type tag followed by the payload.
+
+    Parameters
+    ----------
+    value : object
+        A str, bool, int, float, None or any other JSON serialisable value.
+
+    Returns
+    -------
+    bytes
+        The encoded value.
+    """
+
+    if isinstance(value, str):
+        return b"s" + value.encode("utf-8")
+    if isinstance(value, bool):
+        return value and b"b\x01" or b"b\x00"
+    if isinstance(value, int) and -(2 ** 63) <= value < 2 ** 63:
+        return b"i" + INT.pack(value)
+    if isinstance(value, float):
+        return b"f" + FLOAT.pack(value)
+    if value is None:
+        return b"n"
+    return b"j" + json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def decode_value(buffer: Union[bytes, mmap.mmap], start: int, end: int) -> object:
+    """
+    Decodes a value written by encode_value.
+
+    Parameters
+    ----------
+    buffer : Union[bytes, mmap.mmap]
+        The buffer holding the heap.
+    start : int
+        The position of the type tag.
+    end : int
+        The position just after the payload.
+
+    Returns
+    -------
+    object
+        The decoded value.
+    """
+
+    tag = buffer[start:start + 1]
+    if tag == b"s":
+        return str(buffer[start + 1:end], "utf-8")
+    if tag == b"i":
+        return INT.unpack_from(buffer, start + 1)[0]
+    if tag == b"f":
+        return FLOAT.unpack_from(buffer, start + 1)[0]
+    if tag == b"b":
+        return buffer[start + 1:end] == b"\x01"
+    if tag == b"n":
+        return None
+    return json.loads(buffer[start + 1:end])
+
+
+def _pad(data: bytearray, alignment: int = 8) -> None:
+    data.extend(b"\x00" * (-len(data) % alignment))
+
+
+def _encode_section(records: list) -> bytes:
+    fields = ["_id"]
+    for record in records:
+        for field in record:
+            if field not in fields and field != "id":
+                fields.append(field)
+
+    heap = bytearray()
+    offsets = []
+    for record in records:
+        for field in fields:
+            offsets.append(len(heap))
+            # A missing field is stored as an empty value, so it reads back as missing rather than None.
+            if field in record:
+                heap += encode_value(record[field])
+    offsets.append(len(heap))
+    if len(heap) >= 2 ** 32:
+        raise ValueError("A snapshot section can hold at most 4GB of values.")
+
+    ids = [str(record["_id"]).encode("utf-8") for record in records]
+    id_width = max([len(id) for id in ids] or [0])
+    index = bytearray()
+    for id, row in sorted((id, row) for (row, id) in enumerate(ids)):
+        index += id.ljust(id_width, b"\x00") + ROW.pack(row)
+
+    names = bytearray()
+    for field in fields:
+        encoded = field.encode("utf-8")
+        names += LENGTH.pack(len(encoded)) + encoded
+
+    section = bytearray(SECTION_HEADER.size)
+    fields_offset = len(section)
+    section += names
+    _pad(section)
+    table_offset = len(section)
+    section += struct.pack(f"<{len(offsets)}I", *offsets)
+    _pad(section)
+    index_offset = len(section)
+    section += index
+    _pad(section)
+    heap_offset = len(section)
+    section += heap
+    SECTION_HEADER.pack_into(
+        section, 0, len(records), len(fields), id_width, fields_offset, table_offset, index_offset, heap_offset
+    )
+    return bytes(section)
+
+
+def write_snapshot(path: str, collections: dict) -> None:
+    """
+    Writes documents to a snapshot file which can be opened (and shared between processes) with Snapshot.
+
+    The file is written next to path and then moved into place, so processes which already have the old
+    snapshot open keep reading a consistent copy.
+
+    Parameters
+    ----------
+    path : str
+        The path of the snapshot file.
+    collections : dict[str, Iterable[dict]]
+        The raw API documents (with an "_id") for each kind, e.g. {"movie": [...], "quote": [...]}.
+    """
+
+    sections = [(kind, _encode_section(list(records))) for (kind, records) in collections.items()]
+
+    output = bytearray(FILE_HEADER.pack(MAGIC, VERSION, len(sections)))
+    position = len(output) + SECTION_ENTRY.size * len(sections)
+    position += -position % 8
+    for kind, section in sections:
+        output += SECTION_ENTRY.pack(kind.encode("utf-8"), position, len(section))
+        position += len(section) + (-len(section) % 8)
+    _pad(output)
+    for kind, section in sections:
+        output += section
+        _pad(output)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(output)
+    os.replace(temporary, path)
+
+
+class SnapshotView:
+    """
+    Mixin for documents read from a snapshot. Fields are decoded from the mapped file the first time they
+    are accessed, so a view costs almost nothing until it is used.
+    """
+
+    def __getattr__(self, name: str) -> object:
+        if name.startswith("__") or "_snapshot" not in self.__dict__:
+            raise AttributeError(name)
+
+        collection, row = self.__dict__["_snapshot"]
+        field = name == "id" and "_id" or name
+        if name not in self.VALID_ATTRIBUTES or not collection.has_value(row, field):
+            raise AttributeError(name)
+
+        value = collection.value(row, field)
+        api = self.__dict__.get("api")
+        if api is not None and isinstance(value, str) and name in getattr(self, "REFERENCES", []):
+            value = api.loaders[name].reference(value)
+        self.__dict__[name] = value
+        return value
+
+    def __getitem__(self, key: str) -> object:
+        if key not in self.VALID_ATTRIBUTES:
+            raise KeyError(f"{key} is not a valid attribute for this object.")
+
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def as_dict(self) -> dict:
+        collection, row = self.__dict__["_snapshot"]
+        for name in self.VALID_ATTRIBUTES:
+            if name not in self.__dict__ and collection.has_value(row, name == "id" and "_id" or name):
+                getattr(self, name)
+        return super().as_dict()
+
+
+class SnapshotCollection:
+    """
+    The documents of one kind in a Snapshot. Behaves like a read-only list of documents.
+
+    Methods
+    -------
+    get(id: str) -> Optional[TheOneApiDocBase]
+        Returns the document with the given id, found with a binary search of the id index.
+
+    row_of(id: str) -> Optional[int]
+        Returns the row number of the document with the given id.
+
+    ids() -> Iterator[str]
+        Returns the ids of every document, in row order.
+
+    value(row: int, field: str) -> object
+        Decodes a single field of a row.
+
+    column(field: str) -> list
+        Decodes a single field of every row.
+
+    record(row: int) -> dict
+        Decodes a row into the raw API document.
+
+    records() -> Iterator[dict]
+        Decodes every row into raw API documents.
+    """
+
+    def __init__(self, buffer: mmap.mmap, start: int, doc_class: type = None, api: "TheOneApi" = None) -> None:
+        self._buffer = buffer
+        self._start = start
+        rows, fields, id_width, fields_offset, table_offset, index_offset, heap_offset = SECTION_HEADER.unpack_from(
+            buffer, start
+        )
+        self._rows = rows
+        self._width = fields
+        self._id_width = id_width
+        self._table = start + table_offset
+        self._index = start + index_offset
+        self._heap = start + heap_offset
+        self._doc_class = doc_class
+        self._view_class = doc_class is not None and type(f"Snapshot{doc_class.__name__}", (SnapshotView, doc_class), {})
+        self._api = api
+
+        self.fields = []
+        position = start + fields_offset
+        for _ in range(fields):
+            (length,) = LENGTH.unpack_from(buffer, position)
+            self.fields.append(str(buffer[position + 2:position + 2 + length], "utf-8"))
+            position += 2 + length
+        self._field_numbers = dict((field, number) for (number, field) in enumerate(self.fields))
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __iter__(self) -> Iterator[object]:
+        return (self._view(row) for row in range(self._rows))
+
+    def __getitem__(self, row: Union[int, slice]) -> object:
+        if isinstance(row, slice):
+            return [self._view(number) for number in range(*row.indices(self._rows))]
+        if row < 0:
+            row += self._rows
+        if row < 0 or row >= self._rows:
+            raise IndexError("snapshot row out of range")
+        return self._view(row)
+
+    def _view(self, row: int) -> object:
+        if self._view_class is False:
+            return self.record(row)
+
+        view = self._view_class.__new__(self._view_class)
+        view.__dict__["_snapshot"] = (self, row)
+        view.__dict__["api"] = self._api
+        return view
+
+    def _bounds(self, row: int, field: str) -> tuple:
+        number = self._field_numbers.get(field)
+        if number is None:
+            return (0, 0)
+        position = self._table + (row * self._width + number) * 4
+        start, end = struct.unpack_from("<II", self._buffer, position)
+        return (self._heap + start, self._heap + end)
+
+    def has_value(self, row: int, field: str) -> bool:
+        start, end = self._bounds(row, field)
+        return end > start
+
+    def value(self, row: int, field: str) -> object:
+        """
+        Decodes a single field of a row.
+
+        Parameters
+        ----------
+        row : int
+            The row number.
+        field : str
+            The field name, as returned by the API (e.g. "_id").
+
+        Returns
+        -------
+        object
+            The value, or None if the row has no value for the field.
+        """
+
+        start, end = self._bounds(row, field)
+        if end == start:
+            return None
+        return decode_value(self._buffer, start, end)
+
+    def column(self, field: str) -> list:
+        """
+        Decodes a single field of every row.
+
+        Parameters
+        ----------
+        field : str
+            The field name, as returned by the API (e.g. "movie").
+
+        Returns
+        -------
+        list
+            The values in row order.
+        """
+
+        return [self.value(row, field) for row in range(self._rows)]
+
+    def record(self, row: int) -> dict:
+        """
+        Decodes a row into the raw API document.
+
+        Parameters
+        ----------
+        row : int
+            The row number.
+
+        Returns
+        -------
+        dict
+            The document, as it was returned by the API.
+        """
+
+        record = {}
+        for field in self.fields:
+            start, end = self._bounds(row, field)
+            if end > start:
+                record[field] = decode_value(self._buffer, start, end)
+        return record
+
+    def records(self) -> Iterator[dict]:
+        """
+        Decodes every row into raw API documents.
+
+        Returns
+        -------
+        Iterator[dict]
+            The documents in row order.
+        """
+
+        return (self.record(row) for row in range(self._rows))
+
+    def ids(self) -> Iterator[str]:
+        """
+        Returns the ids of every document, in row order.
+
+        Returns
+        -------
+        Iterator[str]
+            The ids.
+        """
+
+        return (self.value(row, "_id") for row in range(self._rows))
+
+    def row_of(self, id: str) -> Optional[int]:
+        """
+        Returns the row number of the document with the given id, using a binary search of the id index.
+
+        Parameters
+        ----------
+        id : str
+            The id to find.
+
+        Returns
+        -------
+        Optional[int]
+            The row number, or None if there is no such document.
+        """
+
+        key = str(id).encode("utf-8")
+        if len(key) > self._id_width:
+            return None
+        key = key.ljust(self._id_width, b"\x00")
+        entry = self._id_width + ROW.size
+        low, high = 0, self._rows
+        while low < high:
+            middle = (low + high) // 2
+            position = self._index + middle * entry
+            if self._buffer[position:position + self._id_width] < key:
+                low = middle + 1
+            else:
+                high = middle
+        position = self._index + low * entry
+        if low < self._rows and self._buffer[position:position + self._id_width] == key:
+            return ROW.unpack_from(self._buffer, position + self._id_width)[0]
+        return None
+
+    def get(self, id: str) -> Optional[object]:
+        """
+        Returns the document with the given id.
+
+        Parameters
+        ----------
+        id : str
+            The id to find.
+
+        Returns
+        -------
+        Optional[TheOneApiDocBase]
+            The document view, or None if there is no such document.
+        """
+
+        row = self.row_of(id)
+        if row is None:
+            return None
+        return self._view(row)
+
+
+class Snapshot:
+    """
+    A read-only, memory-mapped snapshot of Movies/Quotes (and Characters) data.
+
+    Every process that opens the same snapshot file shares the same page-cache pages, so the memory cost of the
+    corpus doesn't grow with the number of worker processes. Each kind is stored as a section with a fixed-width
+    offset table (one 32 bit offset per row and field), a sorted id -> row index and a heap of encoded values.
+    Documents are returned as views which decode their fields lazily from the mapped buffer.
+
+    A simple example:
+    >>> write_snapshot("lotr.snapshot", {"quote": [doc.to_record() for doc in Quotes(api).fetch_all().docs]})
+    >>> api.use_snapshot("lotr.snapshot")
+    >>> api.snapshot["quote"].get("5cd96e05de30eff6ebcce7e9").dialog
+
+    Attributes
+    ----------
+    path : str
+        The path of the snapshot file.
+    kinds : list[str]
+        The kinds of document held by the snapshot.
+
+    Methods
+    -------
+    get(kind: str, id: str) -> Optional[TheOneApiDocBase]
+        Returns a document by kind and id.
+
+    close() -> None
+        Unmaps the snapshot file.
+    """
+
+    def __init__(self, path: str, doc_classes: dict = None, api: "TheOneApi" = None) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            The path of the snapshot file.
+        doc_classes : dict[str, type], optional
+            The TheOneApiDocBase class to use for each kind. Kinds without a class are returned as dicts.
+        api : TheOneApi, optional
+            The api given to the document views, used for resolving lazy references.
+        """
+
+        self.path = path
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = FILE_HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{path} is not a snapshot file.")
+        if version != VERSION:
+            self._buffer.close()
+            raise ValueError(f"{path} is a version {version} snapshot, expected version {VERSION}.")
+
+        doc_classes = doc_classes or {}
+        self._collections = {}
+        for number in range(count):
+            name, offset, _ = SECTION_ENTRY.unpack_from(self._buffer, FILE_HEADER.size + number * SECTION_ENTRY.size)
+            kind = str(name.rstrip(b"\x00"), "utf-8")
+            self._collections[kind] = SnapshotCollection(self._buffer, offset, doc_classes.get(kind), api)
+        self.kinds = list(self._collections)
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __contains__(self, kind: str) -> bool:
+        return kind in self._collections
+
+    def __getitem__(self, kind: str) -> SnapshotCollection:
+        return self._collections[kind]
+
+    def get(self, kind: str, id: str) -> Optional[object]:
+        """
+        Returns a document by kind and id.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document, e.g. "quote".
+        id : str
+            The id of the document.
+
+        Returns
+        -------
+        Optional[TheOneApiDocBase]
+            The document view, or None if the snapshot doesn't hold it.
+        """
+
+        collection = self._collections.get(kind)
+        if collection is None:
+            return None
+        return collection.get(id)
+
+    def close(self) -> None:
+        """
+        Unmaps the snapshot file. Views read from it can no longer decode fields afterwards.
+        """
+
+        self._collections = {}
+        self._buffer.close()
@@ -0,0 +1,174 @@
+import pickle
+import tempfile
+import threading
+from array import array
+from typing import Callable, Iterable, Iterator, Union
+
+
+class SpillList:
+    """
+    A read-mostly list which keeps its first memory_limit items in memory and spills the rest to a temporary segment
+    file, so very large result sets stay within a fixed memory budget.
+
+    Spilled items are stored with encode (as pickled records) and turned back into items with decode each time they
+    are read. Only an 8 byte offset per spilled item stays in memory. The segment file is deleted when the list is
+    closed or garbage collected.
+
+    A simple example:
+    >>> quotes = sdk.Quotes(api).fetch_all(memory_limit=500)
+    >>> len(quotes.docs), quotes.docs[-1].dialog
+
+    Attributes
+    ----------
+    memory_limit : int
+        The number of items kept in memory.
+    spilled : int
+        The number of items stored in the segment file.
+
+    Methods
+    -------
+    append(item: object) -> None
+        Adds an item to the end of the list.
+
+    extend(items: Iterable[object]) -> None
+        Adds items to the end of the list.
+
+    close() -> None
+        Deletes the segment file. Spilled items can no longer be read afterwards.
+    """
+
+    READ_AHEAD = 1 << 16
+
+    def __init__(
+        self,
+        memory_limit: int,
+        encode: Callable[[object], object] = None,
+        decode: Callable[[object], object] = None,
+        items: Iterable[object] = (),
+    ) -> None:
+        """
+        Parameters
+        ----------
+        memory_limit : int
+            The number of items kept in memory.
+        encode : Callable[[object], object], optional
+            Turns an item into a picklable record, by default the item itself.
+        decode : Callable[[object], object], optional
+            Turns a record back into an item, by default the record itself.
+        items : Iterable[object], optional
+            The initial items.
+        """
+
+        self.memory_limit = memory_limit
+        self._encode = encode or (lambda item: item)
+        self._decode = decode or (lambda record: record)
+        self._memory = []
+        self._offsets = array("Q", [0])
+        self._segment = None
+        self._lock = threading.Lock()
+        self.extend(items)
+
+    @property
+    def spilled(self) -> int:
+        return len(self._offsets) - 1
+
+    def __len__(self) -> int:
+        return len(self._memory) + self.spilled
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, SpillList)):
+            return len(self) == len(other) and all(a == b for (a, b) in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"SpillList(memory_limit={self.memory_limit}, len={len(self)}, spilled={self.spilled})"
+
+    def append(self, item: object) -> None:
+        """
+        Adds an item to the end of the list, spilling it to the segment file once memory_limit items are held.
+
+        Parameters
+        ----------
+        item : object
+            The item to add.
+        """
+
+        if self.spilled == 0 and len(self._memory) < self.memory_limit:
+            self._memory.append(item)
+            return
+
+        data = pickle.dumps(self._encode(item), pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if self._segment is None:
+                self._segment = tempfile.TemporaryFile(prefix="theoneapi-", suffix=".segment")
+            self._segment.seek(self._offsets[-1])
+            self._segment.write(data)
+            self._offsets.append(self._offsets[-1] + len(data))
+
+    def extend(self, items: Iterable[object]) -> None:
+        """
+        Adds items to the end of the list.
+
+        Parameters
+        ----------
+        items : Iterable[object]
+            The items to add.
+        """
+
+        for item in items:
+            self.append(item)
+
+    def __getitem__(self, index: Union[int, slice]) -> object:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return list(self._iterate(start, stop))
+            return [self[number] for number in range(start, stop, step)]
+
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("SpillList index out of range")
+        if index < len(self._memory):
+            return self._memory[index]
+
+        number = index - len(self._memory)
+        with self._lock:
+            self._segment.seek(self._offsets[number])
+            data = self._segment.read(self._offsets[number + 1] - self._offsets[number])
+        return self._decode(pickle.loads(data))
+
+    def __iter__(self) -> Iterator[object]:
+        return self._iterate(0, len(self))
+
+    def _iterate(self, start: int, stop: int) -> Iterator[object]:
+        for index in range(start, min(stop, len(self._memory))):
+            yield self._memory[index]
+
+        # Spilled items are read sequentially in large chunks rather than with one read per item.
+        number = max(0, start - len(self._memory))
+        last = stop - len(self._memory)
+        while number < last:
+            end = number + 1
+            while end < last and self._offsets[end + 1] - self._offsets[number] <= self.READ_AHEAD:
+                end += 1
+            with self._lock:
+                self._segment.seek(self._offsets[number])
+                chunk = self._segment.read(self._offsets[end] - self._offsets[number])
+            base = self._offsets[number]
+            for item in range(number, end):
+                record = chunk[self._offsets[item] - base:self._offsets[item + 1] - base]
+                yield self._decode(pickle.loads(record))
+            number = end
+
+    def close(self) -> None:
+        """
+        Deletes the segment file. Spilled items can no longer be read afterwards.
+        """
+
+        with self._lock:
+            if self._segment is not None:
+                self._segment.close()
@@ -0,0 +1,143 @@
+import codecs
+import json
+from typing import Iterable, Iterator
+
+WHITESPACE = " \t\n\r"
+
+
+class DocStream:
+    """
+    Incrementally decodes a list response of the form {"docs": [...], "total": ..., ...} from chunks of bytes,
+    yielding each document as soon as it has arrived, without holding the whole body or object tree in memory.
+
+    The fields outside of "docs" (the total, limit, offset, page and pages metadata, which the API sends after the
+    docs) are collected into metadata as they are read, so metadata is complete once iteration has finished.
+
+    A simple example:
+    >>> stream = api.stream("quote", RequestOptions(limit=1000))
+    >>> for doc in stream:
+    ...     print(doc["dialog"])
+    >>> stream.metadata["total"]
+
+    Attributes
+    ----------
+    metadata : dict
+        The top level fields of the response other than "docs".
+    complete : bool
+        Whether the whole response has been read.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], key: str = "docs") -> None:
+        """
+        Parameters
+        ----------
+        chunks : Iterable[bytes]
+            The response body, e.g. response.iter_content(65536).
+        key : str, optional
+            The top level field holding the list to stream, by default "docs"
+        """
+
+        self.metadata = {}
+        self.complete = False
+        self._chunks = iter(chunks)
+        self._key = key
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._exhausted = False
+        self._started = False
+
+    def __iter__(self) -> Iterator[dict]:
+        if self._started:
+            raise RuntimeError("A DocStream can only be iterated once.")
+        self._started = True
+        return self._documents()
+
+    def read_all(self) -> dict:
+        """
+        Reads the whole response into a dict, like response.json().
+
+        Returns
+        -------
+        dict
+            The decoded response.
+        """
+
+        docs = list(self)
+        return dict(self.metadata, **{self._key: docs})
+
+    def _documents(self) -> Iterator[dict]:
+        self._expect("{")
+        while True:
+            if self._peek() == "}":
+                self._position += 1
+                break
+            key = self._value()
+            self._expect(":")
+            if key == self._key and self._peek() == "[":
+                yield from self._array()
+            else:
+                self.metadata[key] = self._value()
+            if self._peek() == ",":
+                self._position += 1
+        # Read to the end of the body, so that whatever produces the chunks can finish (and release the connection).
+        for _ in self._chunks:
+            pass
+        self.complete = True
+
+    def _array(self) -> Iterator[dict]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield self._value()
+            character = self._peek()
+            self._position += 1
+            if character == "]":
+                return
+            if character != ",":
+                raise ValueError(f"Expected ',' or ']' in the streamed response, got {character!r}")
+
+    def _value(self) -> object:
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._position)
+                # A value ending exactly at the end of the buffer may be a number that continues in the next chunk.
+                if end < len(self._buffer) or self._exhausted:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._exhausted:
+                    raise
+            self._read()
+
+    def _expect(self, character: str) -> None:
+        found = self._peek()
+        if found != character:
+            raise ValueError(f"Expected {character!r} in the streamed response, got {found!r}")
+        self._position += 1
+
+    def _peek(self) -> str:
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if self._exhausted:
+                raise ValueError("The streamed response ended unexpectedly.")
+            self._read()
+
+    def _read(self) -> None:
+        # Drop what has already been decoded, so the buffer only ever holds about one document and one chunk.
+        self._buffer = self._buffer[self._position:]
+        self._position = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buffer += text
+                return
+        self._buffer += self._decoder.decode(b"", final=True)
+        self._exhausted = True
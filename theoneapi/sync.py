@@ -0,0 +1,221 @@
+import hashlib
+import json
+from typing import Callable, NamedTuple, Optional
+
+
+def record_hash(record: dict) -> str:
+    """
+    Returns a content hash of a document which doesn't depend on the order of its fields.
+
+    Parameters
+    ----------
+    record : dict
+        The raw document.
+
+    Returns
+    -------
+    str
+        The hex digest.
+    """
+
+    encoded = json.dumps(record, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def id_range_filter(lower: Optional[str], upper: Optional[str]) -> Optional[str]:
+    """
+    Returns the filter selecting the ids from lower (inclusive) to upper (exclusive).
+
+    Parameters
+    ----------
+    lower : Optional[str]
+        The first id of the range, or None for no lower bound.
+    upper : Optional[str]
+        The first id after the range, or None for no upper bound.
+
+    Returns
+    -------
+    Optional[str]
+        The filter, or None when the range is unbounded.
+    """
+
+    parts = [lower is not None and f"_id>={lower}" or None, upper is not None and f"_id<{upper}" or None]
+    return "&".join(part for part in parts if part is not None) or None
+
+
+class Page(NamedTuple):
+    """
+    A page of a stored collection: a contiguous range of ids (in _id order) with its document count and hash.
+    """
+
+    lower: Optional[str]
+    upper: Optional[str]
+    records: list
+    hash: str
+
+
+class SyncResult(NamedTuple):
+    """
+    The outcome of syncing one collection: the updated records and what changed.
+    """
+
+    records: list
+    inserted: int
+    updated: int
+    deleted: int
+    changed_pages: int
+    calls: int
+
+    @property
+    def changed(self) -> bool:
+        return self.inserted + self.updated + self.deleted > 0
+
+
+class DeltaSync:
+    """
+    Refreshes a stored copy of a collection by re-fetching only the id ranges which changed.
+
+    The stored records are split into pages of page_size documents in _id order, and each page covers every id from
+    its first id up to the first id of the next page (the first and last pages are open ended), so together the pages
+    cover every possible id. The total count of a group of pages is checked with one metadata-only request, and a group
+    whose count changed is split in half until the changed pages are found. Only those pages are re-fetched; their
+    documents are compared with the stored ones by id and content hash, giving the inserts, updates and deletes.
+
+    When nothing changed a sync costs one request. Changes which leave the counts the same (an update in place, or a
+    delete and an insert which cancel out within a probed group of pages) are only found with verify=True, which
+    re-fetches every page and compares the page hashes.
+
+    Attributes
+    ----------
+    PAGE_SIZE : int
+        The default number of documents per page.
+
+    Methods
+    -------
+    pages(records: list[dict]) -> list[Page]
+        Splits stored records into pages.
+
+    sync(records: list[dict], verify: bool = False) -> SyncResult
+        Returns the refreshed records and what changed.
+    """
+
+    PAGE_SIZE = 100
+
+    def __init__(
+        self,
+        count: Callable[[Optional[str]], int],
+        fetch: Callable[[Optional[str]], list],
+        page_size: int = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        count : Callable[[Optional[str]], int]
+            Returns the number of documents matching a filter (None for every document) with a single request.
+        fetch : Callable[[Optional[str]], list[dict]]
+            Returns every raw document matching a filter. Both count and fetch must raise when a request fails, since a
+            missing count or an empty fetch would be taken for deleted documents.
+        page_size : int, optional
+            The number of documents per page, by default PAGE_SIZE
+        """
+
+        self._count = count
+        self._fetch = fetch
+        self.page_size = page_size or self.PAGE_SIZE
+
+    def pages(self, records: list) -> list:
+        """
+        Splits stored records into pages of page_size documents in _id order.
+
+        Parameters
+        ----------
+        records : list[dict]
+            The stored raw documents.
+
+        Returns
+        -------
+        list[Page]
+            The pages, which together cover every possible id.
+        """
+
+        records = sorted(records, key=lambda record: str(record["_id"]))
+        chunks = [records[start:start + self.page_size] for start in range(0, len(records), self.page_size)] or [[]]
+        bounds = [None] + [str(chunk[0]["_id"]) for chunk in chunks[1:]] + [None]
+        return [
+            Page(bounds[number], bounds[number + 1], chunk, self._page_hash(chunk))
+            for (number, chunk) in enumerate(chunks)
+        ]
+
+    def sync(self, records: list, verify: bool = False) -> SyncResult:
+        """
+        Returns the refreshed records and what changed. Updated documents keep their position, deleted ones are
+        removed and inserted ones are appended in _id order.
+
+        Parameters
+        ----------
+        records : list[dict]
+            The stored raw documents.
+        verify : bool, optional
+            Whether to re-fetch every page to find changes which don't alter the page counts, by default False
+
+        Returns
+        -------
+        SyncResult
+            The refreshed records, the number of inserted, updated and deleted documents, the number of pages that
+            were re-fetched and the number of requests made.
+        """
+
+        self._calls = 0
+        pages = self.pages(records)
+        changed = verify and list(pages) or self._changed_pages(pages, 0, len(pages))
+
+        fetched = {}
+        refetched = 0
+        for page in changed:
+            docs = self._fetch(id_range_filter(page.lower, page.upper))
+            self._calls += 1
+            if verify and self._page_hash(sorted(docs, key=lambda record: str(record["_id"]))) == page.hash:
+                continue
+            refetched += 1
+            fetched.update((str(record["_id"]), None) for record in page.records)
+            fetched.update((str(doc["_id"]), doc) for doc in docs)
+
+        inserted = updated = deleted = 0
+        result = []
+        for record in records:
+            id = str(record["_id"])
+            if id not in fetched:
+                result.append(record)
+                continue
+            doc = fetched.pop(id)
+            if doc is None:
+                deleted += 1
+            elif record_hash(doc) != record_hash(record):
+                updated += 1
+                result.append(doc)
+            else:
+                result.append(record)
+        for id in sorted(fetched):
+            if fetched[id] is not None:
+                inserted += 1
+                result.append(fetched[id])
+
+        return SyncResult(result, inserted, updated, deleted, refetched, self._calls)
+
+    def _changed_pages(self, pages: list, start: int, end: int) -> list:
+        expected = sum(len(page.records) for page in pages[start:end])
+        actual = self._count(id_range_filter(pages[start].lower, pages[end - 1].upper))
+        self._calls += 1
+        if actual == expected:
+            return []
+        if end - start == 1:
+            return [pages[start]]
+
+        middle = (start + end) // 2
+        return self._changed_pages(pages, start, middle) + self._changed_pages(pages, middle, end)
+
+    def _page_hash(self, records: list) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for record in records:
+            digest.update(record_hash(record).encode("ascii"))
+        return digest.hexdigest()
@@ -0,0 +1,409 @@
+import json
+import re
+from collections.abc import Sequence
+from typing import Callable, Optional, Union
+from theoneapi.sdk import TheOneApi
+from theoneapi.transport import Response, Transport
+
+MASK = (1 << 64) - 1
+
+# The leading 8 hex digits of the real ids of each kind, followed by 16 hex digits of document number, so ids sort
+# in document order like the API's ObjectIds do.
+ID_PREFIXES = {"movie": "5cd95395", "quote": "5cd96e05", "character": "5cd99d4b"}
+
+LIST_OPTIONS = ["limit", "page", "offset", "sort"]
+
+WORDS = [
+    "ring", "shire", "precious", "mordor", "wizard", "hobbit", "road", "shadow", "king", "return", "fellowship",
+    "mountain", "dark", "fire", "eagles", "tower", "sword", "elves", "river", "journey", "gold", "dragon", "light",
+    "stone", "friend", "home", "night", "morning", "war", "hope", "fear", "gate", "forest", "star", "song", "old",
+]
+
+RACES = ["Hobbit", "Human", "Elf", "Dwarf", "Maiar", "Orc", "Ent", "Dragon"]
+
+REALMS = ["", "Gondor", "Rohan", "Lothlórien", "Rivendell", "Erebor", "Mirkwood", "The Shire"]
+
+
+def _mix(value: int) -> int:
+    # splitmix64, so every document is a pure function of its number and can be generated on demand.
+    value = (value + 0x9E3779B97F4A7C15) & MASK
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK
+    return value ^ (value >> 31)
+
+
+def _number(value: str) -> object:
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def matcher(filter: Optional[str]) -> Callable[[dict], bool]:
+    """
+    Returns a predicate for a filter query string in the form the SDK sends, e.g. "movie=a,b&runtimeInMinutes>=100".
+
+    Supported are field=value, field!=value, field=a,b (include), field!=a,b (exclude), field (exists), !field,
+    field=/regex/i and the <, <=, > and >= comparisons. Values which look like numbers are compared as numbers.
+
+    Parameters
+    ----------
+    filter : str
+        The filter, or None for one that matches every document.
+
+    Returns
+    -------
+    Callable[[dict], bool]
+        Returns whether a raw document (with "_id") matches.
+    """
+
+    conditions = []
+    for part in (filter or "").split("&"):
+        if part == "":
+            continue
+        found = re.match(r"^(!?)([^!<>=]+)(!?=|<=?|>=?)?(.*)$", part)
+        negate, field, operator, value = found.groups()
+        if operator is None:
+            conditions.append(lambda doc, field=field, negate=negate: (field in doc) != bool(negate))
+        elif operator in ["=", "!="]:
+            if len(value) > 1 and value[0] == "/":
+                pattern, _, flags = value[1:].rpartition("/")
+                expression = re.compile(pattern, "i" in flags and re.IGNORECASE or 0)
+                test = lambda found, expression=expression: found is not None and expression.search(str(found))
+            else:
+                values = set(map(str, value.split(",")))
+                test = lambda found, values=values: found is not None and str(found) in values
+            conditions.append(
+                lambda doc, field=field, test=test, negate=operator == "!=": bool(test(doc.get(field))) != negate
+            )
+        else:
+            conditions.append(_comparison(field, operator, _number(value)))
+
+    return lambda doc: all(condition(doc) for condition in conditions)
+
+
+def _comparison(field: str, operator: str, value: object) -> Callable[[dict], bool]:
+    compare = {
+        "<": lambda a, b: a < b,
+        "<=": lambda a, b: a <= b,
+        ">": lambda a, b: a > b,
+        ">=": lambda a, b: a >= b,
+    }[operator]
+
+    def condition(doc: dict) -> bool:
+        found = doc.get(field)
+        if found is None:
+            return False
+        if isinstance(value, float):
+            found = _number(str(found))
+        else:
+            found = str(found)
+        return type(found) == type(value) and compare(found, value)
+
+    return condition
+
+
+class SyntheticDocuments(Sequence):
+    """
+    The documents of one kind in a SyntheticCorpus, generated when they are read rather than held in memory.
+    """
+
+    def __init__(self, corpus: "SyntheticCorpus", kind: str) -> None:
+        self.corpus = corpus
+        self.kind = kind
+
+    def __len__(self) -> int:
+        return self.corpus.sizes[self.kind]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[number] for number in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("SyntheticDocuments index out of range")
+        return self.corpus.document(self.kind, index)
+
+
+class SyntheticCorpus:
+    """
+    A deterministic corpus of movie, quote and character documents in the shape the real API returns, of any size.
+
+    Documents are generated from their number (and the seed) whenever they are read, so a corpus of millions of
+    quotes costs no memory until it is paged through. Every quote refers to one of the corpus' movies and characters,
+    and ids sort in document order, like the API's. response answers the API's urls, including the pagination,
+    sorting and filter query options, so the SDK can be run (and benchmarked) against a corpus without the network.
+
+    A simple example:
+    >>> corpus = SyntheticCorpus(quotes=100000)
+    >>> api = SyntheticTheOneApi(corpus)
+    >>> len(sdk.Quotes(api, RequestOptions(limit=1000)).fetch_all().docs)
+    100000
+
+    Attributes
+    ----------
+    sizes : dict[str, int]
+        The number of documents of each kind.
+    seed : int
+        The seed of the generated values. The same sizes and seed always give the same documents.
+
+    Methods
+    -------
+    document(kind: str, index: int) -> dict
+        Returns one raw document.
+
+    documents(kind: str) -> SyntheticDocuments
+        Returns every document of a kind, generated on demand.
+
+    index_of(kind: str, id: str) -> Optional[int]
+        Returns the number of the document with an id.
+
+    response(path: str) -> dict
+        Returns the response of the API for a path such as "quote?limit=1000&page=2".
+
+    body(path: str) -> bytes
+        Returns the response as a JSON encoded body.
+    """
+
+    def __init__(self, quotes: int = 1000, movies: int = 8, characters: int = None, seed: int = 0) -> None:
+        """
+        Parameters
+        ----------
+        quotes : int, optional
+            The number of quotes, by default 1000
+        movies : int, optional
+            The number of movies, by default 8
+        characters : int, optional
+            The number of characters, by default one per three quotes.
+        seed : int, optional
+            The seed of the generated values, by default 0
+        """
+
+        self.sizes = {"movie": movies, "quote": quotes, "character": characters or max(1, quotes // 3)}
+        self.seed = seed
+
+    def id(self, kind: str, index: int) -> str:
+        return f"{ID_PREFIXES[kind]}{index:016x}"
+
+    def index_of(self, kind: str, id: str) -> Optional[int]:
+        """
+        Returns the number of the document with an id.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document.
+        id : str
+            The id.
+
+        Returns
+        -------
+        Optional[int]
+            The number, or None if there is no such document.
+        """
+
+        if len(id) != 24 or id[:8] != ID_PREFIXES[kind]:
+            return None
+        try:
+            index = int(id[8:], 16)
+        except ValueError:
+            return None
+        if index >= self.sizes[kind]:
+            return None
+        return index
+
+    def document(self, kind: str, index: int) -> dict:
+        """
+        Returns one raw document, as the API would send it.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document, one of "movie", "quote" or "character".
+        index : int
+            The number of the document.
+
+        Returns
+        -------
+        dict
+            The document.
+        """
+
+        value = _mix((self.seed << 40) ^ (index << 2) ^ list(ID_PREFIXES).index(kind))
+        id = self.id(kind, index)
+
+        if kind == "movie":
+            budget = 10 + value % 290
+            return {
+                "_id": id,
+                "name": f"The {WORDS[value % 36].title()} of the {WORDS[(value >> 6) % 36].title()} {index}",
+                "runtimeInMinutes": 90 + (value >> 12) % 150,
+                "budgetInMillions": budget,
+                "boxOfficeRevenueInMillions": round(budget * ((value >> 20) % 4000) / 1000 + 1, 1),
+                "academyAwardNominations": (value >> 32) % 14,
+                "academyAwardWins": (value >> 36) % 12,
+                "rottenTomatoesScore": 50 + (value >> 40) % 51,
+            }
+
+        if kind == "quote":
+            words = [WORDS[(value >> shift) % 36] for shift in range(0, 4 + (value >> 60) % 12 * 4, 4)]
+            return {
+                "_id": id,
+                "dialog": " ".join(words).capitalize() + ".",
+                "movie": self.id("movie", (value >> 8) % self.sizes["movie"]),
+                "character": self.id("character", (value >> 24) % self.sizes["character"]),
+                "id": id,
+            }
+
+        return {
+            "_id": id,
+            "height": "",
+            "race": RACES[value % len(RACES)],
+            "gender": value >> 4 & 1 and "Female" or "Male",
+            "birth": f"TA {(value >> 8) % 3000}",
+            "spouse": "",
+            "death": f"FO {(value >> 20) % 100}",
+            "realm": REALMS[(value >> 28) % len(REALMS)],
+            "hair": "",
+            "name": f"{WORDS[(value >> 32) % 36].title()}{WORDS[(value >> 38) % 36]} {index}",
+            "wikiUrl": f"http://lotr.wikia.com/wiki/Character_{index}",
+        }
+
+    def documents(self, kind: str) -> SyntheticDocuments:
+        """
+        Returns every document of a kind, generated on demand.
+
+        Parameters
+        ----------
+        kind : str
+            The kind of document.
+
+        Returns
+        -------
+        SyntheticDocuments
+            A read-only sequence of the raw documents.
+        """
+
+        return SyntheticDocuments(self, kind)
+
+    def response(self, path: str) -> dict:
+        """
+        Returns the response of the API for a path relative to its base url, e.g. "quote?limit=1000&page=2",
+        "movie/{id}" or "movie/{id}/quote?character={id}".
+
+        Parameters
+        ----------
+        path : str
+            The path, with an optional query string.
+
+        Returns
+        -------
+        dict
+            The response, with the docs and the total, limit, offset, page and pages metadata.
+        """
+
+        path, _, query = path.partition("?")
+        parts = path.strip("/").split("/")
+        if parts[0] not in self.sizes or len(parts) > 3 or len(parts) == 3 and parts[2] != "quote":
+            raise KeyError(f"Unknown endpoint {path!r}")
+
+        options = {}
+        filters = []
+        for part in query.split("&"):
+            key, equals, value = part.partition("=")
+            if equals and key in LIST_OPTIONS:
+                options[key] = value
+            elif part:
+                filters.append(part)
+
+        kind = parts[0]
+        if len(parts) == 2:
+            index = self.index_of(kind, parts[1])
+            docs = index is not None and [self.document(kind, index)] or []
+            return {"docs": docs, "total": len(docs), "limit": 1000, "offset": 0, "page": 1, "pages": 1}
+        if len(parts) == 3:
+            filters.append(f"{kind}={parts[1]}")
+            kind = "quote"
+
+        matches = self.documents(kind)
+        if filters:
+            test = matcher("&".join(filters))
+            matches = [doc for doc in matches if test(doc)]
+        if "sort" in options:
+            field, _, order = options["sort"].partition(":")
+            matches = sorted(matches, key=lambda doc: str(doc.get(field, "")), reverse=order == "desc")
+
+        limit = int(options.get("limit", 1000))
+        page = int(options.get("page", 1))
+        offset = int(options.get("offset", (page - 1) * limit))
+        return {
+            "docs": list(matches[offset:offset + limit]),
+            "total": len(matches),
+            "limit": limit,
+            "offset": offset,
+            "page": page,
+            "pages": -(-len(matches) // limit),
+        }
+
+    def body(self, path: str) -> bytes:
+        """
+        Returns the response for a path as a JSON encoded body.
+
+        Parameters
+        ----------
+        path : str
+            The path, with an optional query string.
+
+        Returns
+        -------
+        bytes
+            The body.
+        """
+
+        return json.dumps(self.response(path), ensure_ascii=False).encode("utf-8")
+
+
+class SyntheticTransport(Transport):
+    """
+    A Transport answered in process by a SyntheticCorpus instead of over HTTP.
+
+    Attributes
+    ----------
+    corpus : SyntheticCorpus
+        The corpus answering the requests.
+    """
+
+    def __init__(self, corpus: SyntheticCorpus) -> None:
+        self.corpus = corpus
+
+    def send(self, url: str, headers: dict, timeout: Union[float, tuple] = None, chunk_size: int = 65536) -> Response:
+        body = self.corpus.body(url.split("/v2/", 1)[-1])
+        return Response(200, {"Content-Type": "application/json"},
+                        (body[start:start + chunk_size] for start in range(0, len(body), chunk_size)))
+
+
+class SyntheticTheOneApi(TheOneApi):
+    """
+    A TheOneApi answered in process by a SyntheticCorpus instead of over HTTP.
+
+    Only the transport is replaced: responses are still read as chunked bodies and go through the same decoding,
+    transfer accounting, hooks and hydration as real ones, so the SDK's own overhead can be measured.
+
+    Attributes
+    ----------
+    corpus : SyntheticCorpus
+        The corpus answering the requests.
+    """
+
+    def __init__(self, corpus: SyntheticCorpus, **kwargs) -> None:
+        """
+        Parameters
+        ----------
+        corpus : SyntheticCorpus
+            The corpus answering the requests.
+        **kwargs
+            The other TheOneApi options, e.g. hooks.
+        """
+
+        super().__init__("synthetic", transport=SyntheticTransport(corpus), **kwargs)
+        self.corpus = corpus
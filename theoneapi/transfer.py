@@ -0,0 +1,170 @@
+import time
+import zlib
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def accept_encoding() -> str:
+    """
+    Returns the Accept-Encoding header value for the encodings that can be decoded here: gzip and deflate always,
+    plus br and zstd when the brotli (or brotlicffi) and zstandard packages are installed.
+
+    Returns
+    -------
+    str
+        The header value, most preferred encoding first.
+    """
+
+    encodings = ["gzip", "deflate"]
+    if zstandard is not None:
+        encodings.insert(0, "zstd")
+    if brotli is not None:
+        encodings.insert(0, "br")
+    return ", ".join(encodings)
+
+
+class TransferStats(NamedTuple):
+    """
+    The size of one response on the wire (compressed) and after decompression.
+    """
+
+    url: str
+    encoding: str
+    compressed_bytes: int
+    decompressed_bytes: int
+    seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.compressed_bytes and self.decompressed_bytes / self.compressed_bytes or 1.0
+
+
+class _Deflate:
+    # "deflate" should be zlib wrapped, but some servers send a raw deflate stream, so the first chunk decides.
+    def __init__(self) -> None:
+        self._decompressor = None
+
+    def decompress(self, data: bytes) -> bytes:
+        if self._decompressor is None:
+            self._decompressor = zlib.decompressobj()
+            try:
+                return self._decompressor.decompress(data)
+            except zlib.error:
+                self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        return self._decompressor is not None and self._decompressor.flush() or b""
+
+
+class _Brotli:
+    def __init__(self) -> None:
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        process = getattr(self._decompressor, "process", None) or self._decompressor.decompress
+        return process(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _Zstd:
+    def __init__(self) -> None:
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._decompressor.decompress(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def decompressor(encoding: str) -> object:
+    """
+    Returns an incremental decompressor (with decompress(data) and flush() methods) for a Content-Encoding.
+
+    Parameters
+    ----------
+    encoding : str
+        A single content coding, e.g. "gzip".
+
+    Returns
+    -------
+    object
+        The decompressor.
+    """
+
+    encoding = encoding.strip().lower()
+    if encoding in ["gzip", "x-gzip"]:
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == "deflate":
+        return _Deflate()
+    if encoding == "br" and brotli is not None:
+        return _Brotli()
+    if encoding == "zstd" and zstandard is not None:
+        return _Zstd()
+    raise ValueError(f"Unsupported Content-Encoding {encoding!r}")
+
+
+def decode_body(
+    chunks: Iterable[bytes],
+    encoding: str,
+    url: str = "",
+    on_done: Callable[[TransferStats], None] = None,
+) -> Iterator[bytes]:
+    """
+    Decompresses a response body incrementally as its chunks arrive, counting the bytes before and after.
+
+    Parameters
+    ----------
+    chunks : Iterable[bytes]
+        The raw (still encoded) body, e.g. response.raw.stream(65536, decode_content=False).
+    encoding : str
+        The Content-Encoding header value. Several codings (e.g. "gzip, br") are undone in reverse order.
+    url : str, optional
+        The url of the request, recorded in the stats.
+    on_done : Callable[[TransferStats], None], optional
+        Called with the stats once the whole body has been read.
+
+    Returns
+    -------
+    Iterator[bytes]
+        The decompressed body.
+    """
+
+    codings = [coding for coding in (encoding or "").split(",") if coding.strip() not in ["", "identity"]]
+    decompressors = [decompressor(coding) for coding in reversed(codings)]
+    started = time.monotonic()
+    compressed = decompressed = 0
+
+    for chunk in chunks:
+        compressed += len(chunk)
+        for stage in decompressors:
+            chunk = stage.decompress(chunk)
+        if chunk:
+            decompressed += len(chunk)
+            yield chunk
+
+    tail = b""
+    for stage in decompressors:
+        tail = stage.decompress(tail) + stage.flush()
+    if tail:
+        decompressed += len(tail)
+        yield tail
+
+    if on_done is not None:
+        on_done(TransferStats(url, ", ".join(coding.strip() for coding in codings) or "identity",
+                              compressed, decompressed, time.monotonic() - started))
@@ -0,0 +1,282 @@
+import base64
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Iterable, Iterator, Union
+import requests
+from requests.structures import CaseInsensitiveDict
+
+# Response headers which are never written to a cassette.
+UNRECORDED_HEADERS = ["set-cookie"]
+
+
+class Response:
+    """
+    A response as returned by a Transport: the status, the headers and the still encoded body.
+
+    Attributes
+    ----------
+    status_code : int
+        The HTTP status.
+    headers : CaseInsensitiveDict
+        The response headers.
+    body : Iterable[bytes]
+        The body as it arrived on the wire, i.e. still compressed according to its Content-Encoding.
+    """
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: Union[dict, CaseInsensitiveDict],
+        body: Iterable[bytes],
+        close: Callable[[], None] = None,
+    ) -> None:
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.body = body
+        self._close = close
+
+    def close(self) -> None:
+        """
+        Releases the connection without reading the rest of the body.
+        """
+
+        if self._close is not None:
+            self._close()
+
+
+class Transport(ABC):
+    """
+    Sends the HTTP requests of a TheOneApi. Pass one as TheOneApi(transport=...) to change how (or whether) the
+    network is used; the default is an HttpTransport.
+
+    Methods
+    -------
+    send(url: str, headers: dict, timeout: Union[float, tuple] = None, chunk_size: int = 65536) -> Response
+        Sends a GET request and returns the response once its headers have arrived.
+    """
+
+    @abstractmethod
+    def send(
+        self, url: str, headers: dict, timeout: Union[float, tuple] = None, chunk_size: int = 65536
+    ) -> Response:  # pragma: no cover
+        """
+        Sends a GET request and returns the response once its headers have arrived, with the body still to be read.
+
+        Parameters
+        ----------
+        url : str
+            The full url.
+        headers : dict
+            The request headers.
+        timeout : Union[float, tuple], optional
+            The connect and read timeouts in seconds.
+        chunk_size : int, optional
+            The size of the chunks to read the body in, by default 65536
+
+        Returns
+        -------
+        Response
+            The response.
+        """
+
+        pass
+
+
+class HttpTransport(Transport):
+    """
+    Sends requests over the network with requests, optionally through a requests.Session to reuse connections.
+
+    Attributes
+    ----------
+    session : requests.Session
+        The session used for requests, or None to use requests.get.
+    """
+
+    def __init__(self, session: requests.Session = None) -> None:
+        self.session = session
+
+    def send(self, url: str, headers: dict, timeout: Union[float, tuple] = None, chunk_size: int = 65536) -> Response:
+        get = self.session is not None and self.session.get or requests.get
+        response = get(url, headers=headers, stream=True, timeout=timeout)
+        # Read with decode_content=False, so that decompression (and counting the bytes on the wire) is left to
+        # theoneapi.transfer.
+        body = response.raw.stream(chunk_size, decode_content=False)
+        return Response(response.status_code, response.headers, body, response.close)
+
+
+def authorization_digest(headers: dict) -> str:
+    """
+    Returns a short digest of the Authorization header, so cassettes can tell api keys apart without storing them.
+
+    Parameters
+    ----------
+    headers : dict
+        The request headers.
+
+    Returns
+    -------
+    str
+        The digest, or "" when there is no Authorization header.
+    """
+
+    authorization = headers.get("Authorization")
+    if authorization is None:
+        return ""
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:16]
+
+
+class RecordingTransport(Transport):
+    """
+    Sends requests with another transport and appends every request/response pair to a cassette file, which a
+    ReplayTransport can serve back later.
+
+    A cassette has one JSON object per line, with the url, a digest of the Authorization header (never the api key
+    itself), the status, the response headers, the body exactly as it arrived (base64, still compressed) and the
+    seconds until the headers arrived (ttfb) and until the whole body had been read (seconds). Each body is read
+    completely when the request is made, so that it is recorded even if it is never read by the caller.
+
+    A simple example:
+    >>> api = TheOneApi(key, transport=RecordingTransport("tests/cassettes/theoneapi.ndjson"))
+    >>> Movies(api).fetch()
+
+    Attributes
+    ----------
+    path : str
+        The cassette file.
+    transport : Transport
+        The transport which actually sends the requests, by default an HttpTransport.
+    """
+
+    def __init__(self, path: str, transport: Transport = None, append: bool = False) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            The cassette file.
+        transport : Transport, optional
+            The transport which actually sends the requests, by default an HttpTransport.
+        append : bool, optional
+            Whether to add to an existing cassette rather than starting a new one, by default False
+        """
+
+        self.path = path
+        self.transport = transport or HttpTransport()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not append:
+            open(path, "w").close()
+
+    def send(self, url: str, headers: dict, timeout: Union[float, tuple] = None, chunk_size: int = 65536) -> Response:
+        started = time.perf_counter()
+        response = self.transport.send(url, headers, timeout, chunk_size)
+        ttfb = time.perf_counter() - started
+        chunks = list(response.body)
+        seconds = time.perf_counter() - started
+
+        interaction = {
+            "method": "GET",
+            "url": url,
+            "authorization": authorization_digest(headers),
+            "status": response.status_code,
+            "headers": {
+                name: value for name, value in response.headers.items() if name.lower() not in UNRECORDED_HEADERS
+            },
+            "body": base64.b64encode(b"".join(chunks)).decode("ascii"),
+            "ttfb": round(ttfb, 6),
+            "seconds": round(seconds, 6),
+            "recorded": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as cassette:
+                cassette.write(json.dumps(interaction) + "\n")
+
+        return Response(response.status_code, response.headers, iter(chunks))
+
+
+class CassetteMiss(LookupError):
+    """
+    Raised by a ReplayTransport for a request which isn't in its cassette.
+    """
+
+
+class ReplayTransport(Transport):
+    """
+    Answers requests from a cassette written by a RecordingTransport, without using the network.
+
+    Requests are matched by url and (unless match_authorization is False) by api key. Repeated requests are answered
+    with the recorded responses in order, and the last one again once they run out. Bodies are served exactly as
+    recorded, so decompression and the transfer accounting behave as they did live.
+
+    A simple example:
+    >>> api = TheOneApi(key, transport=ReplayTransport("tests/cassettes/theoneapi.ndjson"))
+    >>> Movies(api).fetch()
+
+    Attributes
+    ----------
+    path : str
+        The cassette file.
+    latency : bool
+        Whether to wait as long as the recorded request took, both for the headers and while reading the body.
+    match_authorization : bool
+        Whether the api key has to match the recorded one.
+    """
+
+    def __init__(self, path: str, latency: bool = False, match_authorization: bool = True) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            The cassette file.
+        latency : bool, optional
+            Whether to reproduce the recorded latencies, by default False (answer immediately).
+        match_authorization : bool, optional
+            Whether the api key has to match the recorded one, by default True
+        """
+
+        self.path = path
+        self.latency = latency
+        self.match_authorization = match_authorization
+        self._lock = threading.Lock()
+        self._interactions = {}
+        self._served = {}
+        with open(path, encoding="utf-8") as cassette:
+            for line in cassette:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions.setdefault(self._key(interaction["url"], interaction), []).append(interaction)
+
+    def __len__(self) -> int:
+        return sum(len(interactions) for interactions in self._interactions.values())
+
+    def send(self, url: str, headers: dict, timeout: Union[float, tuple] = None, chunk_size: int = 65536) -> Response:
+        key = self._key(url, {"authorization": authorization_digest(headers)})
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if interactions is None:
+                raise CassetteMiss(f"No recorded response for GET {url} in {self.path}")
+            served = self._served.get(key, 0)
+            self._served[key] = served + 1
+        interaction = interactions[min(served, len(interactions) - 1)]
+
+        if self.latency:
+            time.sleep(interaction["ttfb"])
+        body = base64.b64decode(interaction["body"])
+        return Response(interaction["status"], interaction["headers"], self._chunks(body, chunk_size, interaction))
+
+    def _key(self, url: str, interaction: dict) -> tuple:
+        return (url, self.match_authorization and interaction["authorization"] or "")
+
+    def _chunks(self, body: bytes, chunk_size: int, interaction: dict) -> Iterator[bytes]:
+        count = max(1, -(-len(body) // chunk_size))
+        pause = self.latency and max(0.0, interaction["seconds"] - interaction["ttfb"]) / count or 0.0
+        for start in range(0, len(body), chunk_size):
+            if pause:
+                time.sleep(pause)
+            yield body[start:start + chunk_size]